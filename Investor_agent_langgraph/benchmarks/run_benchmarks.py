@@ -0,0 +1,449 @@
+"""
+Benchmark suite for the investor pipeline.
+
+Runs offline against API fixtures (generated with the synthetic responder of
+tools/replay.py on first use) and a fake chat model, and stores the timings
+per commit under benchmarks/results/<machine>/<commit>.json (ignored by git,
+like the fixtures) so that runs of different commits can be compared:
+
+    poetry run python benchmarks/run_benchmarks.py
+    poetry run python benchmarks/run_benchmarks.py --compare <commit>
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# Keep the insider index of the benchmarks away from the real one
+os.environ.setdefault(
+    "INSIDER_TRADES_DB", os.path.join(tempfile.mkdtemp(), "insider_trades.sqlite")
+)
+
+import numpy as np
+import pandas as pd
+
+from tools import replay, rolling
+from tools.execution import CommissionSchedule, ExecutionModel, VolatilitySlippage
+from tools.api import get_prices, price_memory_report, prices_to_df
+from tools.decision_log import DecisionLog
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+TICKER = "AAPL"
+ANALYZE_START = "2023-12-01"
+ANALYZE_END = "2024-03-01"
+BACKTEST_START = "2024-01-02"
+BACKTEST_DAYS = 60
+
+# Bars per series for the indicator benchmarks (6 months, 2 and 10 years)
+SERIES_LENGTHS = [126, 504, 2520]
+
+# Series lengths and window for the rolling-moments kernels (10 to 1000 years)
+KERNEL_LENGTHS = [2520, 25200, 252000]
+KERNEL_WINDOW = 63
+
+# Assets x bars of the vectorized execution benchmarks
+EXECUTION_SHAPE = (500, 2520)
+
+# Decisions in the replayed log (10 years of daily decisions)
+REPLAY_DECISIONS = 2520
+
+# Universe the price-frame memory report is scaled to (10 years of daily bars)
+MEMORY_TICKERS = 5000
+MEMORY_BARS = 2520
+
+# A benchmark slower than the baseline by more than this ratio is a regression
+REGRESSION_RATIO = 1.2
+
+
+def time_callable(fn, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Time fn asv-style: calibrate a loop count, then keep the per-call stats.
+
+    Returns:
+        dict: min, median, mean and stdev in seconds per call, plus the
+        loop count and number of repeats
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 10_000:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def use_fixtures(refresh: bool = False):
+    """Mount the replay transport, recording synthetic fixtures if needed."""
+    mode = "record" if refresh or not os.path.isdir(FIXTURES_DIR) else "replay"
+    replay.install(
+        replay.ReplayBackend(
+            replay.FixtureStore(FIXTURES_DIR),
+            mode=mode,
+            upstream=replay.SyntheticResponder(),
+        )
+    )
+    return mode
+
+
+def synthetic_prices(length: int) -> list:
+    end = pd.Timestamp(ANALYZE_END)
+    start = end - pd.tseries.offsets.BDay(length - 1)
+    status, payload = replay.SyntheticResponder()(
+        "GET",
+        f"/prices/?ticker=BENCH&start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}",
+    )
+    return payload["prices"]
+
+
+def synthetic_prices_df(length: int) -> pd.DataFrame:
+    return prices_to_df(synthetic_prices(length))
+
+
+def memory_report() -> dict:
+    """Bytes per bar of default and compact price frames, scaled to a universe."""
+    prices = synthetic_prices(MEMORY_BARS)
+    report = {}
+    for layout, compact in (("default", False), ("compact", True)):
+        bytes_per_bar = price_memory_report(prices_to_df(prices, compact=compact))["total"]
+        report[f"prices_df[{layout}].bytes_per_bar"] = bytes_per_bar
+        report[f"prices_df[{layout}].universe_gb"] = (
+            bytes_per_bar * MEMORY_BARS * MEMORY_TICKERS / 1e9
+        )
+    return report
+
+
+def synthetic_decision_log(length: int):
+    """A decision log over synthetic bars cycling through the canned decisions."""
+    log = DecisionLog(TICKER, 100000)
+    signals = {"technical_analyst_agent": {"signal": "bullish"}, "sentiment_agent": {"signal": "neutral"}}
+    prices_df = synthetic_prices_df(length)
+    for i, (date, bar) in enumerate(prices_df.iterrows()):
+        decision = replay.DEFAULT_DECISIONS[i % len(replay.DEFAULT_DECISIONS)]
+        log.append(
+            date.strftime("%Y-%m-%d"), decision, bar, max_position_size=20000.0,
+            raw_decision=json.dumps(decision), analyst_signals=signals,
+        )
+    return log
+
+
+def pandas_rolling_moments(series: pd.Series, window: int) -> pd.DataFrame:
+    """The four separate pandas passes rolling.rolling_moments replaces."""
+    r = series.rolling(window)
+    return pd.DataFrame({"mean": r.mean(), "std": r.std(), "skew": r.skew(), "kurt": r.kurt()})
+
+
+def rolling_parity_cases() -> dict:
+    """Series on which rolling.rolling_moments must agree with pandas."""
+    rng = np.random.default_rng(0)
+    normal = rng.normal(size=5000)
+    # A constant stretch far from the centre of its block
+    constant_block = normal.copy()
+    constant_block[2000:2100] = 5.0
+    with_gaps = rng.standard_t(4, 5000) * 0.02
+    with_gaps[[10, 700, 701, 4000]] = np.nan
+    return {
+        "normal": normal,
+        "trending": 1000 + np.cumsum(normal),
+        "constant_block": constant_block,
+        "tiny_scale": normal * 1e-9,
+        "with_gaps": with_gaps,
+    }
+
+
+def check_rolling_parity():
+    """Fail before timing anything if the fused kernel disagrees with pandas."""
+    engines = ["numpy"] + (["numba"] if rolling.numba is not None else [])
+    for name, values in rolling_parity_cases().items():
+        series = pd.Series(values)
+        expected = pandas_rolling_moments(series, KERNEL_WINDOW)
+        # Mean and std are on the scale of the data; skew and kurtosis are
+        # dimensionless, and pandas' own error on them reaches ~1e-6
+        atol = {"mean": 1e-8 * np.nanstd(values), "std": 1e-8 * np.nanstd(values), "skew": 1e-5, "kurt": 1e-5}
+        for engine in engines:
+            actual = rolling.rolling_moments(series, KERNEL_WINDOW, engine=engine)
+            for column in expected:
+                np.testing.assert_allclose(
+                    actual[column], expected[column], rtol=1e-5, atol=atol[column],
+                    err_msg=f"rolling_moments[{engine}] {column} differs from pandas on {name}",
+                )
+
+
+def new_state(portfolio: dict = None) -> dict:
+    return {
+        "messages": [],
+        "data": {
+            "ticker": TICKER,
+            "portfolio": portfolio or {"cash": 100000.0, "stock": 0},
+            "start_date": ANALYZE_START,
+            "end_date": ANALYZE_END,
+            "analyst_signals": {},
+        },
+        "metadata": {"show_reasoning": False},
+    }
+
+
+def collect_benchmarks() -> dict:
+    """Return {benchmark name: zero-argument callable}."""
+    from agents import technicals
+    from agents.fundamentals import fundamentals_agent
+    from agents.portfolio_manager import portfolio_management_agent
+    from agents.risk_manager import risk_management_agent
+    from agents.sentiment import sentiment_agent
+    from agents.technicals import technical_analyst_agent
+    from agents.valuation import valuation_agent
+    from backtester import Backtester, replay_backtest
+    from main import HedgeFundAgent, create_workflow
+
+    benchmarks = {}
+
+    # Data layer
+    raw_prices = get_prices(TICKER, ANALYZE_START, ANALYZE_END)
+    benchmarks["data.prices_to_df"] = lambda: prices_to_df(raw_prices)
+    benchmarks["data.prices_to_df[compact]"] = lambda: prices_to_df(raw_prices, compact=True)
+
+    # Indicators at several series lengths
+    indicators = {
+        "calculate_rsi": technicals.calculate_rsi,
+        "calculate_bollinger_bands": technicals.calculate_bollinger_bands,
+        "calculate_ema": lambda df: technicals.calculate_ema(df, 21),
+        "calculate_adx": technicals.calculate_adx,
+        "calculate_atr": technicals.calculate_atr,
+        "calculate_hurst_exponent": lambda df: technicals.calculate_hurst_exponent(df["close"]),
+        "calculate_trend_signals": technicals.calculate_trend_signals,
+        "calculate_mean_reversion_signals": technicals.calculate_mean_reversion_signals,
+        "calculate_momentum_signals": technicals.calculate_momentum_signals,
+        "calculate_volatility_signals": technicals.calculate_volatility_signals,
+        "calculate_stat_arb_signals": technicals.calculate_stat_arb_signals,
+    }
+    for length in SERIES_LENGTHS:
+        prices_df = synthetic_prices_df(length)
+        for name, fn in indicators.items():
+            benchmarks[f"indicators.{name}[{length}]"] = (
+                lambda fn=fn, df=prices_df: fn(df.copy())
+            )
+
+    # Rolling moments: fused kernel against pandas on long return series
+    engines = ["numpy"] + (["numba"] if rolling.numba is not None else [])
+    for length in KERNEL_LENGTHS:
+        returns = pd.Series(np.random.default_rng(length).standard_t(4, length) * 0.02)
+        benchmarks[f"kernels.pandas_rolling_moments[{length}]"] = (
+            lambda r=returns: pandas_rolling_moments(r, KERNEL_WINDOW)
+        )
+        for engine in engines:
+            benchmarks[f"kernels.rolling_moments[{engine},{length}]"] = (
+                lambda r=returns, engine=engine: rolling.rolling_moments(r, KERNEL_WINDOW, engine=engine)
+            )
+
+    # Execution model over a multi-asset, multi-year panel of bars
+    rng = np.random.default_rng(0)
+    assets, bars = EXECUTION_SHAPE
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, EXECUTION_SHAPE), axis=1))
+    volume = rng.integers(100_000, 5_000_000, EXECUTION_SHAPE).astype(np.float64)
+    high, low = close * 1.01, close * 0.99
+    side = rng.choice([-1, 0, 1], EXECUTION_SHAPE)
+    quantity = rng.integers(1, 50_000, EXECUTION_SHAPE)
+    model = ExecutionModel(
+        CommissionSchedule(per_share=0.005, minimum=1.0),
+        VolatilitySlippage(coefficient=0.5, half_spread_bps=2.0),
+        participation_rate=0.01,
+    )
+    benchmarks[f"execution.execute[{assets}x{bars}]"] = lambda: model.execute(
+        side, quantity, close, cash=1e6, holdings=1e4, volume=volume, high=high, low=low
+    )
+    benchmarks[f"execution.schedule[{assets}x{bars}]"] = lambda: model.schedule(
+        quantity[:, 0], volume
+    )
+
+    # Re-running the accounting of a logged backtest under other costs
+    decision_log = synthetic_decision_log(REPLAY_DECISIONS)
+    log_path = os.path.join(tempfile.mkdtemp(), "decisions.npz")
+    decision_log.save(log_path)
+    benchmarks[f"replay.DecisionLog.save[{REPLAY_DECISIONS}]"] = lambda: decision_log.save(log_path)
+    benchmarks[f"replay.DecisionLog.load[{REPLAY_DECISIONS}]"] = lambda: DecisionLog.load(log_path)
+    benchmarks[f"replay.replay_backtest[{REPLAY_DECISIONS}]"] = lambda: replay_backtest(
+        decision_log, execution_model=model
+    )
+
+    # Agent nodes, each on a fresh state
+    llm = replay.fake_llm()
+    nodes = {
+        "technical_analyst_agent": technical_analyst_agent,
+        "fundamentals_agent": fundamentals_agent,
+        "sentiment_agent": sentiment_agent,
+        "valuation_agent": valuation_agent,
+        "risk_management_agent": risk_management_agent,
+    }
+    for name, node in nodes.items():
+        benchmarks[f"agents.{name}"] = lambda node=node: node(new_state())
+
+    filled_state = new_state()
+    for node in nodes.values():
+        node(filled_state)
+    benchmarks["agents.portfolio_management_agent"] = (
+        lambda: portfolio_management_agent(filled_state, llm)
+    )
+
+    # Startup: a fresh interpreter importing each entry point, as paid by
+    # every CLI invocation, and building an agent once the graph is compiled
+    for module in ("main", "backtester", "live"):
+        benchmarks[f"startup.import_{module}"] = lambda module=module: subprocess.run(
+            [sys.executable, "-c", f"import {module}"], cwd=os.path.join(ROOT, "src"), check=True
+        )
+    benchmarks["startup.create_workflow.compile"] = lambda: create_workflow().compile()
+    benchmarks["startup.HedgeFundAgent"] = lambda: HedgeFundAgent(llm)
+
+    # Whole pipeline
+    agent = HedgeFundAgent(llm)
+    benchmarks["pipeline.HedgeFundAgent.analyze"] = lambda: agent.analyze(
+        ticker=TICKER,
+        portfolio={"cash": 100000.0, "stock": 0},
+        start_date=ANALYZE_START,
+        end_date=ANALYZE_END,
+    )
+
+    backtest_end = pd.bdate_range(BACKTEST_START, periods=BACKTEST_DAYS)[-1]
+
+    def run_backtest(prefetch_days=3):
+        backtester = Backtester(
+            agent=agent,
+            ticker=TICKER,
+            start_date=BACKTEST_START,
+            end_date=backtest_end.strftime("%Y-%m-%d"),
+            initial_capital=100000,
+            api_delay=0,
+            prefetch_days=prefetch_days,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            backtester.run_backtest()
+
+    benchmarks[f"pipeline.Backtester.run_backtest[{BACKTEST_DAYS}d]"] = run_backtest
+    benchmarks[f"pipeline.Backtester.run_backtest[{BACKTEST_DAYS}d,no_prefetch]"] = (
+        lambda: run_backtest(prefetch_days=0)
+    )
+    return benchmarks
+
+
+def current_commit() -> str:
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+        dirty = subprocess.check_output(
+            ["git", "status", "--porcelain", "--", "src"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def results_path(commit: str, machine: str) -> str:
+    return os.path.join(RESULTS_DIR, machine, f"{commit}.json")
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Print the ratio against the baseline and return the regressed names."""
+    regressions = []
+    print(f"\n{'Benchmark':<60} {'Baseline':>12} {'Current':>12} {'Ratio':>8}")
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > REGRESSION_RATIO:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<60} {baseline[name]['median'] * 1e3:>10.3f}ms "
+            f"{current['median'] * 1e3:>10.3f}ms {ratio:>7.2f}x{flag}"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the investor pipeline benchmarks")
+    parser.add_argument("--filter", type=str, default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark (default: 5)")
+    parser.add_argument("--refresh-fixtures", action="store_true", help="Re-record the API fixtures")
+    parser.add_argument("--compare", type=str, help="Commit whose stored results to compare against")
+    parser.add_argument("--machine", type=str, default=platform.node() or "local", help="Machine name results are stored under")
+    args = parser.parse_args()
+
+    check_rolling_parity()
+    mode = use_fixtures(refresh=args.refresh_fixtures)
+    benchmarks = collect_benchmarks()
+    if mode == "record":
+        # The first call of every benchmark records the fixtures it needs
+        for fn in benchmarks.values():
+            fn()
+        use_fixtures()
+        benchmarks = collect_benchmarks()
+
+    results = {}
+    for name, fn in benchmarks.items():
+        if args.filter not in name:
+            continue
+        fn()  # warm up
+        results[name] = time_callable(fn, repeat=args.repeat)
+        print(f"{name:<60} {results[name]['median'] * 1e3:>10.3f}ms")
+
+    memory = memory_report()
+    print(f"\nPrice frames ({MEMORY_TICKERS} tickers x {MEMORY_BARS} bars):")
+    for layout in ("default", "compact"):
+        print(
+            f"  {layout:<8} {memory[f'prices_df[{layout}].bytes_per_bar']:>7.1f} bytes/bar "
+            f"{memory[f'prices_df[{layout}].universe_gb']:>7.2f} GB"
+        )
+
+    commit = current_commit()
+    path = results_path(commit, args.machine)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "commit": commit,
+                "machine": args.machine,
+                "python": platform.python_version(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "results": results,
+                "memory": memory,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults stored in {os.path.relpath(path, ROOT)}")
+
+    if args.compare:
+        with open(results_path(args.compare, args.machine)) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline):
+            sys.exit(1)
@@ -1,12 +1,41 @@
 from langchain_core.messages import HumanMessage
 
+from graph.memo import record_report_period
 from graph.state import AgentState, show_agent_reasoning
 
 import json
+import pandas as pd
+import numpy as np
 
 from tools.api import get_financial_metrics
 
 
+# Metrics consumed by the fundamental scoring rules
+FUNDAMENTAL_METRICS = [
+    "return_on_equity",
+    "net_margin",
+    "operating_margin",
+    "revenue_growth",
+    "earnings_growth",
+    "book_value_growth",
+    "current_ratio",
+    "debt_to_equity",
+    "free_cash_flow_per_share",
+    "earnings_per_share",
+    "price_to_earnings_ratio",
+    "price_to_book_ratio",
+    "price_to_sales_ratio",
+]
+
+# Names of the per-aspect signal columns, in the order they are combined
+FUNDAMENTAL_SIGNALS = [
+    "profitability_signal",
+    "growth_signal",
+    "financial_health_signal",
+    "price_ratios_signal",
+]
+
+
 ##### Fundamental Agent #####
 def fundamentals_agent(state: AgentState):
     """Analyzes fundamental data and generates trading signals."""
@@ -23,166 +52,54 @@ def fundamentals_agent(state: AgentState):
 
     # Pull the most recent financial metrics
     metrics = financial_metrics[0]
-
-    # Initialize signals list for different fundamental aspects
-    signals = []
-    reasoning = {}
-
-    # 1. Profitability Analysis
-    return_on_equity = metrics.get("return_on_equity")
-    net_margin = metrics.get("net_margin")
-    operating_margin = metrics.get("operating_margin")
-
-    thresholds = [
-        (return_on_equity, 0.15),  # Strong ROE above 15%
-        (net_margin, 0.20),  # Healthy profit margins
-        (operating_margin, 0.15),  # Strong operating efficiency
-    ]
-    profitability_score = sum(
-        metric is not None and metric > threshold for metric, threshold in thresholds
-    )
-
-    signals.append(
-        "bullish"
-        if profitability_score >= 2
-        else "bearish" if profitability_score == 0 else "neutral"
-    )
-    reasoning["profitability_signal"] = {
-        "signal": signals[0],
-        "details": (
-            f"ROE: {metrics['return_on_equity']:.2%}"
-            if metrics["return_on_equity"]
-            else "ROE: N/A"
-        )
-        + ", "
-        + (
-            f"Net Margin: {metrics['net_margin']:.2%}"
-            if metrics["net_margin"]
-            else "Net Margin: N/A"
-        )
-        + ", "
-        + (
-            f"Op Margin: {metrics['operating_margin']:.2%}"
-            if metrics["operating_margin"]
-            else "Op Margin: N/A"
-        ),
-    }
-
-    # 2. Growth Analysis
-    revenue_growth = metrics.get("revenue_growth")
-    earnings_growth = metrics.get("earnings_growth")
-    book_value_growth = metrics.get("book_value_growth")
-
-    thresholds = [
-        (revenue_growth, 0.10),  # 10% revenue growth
-        (earnings_growth, 0.10),  # 10% earnings growth
-        (book_value_growth, 0.10),  # 10% book value growth
-    ]
-    growth_score = sum(
-        metric is not None and metric > threshold for metric, threshold in thresholds
-    )
-
-    signals.append(
-        "bullish"
-        if growth_score >= 2
-        else "bearish" if growth_score == 0 else "neutral"
-    )
-    reasoning["growth_signal"] = {
-        "signal": signals[1],
-        "details": (
-            f"Revenue Growth: {metrics['revenue_growth']:.2%}"
-            if metrics["revenue_growth"]
-            else "Revenue Growth: N/A"
-        )
-        + ", "
-        + (
-            f"Earnings Growth: {metrics['earnings_growth']:.2%}"
-            if metrics["earnings_growth"]
-            else "Earnings Growth: N/A"
-        ),
-    }
-
-    # 3. Financial Health
-    current_ratio = metrics.get("current_ratio")
-    debt_to_equity = metrics.get("debt_to_equity")
-    free_cash_flow_per_share = metrics.get("free_cash_flow_per_share")
-    earnings_per_share = metrics.get("earnings_per_share")
-
-    health_score = 0
-    if current_ratio and current_ratio > 1.5:  # Strong liquidity
-        health_score += 1
-    if debt_to_equity and debt_to_equity < 0.5:  # Conservative debt levels
-        health_score += 1
-    if (
-        free_cash_flow_per_share
-        and earnings_per_share
-        and free_cash_flow_per_share > earnings_per_share * 0.8
-    ):  # Strong FCF conversion
-        health_score += 1
-
-    signals.append(
-        "bullish"
-        if health_score >= 2
-        else "bearish" if health_score == 0 else "neutral"
-    )
-    reasoning["financial_health_signal"] = {
-        "signal": signals[2],
-        "details": (
-            f"Current Ratio: {metrics['current_ratio']:.2f}"
-            if metrics["current_ratio"]
-            else "Current Ratio: N/A"
-        )
-        + ", "
-        + (
-            f"D/E: {metrics['debt_to_equity']:.2f}"
-            if metrics["debt_to_equity"]
-            else "D/E: N/A"
-        ),
-    }
-
-    # 4. Price to X ratios
-    pe_ratio = metrics.get("price_to_earnings_ratio")
-    pb_ratio = metrics.get("price_to_book_ratio")
-    ps_ratio = metrics.get("price_to_sales_ratio")
-
-    thresholds = [
-        (pe_ratio, 25),  # Reasonable P/E ratio
-        (pb_ratio, 3),  # Reasonable P/B ratio
-        (ps_ratio, 5),  # Reasonable P/S ratio
-    ]
-    price_ratio_score = sum(
-        metric is not None and metric > threshold for metric, threshold in thresholds
-    )
-
-    signals.append(
-        "bullish"
-        if price_ratio_score >= 2
-        else "bearish" if price_ratio_score == 0 else "neutral"
-    )
-    reasoning["price_ratios_signal"] = {
-        "signal": signals[3],
-        "details": (f"P/E: {pe_ratio:.2f}" if pe_ratio else "P/E: N/A")
-        + ", "
-        + (f"P/B: {pb_ratio:.2f}" if pb_ratio else "P/B: N/A")
-        + ", "
-        + (f"P/S: {ps_ratio:.2f}" if ps_ratio else "P/S: N/A"),
+    record_report_period(data["ticker"], metrics.get("report_period"))
+
+    # Score the metrics with the same rules used to screen the universe
+    screen = screen_fundamentals(pd.DataFrame([metrics])).iloc[0]
+    overall_signal = screen["signal"]
+    confidence = float(screen["confidence"])
+
+    reasoning = {
+        "profitability_signal": {
+            "signal": screen["profitability_signal"],
+            "details": ", ".join(
+                [
+                    format_metric(metrics, "return_on_equity", "ROE", ".2%"),
+                    format_metric(metrics, "net_margin", "Net Margin", ".2%"),
+                    format_metric(metrics, "operating_margin", "Op Margin", ".2%"),
+                ]
+            ),
+        },
+        "growth_signal": {
+            "signal": screen["growth_signal"],
+            "details": ", ".join(
+                [
+                    format_metric(metrics, "revenue_growth", "Revenue Growth", ".2%"),
+                    format_metric(metrics, "earnings_growth", "Earnings Growth", ".2%"),
+                ]
+            ),
+        },
+        "financial_health_signal": {
+            "signal": screen["financial_health_signal"],
+            "details": ", ".join(
+                [
+                    format_metric(metrics, "current_ratio", "Current Ratio", ".2f"),
+                    format_metric(metrics, "debt_to_equity", "D/E", ".2f"),
+                ]
+            ),
+        },
+        "price_ratios_signal": {
+            "signal": screen["price_ratios_signal"],
+            "details": ", ".join(
+                [
+                    format_metric(metrics, "price_to_earnings_ratio", "P/E", ".2f"),
+                    format_metric(metrics, "price_to_book_ratio", "P/B", ".2f"),
+                    format_metric(metrics, "price_to_sales_ratio", "P/S", ".2f"),
+                ]
+            ),
+        },
     }
 
-    # Determine overall signal
-    bullish_signals = signals.count("bullish")
-    bearish_signals = signals.count("bearish")
-
-    if bullish_signals > bearish_signals:
-        overall_signal = "bullish"
-    elif bearish_signals > bullish_signals:
-        overall_signal = "bearish"
-    else:
-        overall_signal = "neutral"
-
-    # Calculate confidence level
-    total_signals = len(signals)
-    confidence = round(max(bullish_signals, bearish_signals) / total_signals, 2) * 100
-
     message_content = {
         "signal": overall_signal,
         "confidence": confidence,
@@ -210,3 +127,100 @@ def fundamentals_agent(state: AgentState):
         "messages": [message],
         "data": data,
     }
+
+
+def screen_fundamentals(metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applies the fundamental scoring rules to a whole universe at once.
+
+    Every rule is evaluated as a column operation, so scoring thousands of
+    tickers costs the same handful of vectorized passes as scoring one.
+    Missing metrics never count towards a score.
+
+    Args:
+        metrics_df: One row per ticker with the columns in FUNDAMENTAL_METRICS
+            (extra columns are ignored, missing ones are treated as N/A)
+
+    Returns:
+        DataFrame indexed like metrics_df with the per-aspect scores and
+        signals plus the overall "signal" and "confidence" (0-100)
+    """
+    m = metrics_df.reindex(columns=FUNDAMENTAL_METRICS).apply(
+        pd.to_numeric, errors="coerce"
+    )
+
+    # 1. Profitability: strong ROE, healthy margins, operating efficiency
+    profitability_score = (
+        (m["return_on_equity"] > 0.15).astype(int)
+        + (m["net_margin"] > 0.20).astype(int)
+        + (m["operating_margin"] > 0.15).astype(int)
+    )
+
+    # 2. Growth: 10% revenue, earnings and book value growth
+    growth_score = (
+        (m["revenue_growth"] > 0.10).astype(int)
+        + (m["earnings_growth"] > 0.10).astype(int)
+        + (m["book_value_growth"] > 0.10).astype(int)
+    )
+
+    # 3. Financial health: liquidity, conservative debt, FCF conversion
+    # (a zero D/E, FCF or EPS is treated as unavailable)
+    fcf = m["free_cash_flow_per_share"]
+    eps = m["earnings_per_share"]
+    health_score = (
+        (m["current_ratio"] > 1.5).astype(int)
+        + ((m["debt_to_equity"] != 0) & (m["debt_to_equity"] < 0.5)).astype(int)
+        + ((fcf != 0) & (eps != 0) & (fcf > eps * 0.8)).astype(int)
+    )
+
+    # 4. Price to X ratios
+    price_ratio_score = (
+        (m["price_to_earnings_ratio"] > 25).astype(int)
+        + (m["price_to_book_ratio"] > 3).astype(int)
+        + (m["price_to_sales_ratio"] > 5).astype(int)
+    )
+
+    scores = pd.DataFrame(
+        {
+            "profitability_score": profitability_score,
+            "growth_score": growth_score,
+            "health_score": health_score,
+            "price_ratio_score": price_ratio_score,
+        },
+        index=metrics_df.index,
+    )
+    signals = pd.DataFrame(
+        np.select(
+            [scores.values >= 2, scores.values == 0],
+            ["bullish", "bearish"],
+            default="neutral",
+        ),
+        columns=FUNDAMENTAL_SIGNALS,
+        index=metrics_df.index,
+    )
+
+    # Determine overall signal
+    bullish_signals = (signals == "bullish").sum(axis=1)
+    bearish_signals = (signals == "bearish").sum(axis=1)
+    overall_signal = np.select(
+        [bullish_signals > bearish_signals, bearish_signals > bullish_signals],
+        ["bullish", "bearish"],
+        default="neutral",
+    )
+
+    # Calculate confidence level
+    total_signals = len(FUNDAMENTAL_SIGNALS)
+    confidence = (
+        np.maximum(bullish_signals, bearish_signals) / total_signals
+    ).round(2) * 100
+
+    result = pd.concat([scores, signals], axis=1)
+    result["signal"] = overall_signal
+    result["confidence"] = confidence
+    return result
+
+
+def format_metric(metrics: dict, key: str, label: str, fmt: str) -> str:
+    """Format a single metric for the reasoning details, N/A when missing."""
+    value = metrics.get(key)
+    return f"{label}: {value:{fmt}}" if value else f"{label}: N/A"
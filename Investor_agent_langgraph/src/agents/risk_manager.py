@@ -3,7 +3,7 @@ import math
 from langchain_core.messages import HumanMessage
 
 from graph.state import AgentState, show_agent_reasoning
-from tools.api import get_prices, prices_to_df
+from agents.technicals import get_indicator_context
 
 import json
 import ast
@@ -15,20 +15,16 @@ def risk_management_agent(state: AgentState):
     portfolio = state["data"]["portfolio"]
     data = state["data"]
     
-    prices = get_prices(
-        ticker=data["ticker"],
-        start_date=data["start_date"],
-        end_date=data["end_date"],
-    )
-    prices_df = prices_to_df(prices)
+    # Reuse the prices and series already built by the technical analyst
+    indicators = get_indicator_context(data)
     
     # Calculate portfolio value
-    current_price = prices_df["close"].iloc[-1]
+    current_price = indicators["last_close"]
     current_stock_value = portfolio["stock"] * current_price
     total_portfolio_value = portfolio["cash"] + current_stock_value
 
     # 1. Liquidity Check
-    avg_daily_volume = prices_df["volume"].mean()
+    avg_daily_volume = indicators["volume_mean"]
     daily_dollar_volume = avg_daily_volume * current_price
     
     # Don't take more than 10% of average daily volume
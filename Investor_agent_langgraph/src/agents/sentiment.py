@@ -4,7 +4,11 @@ import pandas as pd
 import numpy as np
 import json
 
-from tools.api import get_insider_trades
+from tools.insider_store import get_insider_store
+
+# How far back insider filings are considered and how fast they fade
+INSIDER_LOOKBACK_DAYS = 180
+INSIDER_HALF_LIFE_DAYS = 30
 
 ##### Sentiment Agent #####
 
@@ -14,38 +18,33 @@ def sentiment_agent(state: AgentState):
     data = state.get("data", {})
     end_date = data.get("end_date")
     ticker = data.get("ticker")
+    lookback_start = _lookback_start(end_date)
 
-    # Get the insider trades
-    insider_trades = get_insider_trades(
-        ticker=ticker,
-        end_date=end_date,
-        limit=5,
-    )
+    # Bring the local insider index up to date and read the lookback window
+    store = get_insider_store()
+    store.sync(ticker, end_date=end_date, start_date=lookback_start)
+    insider_trades = store.load([ticker], start_date=lookback_start, end_date=end_date)
 
-    # Get the signals from the insider trades
-    transaction_shares = pd.Series(
-        [t.get("transaction_shares") for t in insider_trades]
-    ).dropna()
-    bearish_condition = transaction_shares < 0
-    signals = np.where(bearish_condition, "bearish", "bullish").tolist()
-
-    # Determine overall signal
-    bullish_signals = signals.count("bullish")
-    bearish_signals = signals.count("bearish")
-    if bullish_signals > bearish_signals:
-        overall_signal = "bullish"
-    elif bearish_signals > bullish_signals:
-        overall_signal = "bearish"
+    sentiment = calculate_insider_sentiment(
+        insider_trades, end_date=end_date, half_life_days=INSIDER_HALF_LIFE_DAYS
+    )
+    if ticker in sentiment.index:
+        row = sentiment.loc[ticker]
+        score = float(row["score"])
+        overall_signal = row["signal"]
+        buy_value, sell_value = float(row["buy_value"]), float(row["sell_value"])
+        num_trades = int(row["num_trades"])
     else:
-        overall_signal = "neutral"
+        score, overall_signal = 0.0, "neutral"
+        buy_value = sell_value = 0.0
+        num_trades = 0
 
-    # Calculate confidence level based on the proportion of indicators agreeing
-    total_signals = len(signals)
-    confidence = 0  # Default confidence when there are no signals
-    if total_signals > 0:
-        confidence = round(max(bullish_signals, bearish_signals) / total_signals, 2) * 100
+    # Confidence is the strength of the dollar-weighted imbalance
+    confidence = round(abs(score), 2) * 100
     reasoning = (
-        f"Bullish signals: {bullish_signals}, Bearish signals: {bearish_signals}"
+        f"Insider trades: {num_trades}, "
+        f"Bought: ${buy_value:,.0f}, Sold: ${sell_value:,.0f}, "
+        f"Decayed score: {score:.2f}"
     )
 
     message_content = {
@@ -75,3 +74,93 @@ def sentiment_agent(state: AgentState):
         "messages": [message],
         "data": data,
     }
+
+
+def _lookback_start(end_date: str) -> str:
+    return (
+        pd.Timestamp(end_date) - pd.Timedelta(days=INSIDER_LOOKBACK_DAYS)
+    ).strftime("%Y-%m-%d")
+
+
+def sentiment_fingerprint(state: AgentState):
+    """
+    Fingerprint of the insider filings the sentiment agent would read.
+
+    The score is a ratio of decayed flows, so shifting end_date scales every
+    filing alike and leaves it unchanged; only the set of filings in the
+    lookback window matters.
+    """
+    data = state["data"]
+    ticker, end_date = data["ticker"], data["end_date"]
+    lookback_start = _lookback_start(end_date)
+    store = get_insider_store()
+    store.sync(ticker, end_date=end_date, start_date=lookback_start)
+    return (ticker,) + tuple(store.window_summary(ticker, lookback_start, end_date))
+
+
+def calculate_insider_sentiment(
+    trades_df: pd.DataFrame,
+    end_date: str,
+    window_days: int = None,
+    half_life_days: float = INSIDER_HALF_LIFE_DAYS,
+    threshold: float = 0.1,
+) -> pd.DataFrame:
+    """
+    Dollar-weighted, time-decayed insider sentiment for many tickers at once.
+
+    Each filing contributes its dollar value (signed by the direction of the
+    trade) times exp-decay on its age at end_date. The score is the net
+    decayed flow over the gross decayed flow, so it lies in [-1, 1].
+
+    Args:
+        trades_df: Insider filings with ticker, filing_date, transaction_shares
+            and transaction_value / transaction_price_per_share columns
+        end_date: Date the sentiment is evaluated at (YYYY-MM-DD)
+        window_days: Only use filings from the last window_days (all if None)
+        half_life_days: Age in days at which a filing counts half
+        threshold: Absolute score above which the signal is directional
+
+    Returns:
+        DataFrame indexed by ticker with score, signal, buy_value,
+        sell_value and num_trades
+    """
+    columns = ["score", "signal", "buy_value", "sell_value", "num_trades"]
+    if trades_df.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="ticker"))
+
+    end = pd.Timestamp(end_date)
+    filing_date = pd.to_datetime(trades_df["filing_date"]).dt.tz_localize(None)
+    age_days = (end - filing_date).dt.days
+
+    shares = pd.to_numeric(trades_df["transaction_shares"], errors="coerce")
+    value = pd.to_numeric(trades_df["transaction_value"], errors="coerce").abs()
+    value = value.fillna(
+        (shares * pd.to_numeric(trades_df["transaction_price_per_share"], errors="coerce")).abs()
+    )
+
+    mask = (age_days >= 0) & shares.notna() & value.notna() & (shares != 0)
+    if window_days is not None:
+        mask &= age_days <= window_days
+
+    decay = np.power(0.5, age_days[mask] / half_life_days)
+    direction = np.sign(shares[mask])
+    frame = pd.DataFrame(
+        {
+            "ticker": trades_df["ticker"][mask],
+            "net": direction * value[mask] * decay,
+            "gross": value[mask] * decay,
+            "buy_value": value[mask].where(direction > 0, 0.0),
+            "sell_value": value[mask].where(direction < 0, 0.0),
+        }
+    )
+
+    grouped = frame.groupby("ticker")
+    result = grouped[["net", "gross", "buy_value", "sell_value"]].sum()
+    result["num_trades"] = grouped.size()
+    result["score"] = (result["net"] / result["gross"]).where(result["gross"] > 0, 0.0)
+    result["signal"] = np.select(
+        [result["score"] > threshold, result["score"] < -threshold],
+        ["bullish", "bearish"],
+        default="neutral",
+    )
+    return result[columns]
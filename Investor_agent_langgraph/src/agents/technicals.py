@@ -1,4 +1,6 @@
 import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Tuple
 
 from langchain_core.messages import HumanMessage
 
@@ -9,99 +11,130 @@ import pandas as pd
 import numpy as np
 
 from tools.api import get_prices, prices_to_df
+from tools.rolling import rolling_moments
+
+
+@dataclass
+class TechnicalStrategy:
+    """
+    A technical strategy plugin.
+
+    Attributes:
+        name: Key of the strategy in the weights
+        report_name: Key of the strategy in the analysis report
+        fn: Computes the signal from (prices_df, indicators)
+        weight: Default weight in the ensemble
+        min_history: Bars needed before every metric of the strategy is defined
+        indicators: Names of the INDICATORS the strategy reads, computed
+            ahead of the strategies for every active one
+    """
+
+    name: str
+    report_name: str
+    fn: Callable
+    weight: float
+    min_history: int
+    indicators: Tuple[str, ...] = ()
+
+
+# Registered strategies, in the order they are reported
+TECHNICAL_STRATEGIES: Dict[str, TechnicalStrategy] = {}
+
+
+def register_strategy(
+    name: str,
+    report_name: str,
+    weight: float,
+    min_history: int,
+    indicators: Tuple[str, ...] = (),
+):
+    """
+    Decorator that adds a signal function to TECHNICAL_STRATEGIES.
+
+    Raises:
+        ValueError: If a declared indicator is not in INDICATORS
+    """
+    unknown = [indicator for indicator in indicators if indicator not in INDICATORS]
+    if unknown:
+        raise ValueError(f"Strategy {name} declares unknown indicators: {unknown}")
+
+    def decorator(fn):
+        TECHNICAL_STRATEGIES[name] = TechnicalStrategy(
+            name, report_name, fn, weight, min_history, tuple(indicators)
+        )
+        return fn
+
+    return decorator
 
 
 ##### Technical Analyst #####
 def technical_analyst_agent(state: AgentState):
     """
-    Sophisticated technical analysis system that combines multiple trading strategies:
+    Sophisticated technical analysis system that combines the registered
+    trading strategies (see TECHNICAL_STRATEGIES):
     1. Trend Following
     2. Mean Reversion
     3. Momentum
     4. Volatility Analysis
     5. Statistical Arbitrage Signals
+
+    Strategies with a zero weight or without enough history are skipped
+    before anything is computed, and the remaining ones read their
+    indicators from a context that computes each of them once.
     """
     data = state["data"]
-    start_date = data["start_date"]
-    end_date = data["end_date"]
-
-    # Get the historical price data
-    prices = get_prices(
-        ticker=data["ticker"],
-        start_date=start_date,
-        end_date=end_date,
-    )
-
-    # Convert prices to a DataFrame
-    prices_df = prices_to_df(prices)
 
-    # 1. Trend Following Strategy
-    trend_signals = calculate_trend_signals(prices_df)
+    # Shared with the risk manager, so prices and indicators are built once
+    prices_df = get_indicator_context(data).prices_df
 
-    # 2. Mean Reversion Strategy
-    mean_reversion_signals = calculate_mean_reversion_signals(prices_df)
-
-    # 3. Momentum Strategy
-    momentum_signals = calculate_momentum_signals(prices_df)
-
-    # 4. Volatility Strategy
-    volatility_signals = calculate_volatility_signals(prices_df)
-
-    # 5. Statistical Arbitrage Signals
-    stat_arb_signals = calculate_stat_arb_signals(prices_df)
-
-    # Combine all signals using a weighted ensemble approach
+    # Weights can be overridden per run, e.g. {"momentum": 0}
     strategy_weights = {
-        "trend": 0.25,
-        "mean_reversion": 0.20,
-        "momentum": 0.25,
-        "volatility": 0.15,
-        "stat_arb": 0.15,
+        name: data.get("technical_strategy_weights", {}).get(name, strategy.weight)
+        for name, strategy in TECHNICAL_STRATEGIES.items()
     }
 
-    combined_signal = weighted_signal_combination(
-        {
-            "trend": trend_signals,
-            "mean_reversion": mean_reversion_signals,
-            "momentum": momentum_signals,
-            "volatility": volatility_signals,
-            "stat_arb": stat_arb_signals,
-        },
-        strategy_weights,
+    # Pick the strategies that can contribute
+    active = {}
+    skipped = {}
+    for name, strategy in TECHNICAL_STRATEGIES.items():
+        if strategy_weights[name] <= 0:
+            skipped[strategy.report_name] = "zero weight"
+        elif len(prices_df) < strategy.min_history:
+            skipped[strategy.report_name] = (
+                f"needs {strategy.min_history} bars, got {len(prices_df)}"
+            )
+        else:
+            active[name] = strategy
+
+    # Only the indicators the active strategies declare are computed
+    indicators = get_indicator_context(
+        data, [name for strategy in active.values() for name in strategy.indicators]
     )
+    strategy_signals = {
+        name: strategy.fn(prices_df, indicators) for name, strategy in active.items()
+    }
+
+    # Combine all signals using a weighted ensemble approach
+    combined_signal = weighted_signal_combination(strategy_signals, strategy_weights)
 
     # Generate detailed analysis report
     analysis_report = {
         "signal": combined_signal["signal"],
         "confidence": round(combined_signal["confidence"] * 100),
         "strategy_signals": {
-            "trend_following": {
-                "signal": trend_signals["signal"],
-                "confidence": round(trend_signals["confidence"] * 100),
-                "metrics": normalize_pandas(trend_signals["metrics"]),
-            },
-            "mean_reversion": {
-                "signal": mean_reversion_signals["signal"],
-                "confidence": round(mean_reversion_signals["confidence"] * 100),
-                "metrics": normalize_pandas(mean_reversion_signals["metrics"]),
-            },
-            "momentum": {
-                "signal": momentum_signals["signal"],
-                "confidence": round(momentum_signals["confidence"] * 100),
-                "metrics": normalize_pandas(momentum_signals["metrics"]),
-            },
-            "volatility": {
-                "signal": volatility_signals["signal"],
-                "confidence": round(volatility_signals["confidence"] * 100),
-                "metrics": normalize_pandas(volatility_signals["metrics"]),
-            },
-            "statistical_arbitrage": {
-                "signal": stat_arb_signals["signal"],
-                "confidence": round(stat_arb_signals["confidence"] * 100),
-                "metrics": normalize_pandas(stat_arb_signals["metrics"]),
-            },
+            active[name].report_name: {
+                "signal": signal["signal"],
+                "confidence": (
+                    None if math.isnan(signal["confidence"])
+                    else round(signal["confidence"] * 100)
+                ),
+                "metrics": normalize_pandas(signal["metrics"]),
+            }
+            for name, signal in strategy_signals.items()
         },
     }
+    if skipped:
+        analysis_report["skipped_strategies"] = skipped
 
     # Create the technical analyst message
     message = HumanMessage(
@@ -125,17 +158,128 @@ def technical_analyst_agent(state: AgentState):
     }
 
 
-def calculate_trend_signals(prices_df):
+class IndicatorContext:
+    """
+    Per-frame memo of derived series.
+
+    Each indicator in INDICATORS is computed on first access and reused
+    afterwards, by every strategy and by every node the context is shared
+    with through the state.
+    """
+
+    def __init__(self, prices_df: pd.DataFrame, sources: Dict[str, Callable] = None):
+        """
+        Args:
+            prices_df: Price frame the indicators are derived from
+            sources: Replacements for entries of INDICATORS, e.g. reading
+                the series the live window keeps up to date bar by bar
+        """
+        self.prices_df = prices_df
+        self._sources = sources or {}
+        self._cache = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._cache:
+            self._cache[name] = self._sources.get(name, INDICATORS[name])(self)
+        return self._cache[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cache
+
+    def precompute(self, names: Iterable[str]):
+        """Compute the given indicators now, each at most once."""
+        for name in dict.fromkeys(names):
+            self[name]
+
+
+# Derived series available in an IndicatorContext
+INDICATORS: Dict[str, Callable[[IndicatorContext], object]] = {
+    "close": lambda ctx: ctx.prices_df["close"],
+    "last_close": lambda ctx: ctx["close"].iloc[-1],
+    "returns": lambda ctx: ctx["close"].pct_change(),
+    "volume_mean": lambda ctx: ctx.prices_df["volume"].mean(),
+    "volume_ma_21": lambda ctx: ctx.prices_df["volume"].rolling(21).mean(),
+    "close_moments_50": lambda ctx: rolling_moments(ctx["close"], 50, ("mean", "std")),
+    "returns_moments_63": lambda ctx: rolling_moments(ctx["returns"], 63, ("skew", "kurt")),
+    "ema_8": lambda ctx: calculate_ema(ctx.prices_df, 8),
+    "ema_21": lambda ctx: calculate_ema(ctx.prices_df, 21),
+    "ema_55": lambda ctx: calculate_ema(ctx.prices_df, 55),
+    "true_range": lambda ctx: calculate_true_range(ctx.prices_df),
+    "adx": lambda ctx: calculate_adx(ctx.prices_df, 14, true_range=ctx["true_range"]),
+    "atr": lambda ctx: calculate_atr(ctx.prices_df, true_range=ctx["true_range"]),
+    "rsi_14": lambda ctx: calculate_rsi(ctx.prices_df, 14),
+    "rsi_28": lambda ctx: calculate_rsi(ctx.prices_df, 28),
+    "bollinger_bands": lambda ctx: calculate_bollinger_bands(ctx.prices_df),
+    "hist_vol_21": lambda ctx: ctx["returns"].rolling(21).std() * math.sqrt(252),
+    "hist_vol_moments_63": lambda ctx: rolling_moments(ctx["hist_vol_21"], 63, ("mean", "std")),
+    "hurst": lambda ctx: calculate_hurst_exponent(ctx["close"]),
+}
+
+
+def get_indicator_context(data: dict, needed: Iterable[str] = ()) -> IndicatorContext:
+    """
+    Return the indicator context of a run, building it on first use.
+
+    The context is stored in the state data, so every node of the run shares
+    the same price frame and derived series.
+
+    Args:
+        data: The state data of the run
+        needed: Indicators to compute up front (the union of what the
+            active strategies declare)
+    """
+    context = data.get("indicator_context")
+    if context is None:
+        # Use the bars already ingested by the live loop, else fetch them
+        prices_df = data.get("prices_df")
+        if prices_df is None:
+            # Get the historical price data
+            prices = get_prices(
+                ticker=data["ticker"],
+                start_date=data["start_date"],
+                end_date=data["end_date"],
+            )
+
+            # Convert prices to a DataFrame
+            prices_df = prices_to_df(prices)
+        context = IndicatorContext(prices_df)
+        data["indicator_context"] = context
+    context.precompute(needed)
+    return context
+
+
+def history_days() -> int:
+    """
+    Calendar days of daily bars that cover the min_history of every strategy.
+
+    Trading days are converted at 5 per week, plus a margin for holidays.
+    """
+    bars = max(strategy.min_history for strategy in TECHNICAL_STRATEGIES.values())
+    return math.ceil(bars * 7 / 5) + 10
+
+
+def _indicators(prices_df, indicators):
+    # Strategies can also be called on their own, without a shared context
+    return indicators if indicators is not None else IndicatorContext(prices_df)
+
+
+@register_strategy(
+    "trend", "trend_following", weight=0.25, min_history=2,
+    indicators=("ema_8", "ema_21", "ema_55", "true_range", "adx"),
+)
+def calculate_trend_signals(prices_df, indicators=None):
     """
     Advanced trend following strategy using multiple timeframes and indicators
     """
+    ind = _indicators(prices_df, indicators)
+
     # Calculate EMAs for multiple timeframes
-    ema_8 = calculate_ema(prices_df, 8)
-    ema_21 = calculate_ema(prices_df, 21)
-    ema_55 = calculate_ema(prices_df, 55)
+    ema_8 = ind["ema_8"]
+    ema_21 = ind["ema_21"]
+    ema_55 = ind["ema_55"]
 
     # Calculate ADX for trend strength
-    adx = calculate_adx(prices_df, 14)
+    adx = ind["adx"]
 
     # Determine trend direction and strength
     short_trend = ema_8 > ema_21
@@ -164,21 +308,28 @@ def calculate_trend_signals(prices_df):
     }
 
 
-def calculate_mean_reversion_signals(prices_df):
+@register_strategy(
+    "mean_reversion", "mean_reversion", weight=0.20, min_history=50,
+    indicators=("close_moments_50", "bollinger_bands", "rsi_14", "rsi_28"),
+)
+def calculate_mean_reversion_signals(prices_df, indicators=None):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
     """
+    ind = _indicators(prices_df, indicators)
+
     # Calculate z-score of price relative to moving average
-    ma_50 = prices_df["close"].rolling(window=50).mean()
-    std_50 = prices_df["close"].rolling(window=50).std()
+    close_moments = ind["close_moments_50"]
+    ma_50 = close_moments["mean"]
+    std_50 = close_moments["std"]
     z_score = (prices_df["close"] - ma_50) / std_50
 
     # Calculate Bollinger Bands
-    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
+    bb_upper, bb_lower = ind["bollinger_bands"]
 
     # Calculate RSI with multiple timeframes
-    rsi_14 = calculate_rsi(prices_df, 14)
-    rsi_28 = calculate_rsi(prices_df, 28)
+    rsi_14 = ind["rsi_14"]
+    rsi_28 = ind["rsi_28"]
 
     # Mean reversion signals
     price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower.iloc[-1]) / (
@@ -208,18 +359,24 @@ def calculate_mean_reversion_signals(prices_df):
     }
 
 
-def calculate_momentum_signals(prices_df):
+@register_strategy(
+    "momentum", "momentum", weight=0.25, min_history=127,
+    indicators=("returns", "volume_ma_21"),
+)
+def calculate_momentum_signals(prices_df, indicators=None):
     """
     Multi-factor momentum strategy
     """
+    ind = _indicators(prices_df, indicators)
+
     # Price momentum
-    returns = prices_df["close"].pct_change()
+    returns = ind["returns"]
     mom_1m = returns.rolling(21).sum()
     mom_3m = returns.rolling(63).sum()
     mom_6m = returns.rolling(126).sum()
 
     # Volume momentum
-    volume_ma = prices_df["volume"].rolling(21).mean()
+    volume_ma = ind["volume_ma_21"]
     volume_momentum = prices_df["volume"] / volume_ma
 
     # Relative strength
@@ -253,25 +410,29 @@ def calculate_momentum_signals(prices_df):
     }
 
 
-def calculate_volatility_signals(prices_df):
+@register_strategy(
+    "volatility", "volatility", weight=0.15, min_history=84,
+    indicators=("returns", "hist_vol_21", "hist_vol_moments_63", "atr"),
+)
+def calculate_volatility_signals(prices_df, indicators=None):
     """
     Volatility-based trading strategy
     """
-    # Calculate various volatility metrics
-    returns = prices_df["close"].pct_change()
+    ind = _indicators(prices_df, indicators)
 
     # Historical volatility
-    hist_vol = returns.rolling(21).std() * math.sqrt(252)
+    hist_vol = ind["hist_vol_21"]
 
     # Volatility regime detection
-    vol_ma = hist_vol.rolling(63).mean()
+    vol_moments = ind["hist_vol_moments_63"]
+    vol_ma = vol_moments["mean"]
     vol_regime = hist_vol / vol_ma
 
     # Volatility mean reversion
-    vol_z_score = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
+    vol_z_score = (hist_vol - vol_ma) / vol_moments["std"]
 
     # ATR ratio
-    atr = calculate_atr(prices_df)
+    atr = ind["atr"]
     atr_ratio = atr / prices_df["close"]
 
     # Generate signal based on volatility regime
@@ -300,19 +461,23 @@ def calculate_volatility_signals(prices_df):
     }
 
 
-def calculate_stat_arb_signals(prices_df):
+@register_strategy(
+    "stat_arb", "statistical_arbitrage", weight=0.15, min_history=64,
+    indicators=("returns_moments_63", "hurst"),
+)
+def calculate_stat_arb_signals(prices_df, indicators=None):
     """
     Statistical arbitrage signals based on price action analysis
     """
-    # Calculate price distribution statistics
-    returns = prices_df["close"].pct_change()
+    ind = _indicators(prices_df, indicators)
 
-    # Skewness and kurtosis
-    skew = returns.rolling(63).skew()
-    kurt = returns.rolling(63).kurt()
+    # Price distribution statistics: skewness and kurtosis
+    return_moments = ind["returns_moments_63"]
+    skew = return_moments["skew"]
+    kurt = return_moments["kurt"]
 
     # Test for mean reversion using Hurst exponent
-    hurst = calculate_hurst_exponent(prices_df["close"])
+    hurst = ind["hurst"]
 
     # Correlation analysis
     # (would include correlation with related securities in real implementation)
@@ -341,7 +506,8 @@ def calculate_stat_arb_signals(prices_df):
 
 def weighted_signal_combination(signals, weights):
     """
-    Combines multiple trading signals using a weighted approach
+    Combines multiple trading signals using a weighted approach.
+    Signals with an undefined (NaN) confidence are left out.
     """
     # Convert signals to numeric values
     signal_values = {"bullish": 1, "neutral": 0, "bearish": -1}
@@ -353,6 +519,8 @@ def weighted_signal_combination(signals, weights):
         numeric_signal = signal_values[signal["signal"]]
         weight = weights[strategy]
         confidence = signal["confidence"]
+        if confidence is None or math.isnan(confidence):
+            continue
 
         weighted_sum += numeric_signal * weight * confidence
         total_confidence += weight * confidence
@@ -422,64 +590,78 @@ def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     return df["close"].ewm(span=window, adjust=False).mean()
 
 
-def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def calculate_true_range(df: pd.DataFrame) -> pd.Series:
+    """
+    Calculate the True Range shared by ADX and ATR
+
+    Args:
+        df: DataFrame with OHLC data
+
+    Returns:
+        pd.Series: True Range values
+    """
+    high_low = df["high"] - df["low"]
+    high_close = abs(df["high"] - df["close"].shift())
+    low_close = abs(df["low"] - df["close"].shift())
+
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    return ranges.max(axis=1)
+
+
+def calculate_adx(
+    df: pd.DataFrame, period: int = 14, true_range: pd.Series = None
+) -> pd.DataFrame:
     """
     Calculate Average Directional Index (ADX)
 
     Args:
         df: DataFrame with OHLC data
         period: Period for calculations
+        true_range: Precomputed True Range (computed from df if None)
 
     Returns:
         DataFrame with ADX values
     """
     # Calculate True Range
-    df["high_low"] = df["high"] - df["low"]
-    df["high_close"] = abs(df["high"] - df["close"].shift())
-    df["low_close"] = abs(df["low"] - df["close"].shift())
-    df["tr"] = df[["high_low", "high_close", "low_close"]].max(axis=1)
+    tr = calculate_true_range(df) if true_range is None else true_range
 
     # Calculate Directional Movement
-    df["up_move"] = df["high"] - df["high"].shift()
-    df["down_move"] = df["low"].shift() - df["low"]
+    up_move = df["high"] - df["high"].shift()
+    down_move = df["low"].shift() - df["low"]
 
-    df["plus_dm"] = np.where(
-        (df["up_move"] > df["down_move"]) & (df["up_move"] > 0), df["up_move"], 0
+    plus_dm = pd.Series(
+        np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index
     )
-    df["minus_dm"] = np.where(
-        (df["down_move"] > df["up_move"]) & (df["down_move"] > 0), df["down_move"], 0
+    minus_dm = pd.Series(
+        np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index
     )
 
     # Calculate ADX
-    df["+di"] = 100 * (
-        df["plus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean()
-    )
-    df["-di"] = 100 * (
-        df["minus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean()
-    )
-    df["dx"] = 100 * abs(df["+di"] - df["-di"]) / (df["+di"] + df["-di"])
-    df["adx"] = df["dx"].ewm(span=period).mean()
+    tr_ewm = tr.ewm(span=period).mean()
+    plus_di = 100 * (plus_dm.ewm(span=period).mean() / tr_ewm)
+    minus_di = 100 * (minus_dm.ewm(span=period).mean() / tr_ewm)
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx = dx.ewm(span=period).mean()
 
-    return df[["adx", "+di", "-di"]]
+    return pd.DataFrame({"adx": adx, "+di": plus_di, "-di": minus_di})
 
 
-def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
+def calculate_atr(
+    df: pd.DataFrame, period: int = 14, true_range: pd.Series = None
+) -> pd.Series:
     """
     Calculate Average True Range
 
     Args:
         df: DataFrame with OHLC data
         period: Period for ATR calculation
+        true_range: Precomputed True Range (computed from df if None)
 
     Returns:
         pd.Series: ATR values
     """
-    high_low = df["high"] - df["low"]
-    high_close = abs(df["high"] - df["close"].shift())
-    low_close = abs(df["low"] - df["close"].shift())
-
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
+    if true_range is None:
+        true_range = calculate_true_range(df)
 
     return true_range.rolling(period).mean()
 
@@ -499,9 +681,12 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
         float: Hurst exponent
     """
     lags = range(2, max_lag)
+    # Positional differences: subtracting two Series would align them on
+    # their index and leave only zeros
+    prices = np.asarray(price_series, dtype=np.float64)
     # Add small epsilon to avoid log(0)
     tau = [
-        max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag]))))
+        max(1e-8, np.sqrt(np.std(np.subtract(prices[lag:], prices[:-lag]))))
         for lag in lags
     ]
 
@@ -1,4 +1,5 @@
 from langchain_core.messages import HumanMessage
+from graph.memo import record_report_period, report_period_fingerprint
 from graph.state import AgentState, show_agent_reasoning
 import json
 
@@ -20,6 +21,7 @@ def valuation_agent(state: AgentState):
 
     # Pull the most recent financial metrics
     metrics = financial_metrics[0]
+    record_report_period(data["ticker"], metrics.get("report_period"))
 
     # Fetch the specific line_items that we need for valuation purposes
     financial_line_items = search_line_items(
@@ -126,6 +128,20 @@ def valuation_agent(state: AgentState):
     }
 
 
+def valuation_fingerprint(state: AgentState):
+    """
+    Fingerprint of the inputs of the valuation agent.
+
+    The metrics and line items only change with the report period, but the
+    market cap the gaps are measured against is the current one, so it is
+    part of the fingerprint too.
+    """
+    fingerprint = report_period_fingerprint(state)
+    if fingerprint is None:
+        return None
+    return fingerprint + (get_market_cap(ticker=state["data"]["ticker"]),)
+
+
 def calculate_owner_earnings_value(
     net_income: float,
     depreciation: float,
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from tabulate import tabulate
 from colorama import Fore, Back, Style, init
@@ -9,14 +9,25 @@ import os
 import argparse
 import time  # Importar time para los delays
 
+from agents.technicals import history_days
 from main import HedgeFundAgent, get_llm
-from tools.api import get_price_data
+from tools.api import get_financial_metrics, get_price_data, get_prices
+from tools.decision_log import DecisionLog
+from tools.execution import ExecutionModel, add_execution_arguments, execution_model_from_args
+from tools.insider_store import get_insider_store
+from tools.prefetch import Prefetcher, install_cache, uninstall_cache
+from tools.replay import add_replay_arguments, install_from_args
 from utils.display import print_backtest_results, format_backtest_row
 
 init(autoreset=True)
 
+# Price history handed to the agents each day, enough for every technical strategy
+PRICE_LOOKBACK_DAYS = history_days()
+
+
 class Backtester:
-    def __init__(self, agent, ticker, start_date, end_date, initial_capital, initial_shares=0, api_delay=7):
+    def __init__(self, agent, ticker, start_date, end_date, initial_capital, initial_shares=0, api_delay=7,
+                 execution_model=None, initial_price=None, prefetch_days=3):
         """
         Initialize the Backtester with a HedgeFundAgent instance
         
@@ -28,6 +39,12 @@ class Backtester:
             initial_capital: Initial investment amount
             initial_shares: Initial number of shares (default: 0)
             api_delay: Seconds to wait between API calls (default: 7)
+            execution_model: ExecutionModel for commissions, slippage and
+                partial fills (default: frictionless fills at the close)
+            initial_price: Price of the initial shares (default: fetched
+                for start_date)
+            prefetch_days: Days ahead of the one being analyzed whose data
+                is fetched in the background (0 to disable)
         """
         self.agent = agent
         self.ticker = ticker
@@ -35,17 +52,26 @@ class Backtester:
         self.end_date = end_date
         self.initial_capital = initial_capital
         self.api_delay = api_delay  # Tiempo de espera entre llamadas a la API
+        self.prefetch_days = prefetch_days
+        self.execution_model = execution_model or ExecutionModel()
+
+        # Unfilled remainder of the last order, worked on the following bars
+        self.pending_order = None
+        self.total_commission = 0.0
+        self.total_slippage = 0.0
         
         # Inicializar portafolio con efectivo completo primero
         self.portfolio = {"cash": initial_capital, "stock": 0, "portfolio_value": initial_capital}
         
         # Si se especifican acciones iniciales, ajustar el portafolio
         if initial_shares > 0:
-            initial_price_data = get_price_data(self.ticker, self.start_date, self.start_date)
-            time.sleep(self.api_delay)  # Esperar después de llamar a la API
-            
-            if not initial_price_data.empty:
-                initial_price = initial_price_data.iloc[0]["close"]
+            if initial_price is None:
+                initial_price_data = get_price_data(self.ticker, self.start_date, self.start_date)
+                time.sleep(self.api_delay)  # Esperar después de llamar a la API
+                if not initial_price_data.empty:
+                    initial_price = initial_price_data.iloc[0]["close"]
+
+            if initial_price is not None:
                 # Asignamos directamente las acciones sin "comprar"
                 self.portfolio = {
                     "cash": initial_capital,  # conservas tu efectivo intacto
@@ -64,41 +90,102 @@ class Backtester:
         
         # Registrar el estado inicial del portafolio
         if self.portfolio["stock"] > 0:
-            # Obtener el precio inicial nuevamente para asegurar consistencia
-            initial_price_data = get_price_data(self.ticker, self.start_date, self.start_date)
-            time.sleep(self.api_delay)  # Esperar después de llamar a la API
-            
-            if not initial_price_data.empty:
-                initial_price = initial_price_data.iloc[0]["close"]
-                self.portfolio_values.append({
-                    "Date": pd.to_datetime(self.start_date),
-                    "Portfolio Value": self.portfolio["portfolio_value"]
-                })
-
-    def execute_trade(self, action, quantity, current_price):
-        """Validate and execute trades based on portfolio constraints"""
-        if action == "buy" and quantity > 0:
-            cost = quantity * current_price
-            if cost <= self.portfolio["cash"]:
-                self.portfolio["stock"] += quantity
-                self.portfolio["cash"] -= cost
-                return quantity
-            else:
-                # Calculate maximum affordable quantity
-                max_quantity = int(self.portfolio["cash"] // current_price)
-                if max_quantity > 0:
-                    self.portfolio["stock"] += max_quantity
-                    self.portfolio["cash"] -= max_quantity * current_price
-                    return max_quantity
-                return 0
-        elif action == "sell" and quantity > 0:
-            quantity = min(quantity, self.portfolio["stock"])
-            if quantity > 0:
-                self.portfolio["cash"] += quantity * current_price
-                self.portfolio["stock"] -= quantity
-                return quantity
+            self.portfolio_values.append({
+                "Date": pd.to_datetime(self.start_date),
+                "Portfolio Value": self.portfolio["portfolio_value"]
+            })
+
+        # Every decision with its inputs, for replay_backtest
+        self.decision_log = DecisionLog(
+            ticker, initial_capital, self.portfolio["stock"],
+            initial_price=initial_price if self.portfolio["stock"] > 0 else None,
+        )
+
+    def execute_trade(self, action, quantity, current_price, volume=None, high=None, low=None,
+                      max_position_size=None):
+        """
+        Validate and execute trades based on portfolio constraints.
+
+        The order goes through the execution model: buys are capped by the
+        risk manager's liquidity limit (max_position_size, in dollars) and by
+        cash after costs, sells by the shares held, and with a participation
+        rate only part of the order may fill in this bar. The unfilled rest
+        is kept in self.pending_order.
+
+        Returns:
+            int: Shares filled in this bar
+        """
+        if action not in ("buy", "sell") or quantity <= 0:
             return 0
-        return 0
+
+        if action == "buy" and max_position_size is not None:
+            quantity = min(quantity, int(max(max_position_size, 0) // current_price))
+
+        fill = self.execution_model.execute(
+            side=1 if action == "buy" else -1,
+            quantity=quantity,
+            close=current_price,
+            cash=self.portfolio["cash"],
+            holdings=self.portfolio["stock"],
+            volume=volume,
+            high=high,
+            low=low,
+        )
+        filled = int(fill["shares"])
+        if filled > 0:
+            self.portfolio["stock"] += filled if action == "buy" else -filled
+            self.portfolio["cash"] += float(fill["cash_change"])
+            self.total_commission += float(fill["commission"])
+            self.total_slippage += float(fill["slippage"])
+
+        # Only what the bar's volume could not take keeps working; shares cut
+        # for lack of cash or holdings are dropped as before
+        capacity = float(self.execution_model.bar_capacity(volume))
+        remaining = int(quantity - min(quantity, capacity))
+        if action == "sell":
+            remaining = min(remaining, self.portfolio["stock"])
+        self.pending_order = {"action": action, "quantity": remaining} if remaining > 0 else None
+        return filled
+
+    def working_order(self, action, quantity):
+        """
+        The order to work in this bar: a new buy or sell replaces the unfilled
+        rest of the previous order, a hold lets that rest keep working.
+        """
+        if action not in ("buy", "sell") and self.pending_order:
+            return self.pending_order["action"], self.pending_order["quantity"]
+        return action, quantity
+
+    def prefetch_day(self, days, index):
+        """
+        Fetch the data the agents will ask for on days[index], ahead of time.
+
+        Prices and financial metrics land in the shared response cache. The
+        insider index is synced day by day up to that day, as the sentiment
+        agent would on each analyzed day, so the requests are the same as in
+        a run without prefetching (and recorded fixtures still match).
+        """
+        from agents.sentiment import INSIDER_LOOKBACK_DAYS
+        from graph.memo import report_period_fingerprint
+
+        current_date = days[index]
+        lookback_start = (current_date - timedelta(days=PRICE_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        current_date_str = current_date.strftime("%Y-%m-%d")
+        get_prices(self.ticker, lookback_start, current_date_str)
+        # Metrics are only asked for when the memoized fundamentals and
+        # valuation outputs cannot be reused
+        state = {"data": {"ticker": self.ticker, "end_date": current_date_str}}
+        if getattr(self.agent, "memo", None) is None or report_period_fingerprint(state) is None:
+            get_financial_metrics(self.ticker, report_period=current_date_str, period="ttm", limit=1)
+
+        store = get_insider_store()
+        synced_from, synced_through = store.synced_range(self.ticker)
+        for day in days[: index + 1]:
+            day_str = day.strftime("%Y-%m-%d")
+            day_start = (day - timedelta(days=INSIDER_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+            if synced_through is None or day_str > synced_through or day_start < synced_from:
+                store.sync(self.ticker, end_date=day_str, start_date=day_start)
+                synced_from, synced_through = store.synced_range(self.ticker)
 
     def run_backtest(self):
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
@@ -132,14 +219,35 @@ class Backtester:
             # Mostrar la tabla inicial
             print_backtest_results(table_rows)
 
-        for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
+        # Omitir la primera fecha si ya agregamos una fila inicial
+        days = [d for d in dates if not (d.strftime("%Y-%m-%d") == self.start_date and table_rows)]
+        if self.prefetch_days <= 0:
+            return self._run_days(days, table_rows, None)
+
+        # Fetch the next days while the current one is analyzed; the cache
+        # hands the replies to the agents and the backtester
+        cache = install_cache()
+        prefetcher = Prefetcher(
+            lambda index: self.prefetch_day(days, index), range(len(days)), depth=self.prefetch_days
+        )
+        try:
+            with prefetcher:
+                self._run_days(days, table_rows, prefetcher)
+        finally:
+            uninstall_cache(cache)
+        stats = cache.stats()
+        print(
+            f"Prefetch: {prefetcher.fetched} days fetched ahead, {prefetcher.failed} failed, "
+            f"cache hit rate {stats['hit_rate'] * 100:.0f}%"
+        )
+
+    def _run_days(self, days, table_rows, prefetcher):
+        for index, current_date in enumerate(days):
+            if prefetcher is not None:
+                prefetcher.advance(index)
+            lookback_start = (current_date - timedelta(days=PRICE_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
             current_date_str = current_date.strftime("%Y-%m-%d")
-            
-            # Omitir la primera fecha si ya agregamos una fila inicial
-            if current_date_str == self.start_date and len(table_rows) > 0:
-                continue
-                
+
             print(f"\nProcesando fecha: {current_date_str}")
             print(f"Esperando {self.api_delay} segundos antes de hacer la siguiente llamada a la API...")
             time.sleep(self.api_delay)  # Esperar antes de analizar la siguiente fecha
@@ -154,7 +262,7 @@ class Backtester:
                 )
                 
                 agent_decision = output["decision"]
-                action, quantity = agent_decision["action"], agent_decision["quantity"]
+                action, quantity = self.working_order(agent_decision["action"], agent_decision["quantity"])
                 
                 # Esperar después de la llamada de análisis y antes de obtener datos de precios
                 print(f"Esperando {self.api_delay} segundos antes de obtener datos de precios...")
@@ -165,10 +273,22 @@ class Backtester:
                     print(f"No price data available for {current_date_str}. Skipping this date.")
                     continue
                     
-                current_price = df.iloc[-1]["close"]
+                bar = df.iloc[-1]
+                current_price = bar["close"]
 
                 # Execute the trade with validation
-                executed_quantity = self.execute_trade(action, quantity, current_price)
+                risk = output["analyst_signals"].get("risk_management_agent", {})
+                self.decision_log.append(
+                    current_date_str, agent_decision, bar,
+                    max_position_size=risk.get("max_position_size"),
+                    raw_decision=output.get("raw_decision", ""),
+                    analyst_signals=output["analyst_signals"],
+                )
+                executed_quantity = self.execute_trade(
+                    action, quantity, current_price,
+                    volume=bar.get("volume"), high=bar.get("high"), low=bar.get("low"),
+                    max_position_size=risk.get("max_position_size"),
+                )
 
                 # Update total portfolio value
                 total_value = self.portfolio["cash"] + self.portfolio["stock"] * current_price
@@ -209,6 +329,58 @@ class Backtester:
                 time.sleep(self.api_delay * 2)  # Esperar el doble de tiempo en caso de error
                 continue
 
+    def replay(self, log: DecisionLog, sizing=None, position_limit: bool = True):
+        """
+        Re-run the portfolio accounting over a decision log.
+
+        No API or LLM call is made: each logged decision is executed against
+        its logged bar with this backtester's capital and execution model.
+
+        Args:
+            log: DecisionLog of an earlier run
+            sizing: Optional callable (action, quantity, bar, portfolio) ->
+                quantity that resizes every logged order
+            position_limit: Apply the logged risk manager limit to buys
+
+        Returns:
+            list: Backtest table rows, one per logged decision
+        """
+        table_rows = []
+        columns = log.columns()
+        limits = np.where(np.isnan(columns["max_position_size"]), np.inf, columns["max_position_size"])
+        dates = pd.to_datetime(columns["date"])
+        for i, date in enumerate(columns["date"]):
+            bar = {name: float(columns[name][i]) for name in ("close", "high", "low", "volume")}
+            action, quantity = str(columns["action"][i]), int(columns["quantity"][i])
+            if sizing is not None and action in ("buy", "sell"):
+                quantity = int(sizing(action, quantity, bar, self.portfolio))
+            action, quantity = self.working_order(action, quantity)
+
+            executed_quantity = self.execute_trade(
+                action, quantity, bar["close"],
+                volume=bar["volume"], high=bar["high"], low=bar["low"],
+                max_position_size=limits[i] if position_limit else None,
+            )
+            total_value = self.portfolio["cash"] + self.portfolio["stock"] * bar["close"]
+            self.portfolio["portfolio_value"] = total_value
+
+            signals = [s.get("signal") for s in log.signals(i).values()]
+            table_rows.append(format_backtest_row(
+                date=str(date),
+                ticker=self.ticker,
+                action=action,
+                quantity=executed_quantity,
+                price=bar["close"],
+                cash=self.portfolio["cash"],
+                stock=self.portfolio["stock"],
+                total_value=total_value,
+                bullish_count=signals.count("bullish"),
+                bearish_count=signals.count("bearish"),
+                neutral_count=signals.count("neutral"),
+            ))
+            self.portfolio_values.append({"Date": dates[i], "Portfolio Value": total_value})
+        return table_rows
+
     def analyze_performance(self):
         # Convert portfolio values to DataFrame
         performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
@@ -219,8 +391,11 @@ class Backtester:
         ) / self.initial_capital
         print(f"\nPerformance Analysis:")
         print(f"Total Return: {total_return * 100:.2f}%")
+        print(f"Commissions: ${self.total_commission:,.2f}, Slippage: ${self.total_slippage:,.2f}")
+
+        # Plot the portfolio value over time (matplotlib is only loaded here)
+        import matplotlib.pyplot as plt
 
-        # Plot the portfolio value over time
         plt.figure(figsize=(12, 6))
         performance_df["Portfolio Value"].plot(
             title=f"Portfolio Value Over Time - {self.ticker}"
@@ -248,13 +423,57 @@ class Backtester:
         return performance_df
 
 
+def replay_backtest(log, initial_capital=None, initial_shares=None, execution_model=None,
+                    sizing=None, position_limit=True):
+    """
+    Replay the decisions of a logged backtest under other assumptions.
+
+    Args:
+        log: DecisionLog or path of a saved one
+        initial_capital: Starting cash (default: the logged one)
+        initial_shares: Starting shares, valued at the logged initial price
+            (default: the logged ones)
+        execution_model: ExecutionModel to fill the orders with
+        sizing: Callable resizing every order, see Backtester.replay
+        position_limit: Apply the logged risk manager limit to buys
+
+    Returns:
+        tuple: The backtester after the replay (for analyze_performance) and
+            the backtest table rows
+    """
+    if not isinstance(log, DecisionLog):
+        log = DecisionLog.load(log)
+    if not len(log):
+        raise ValueError("The decision log is empty")
+
+    initial_shares = log.metadata["initial_shares"] if initial_shares is None else initial_shares
+    initial_price = log.metadata["initial_price"]
+    if initial_shares > 0 and np.isnan(initial_price):
+        # Runs without initial shares do not log a price, use the first close
+        initial_price = log.rows["close"][0]
+
+    backtester = Backtester(
+        agent=None,
+        ticker=log.metadata["ticker"],
+        start_date=log.rows["date"][0],
+        end_date=log.rows["date"][-1],
+        initial_capital=log.metadata["initial_capital"] if initial_capital is None else initial_capital,
+        initial_shares=initial_shares,
+        api_delay=0,
+        execution_model=execution_model,
+        initial_price=initial_price,
+    )
+    table_rows = backtester.replay(log, sizing=sizing, position_limit=position_limit)
+    return backtester, table_rows
+
+
 if __name__ == "__main__":
     # Load environment variables
     load_dotenv()
 
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Run backtesting simulation")
-    parser.add_argument("--ticker", type=str, required=True, help="Stock ticker symbol (e.g., AAPL)")
+    parser.add_argument("--ticker", type=str, help="Stock ticker symbol (e.g., AAPL)")
     parser.add_argument(
         "--end-date",
         type=str,
@@ -270,43 +489,88 @@ if __name__ == "__main__":
     parser.add_argument(
         "--initial-capital",
         type=float,
-        default=100000,
-        help="Initial capital amount (default: 100000)",
+        help="Initial capital amount (default: 100000, or the logged one with --replay-decisions)",
     )
     parser.add_argument(
         "--initial-shares",
         type=int,
-        default=0,
-        help="Initial number of shares to start with (default: 0)",
+        help="Initial number of shares to start with (default: 0, or the logged ones with --replay-decisions)",
     )
-    parser.add_argument("--model", type=str, choices=['4o', 'deepseek'], required=True,
-                      help="Choose LLM model: '4o' for GPT-4 or 'deepseek' for DeepSeek")
+    parser.add_argument("--model", type=str, choices=['4o', 'deepseek', 'fake'],
+                      help="Choose LLM model: '4o' for GPT-4, 'deepseek' for DeepSeek or 'fake' for canned decisions")
     parser.add_argument(
         "--api-delay",
         type=int,
         default=7,
         help="Seconds to wait between API calls (default: 7)",
     )
+    parser.add_argument(
+        "--prefetch-days",
+        type=int,
+        default=3,
+        help="Days of data fetched in the background ahead of the one analyzed (default: 3, 0 to disable)",
+    )
+    parser.add_argument("--decision-log", type=str, help="Save every decision and its inputs to this .npz file")
+    parser.add_argument(
+        "--replay-decisions",
+        type=str,
+        help="Replay a saved decision log instead of calling the agents (no API or LLM calls)",
+    )
+    parser.add_argument("--size-scale", type=float, default=1.0,
+                        help="Scale every replayed order by this factor (default: 1)")
+    parser.add_argument("--no-position-limit", action="store_true",
+                        help="Ignore the logged risk manager position limit when replaying")
+
+    add_replay_arguments(parser)
+    add_execution_arguments(parser)
 
     args = parser.parse_args()
 
-    # Get the appropriate LLM based on the model flag
-    llm = get_llm(args.model)
+    if args.replay_decisions:
+        sizing = None
+        if args.size_scale != 1.0:
+            sizing = lambda action, quantity, bar, portfolio: int(quantity * args.size_scale)
+        backtester, table_rows = replay_backtest(
+            args.replay_decisions,
+            initial_capital=args.initial_capital,
+            initial_shares=args.initial_shares,
+            execution_model=execution_model_from_args(args),
+            sizing=sizing,
+            position_limit=not args.no_position_limit,
+        )
+        print_backtest_results(table_rows)
+    else:
+        if not args.ticker or not args.model:
+            parser.error("--ticker and --model are required unless --replay-decisions is given")
 
-    # Create HedgeFundAgent instance
-    hedge_fund = HedgeFundAgent(llm)
+        # Serve API calls from recorded fixtures if requested
+        install_from_args(args)
 
-    # Create an instance of Backtester with the HedgeFundAgent
-    backtester = Backtester(
-        agent=hedge_fund,
-        ticker=args.ticker,
-        start_date=args.start_date,
-        end_date=args.end_date,
-        initial_capital=args.initial_capital,
-        initial_shares=args.initial_shares,
-        api_delay=args.api_delay,
-    )
+        # Get the appropriate LLM based on the model flag
+        llm = get_llm(args.model)
+
+        # Create HedgeFundAgent instance
+        hedge_fund = HedgeFundAgent(llm)
+
+        # Create an instance of Backtester with the HedgeFundAgent
+        backtester = Backtester(
+            agent=hedge_fund,
+            ticker=args.ticker,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            initial_capital=100000 if args.initial_capital is None else args.initial_capital,
+            initial_shares=args.initial_shares or 0,
+            api_delay=args.api_delay,
+            execution_model=execution_model_from_args(args),
+            prefetch_days=args.prefetch_days,
+        )
+
+        # Run the backtesting process
+        try:
+            backtester.run_backtest()
+        finally:
+            if args.decision_log:
+                backtester.decision_log.save(args.decision_log)
+                print(f"Decision log saved to {args.decision_log} ({len(backtester.decision_log)} decisions)")
 
-    # Run the backtesting process
-    backtester.run_backtest()
-    performance_df = backtester.analyze_performance()
\ No newline at end of file
+    performance_df = backtester.analyze_performance()
@@ -0,0 +1,167 @@
+import copy
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date, timedelta
+from typing import Any, Callable, Hashable, Optional
+
+from graph.state import AgentState, show_agent_reasoning
+
+# Shortest gap between two report periods (quarterly filings)
+MIN_REPORT_GAP_DAYS = 80
+
+# Report periods seen per ticker, filled in by the agents that fetch metrics.
+# Agents record periods on prefetch and graph threads while fingerprints read
+# them, so every access goes through the lock.
+_report_periods = defaultdict(set)
+_report_periods_lock = threading.Lock()
+
+
+def record_report_period(ticker: str, report_period: Optional[str]):
+    """Remember a report period returned by the API for a ticker."""
+    if report_period:
+        with _report_periods_lock:
+            _report_periods[ticker].add(report_period[:10])
+
+
+def report_period_fingerprint(state: AgentState) -> Optional[Hashable]:
+    """
+    Fingerprint of nodes that only depend on the latest report <= end_date.
+
+    The metrics endpoint is queried with report_period_lte=end_date, so the
+    answer can only change once the next report period is reached. That is
+    the next known period, or MIN_REPORT_GAP_DAYS after the current one
+    when no later period has been seen yet.
+
+    Returns:
+        The (ticker, report period) in effect, or None when unknown
+    """
+    data = state["data"]
+    ticker, end_date = data["ticker"], data["end_date"]
+    with _report_periods_lock:
+        periods = sorted(_report_periods.get(ticker, ()))
+    current = [p for p in periods if p <= end_date]
+    if not current:
+        return None
+
+    later = [p for p in periods if p > end_date]
+    valid_until = later[0] if later else (
+        date.fromisoformat(current[-1]) + timedelta(days=MIN_REPORT_GAP_DAYS)
+    ).isoformat()
+    if end_date >= valid_until:
+        return None
+    return ticker, current[-1]
+
+
+class NodeMemo:
+    """
+    Reuses analyst outputs between runs while their inputs are unchanged.
+
+    A memoized node is looked up by the fingerprint of its inputs; on a hit
+    the stored signal and message are put back in the state without running
+    the node, so nothing is recomputed or refetched.
+
+    The analyst nodes run in parallel worker threads, so the entries and
+    counters are only touched under a lock; the nodes themselves run
+    outside it.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def wrap(
+        self,
+        name: str,
+        node: Callable[[AgentState], dict],
+        fingerprint: Callable[[AgentState], Optional[Hashable]],
+        title: str = None,
+    ) -> Callable[[AgentState], dict]:
+        """
+        Args:
+            name: Node name, also its key in analyst_signals
+            node: The analyst node function
+            fingerprint: Returns a hashable summary of the node inputs, or
+                None when they cannot be summarized (the node then runs)
+            title: Heading used when replaying the reasoning
+
+        Returns:
+            A node function with the same signature
+        """
+
+        def memoized_node(state: AgentState):
+            return self.run(name, node, fingerprint, title, state)
+
+        return memoized_node
+
+    def run(
+        self,
+        name: str,
+        node: Callable[[AgentState], dict],
+        fingerprint: Callable[[AgentState], Optional[Hashable]],
+        title: Optional[str],
+        state: AgentState,
+    ) -> dict:
+        """Run node on state, or replay its stored output on a fingerprint hit."""
+        fp = fingerprint(state)
+        if fp is None:
+            return node(state)
+
+        key = (name, fp)
+        with self._lock:
+            cached = self.entries.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        if cached is None:
+            result = node(state)
+            self._store(key, state["data"]["analyst_signals"][name], result["messages"][-1])
+            return result
+
+        signal, message = cached
+        state["data"]["analyst_signals"][name] = copy.deepcopy(signal)
+        if state["metadata"]["show_reasoning"]:
+            show_agent_reasoning(json.loads(message.content), title or name)
+        return {
+            "messages": [message],
+            "data": state["data"],
+        }
+
+    def _store(self, key: Any, signal: dict, message):
+        entry = (copy.deepcopy(signal), message)
+        with self._lock:
+            self.entries[key] = entry
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+def memoized_node(
+    name: str,
+    node: Callable[[AgentState], dict],
+    fingerprint: Callable[[AgentState], Optional[Hashable]],
+    title: str = None,
+) -> Callable[[AgentState, dict], dict]:
+    """
+    Graph node that memoizes through the NodeMemo of the run config.
+
+    Unlike NodeMemo.wrap the node is not bound to one memo, so a compiled
+    graph can be shared: each invoke passes {"configurable": {"memo": ...}},
+    and the node simply runs when no memo is given.
+    """
+
+    def configured_node(state: AgentState, config):
+        memo = (config or {}).get("configurable", {}).get("memo")
+        if memo is None:
+            return node(state)
+        return memo.run(name, node, fingerprint, title, state)
+
+    return configured_node
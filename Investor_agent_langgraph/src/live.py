@@ -0,0 +1,690 @@
+import copy
+from datetime import datetime, timedelta
+import json
+import math
+import os
+import socket
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+from agents.fundamentals import fundamentals_agent
+from agents.portfolio_manager import portfolio_management_agent
+from agents.risk_manager import risk_management_agent
+from agents.sentiment import sentiment_agent
+from agents.technicals import IndicatorContext, technical_analyst_agent
+from agents.valuation import valuation_agent
+from tools.api import PRICE_COLUMNS, get_prices
+from tools.rolling import rolling_moments
+from utils.display import print_trading_output
+
+init(autoreset=True)
+
+# Analysts that only depend on the bars and rerun on every new bar
+PRICE_ANALYSTS = {
+    "technical_analyst_agent": technical_analyst_agent,
+    "risk_management_agent": risk_management_agent,
+}
+
+# Indicator periods kept per bar by BarWindow, as in agents.technicals.INDICATORS
+EMA_SPANS = (8, 21, 55)
+ADX_PERIOD = 14
+ATR_PERIOD = 14
+RSI_PERIODS = (14, 28)
+BOLLINGER_WINDOW = 20
+HURST_LAGS = np.arange(2, 20)
+
+# Indicators read from a BarWindow column, by INDICATORS name
+LIVE_SERIES = {
+    "close": "close",
+    "returns": "returns",
+    "volume_ma_21": "volume_ma_21",
+    "ema_8": "ema_8",
+    "ema_21": "ema_21",
+    "ema_55": "ema_55",
+    "true_range": "true_range",
+    "atr": "atr",
+    "rsi_14": "rsi_14",
+    "rsi_28": "rsi_28",
+    "hist_vol_21": "hist_vol_21",
+}
+
+# Indicators read as frames of BarWindow columns, as {frame column: window column}
+LIVE_FRAMES = {
+    "close_moments_50": {"mean": "close_mean_50", "std": "close_std_50"},
+    "returns_moments_63": {"skew": "returns_skew_63", "kurt": "returns_kurt_63"},
+    "hist_vol_moments_63": {"mean": "hist_vol_mean_63", "std": "hist_vol_std_63"},
+    "adx": {"adx": "adx", "+di": "plus_di", "-di": "minus_di"},
+}
+
+# Columns of the BarWindow buffers: the bars, the indicators and the RSI inputs
+WINDOW_COLUMNS = list(dict.fromkeys(
+    PRICE_COLUMNS
+    + list(LIVE_SERIES.values())
+    + [column for labels in LIVE_FRAMES.values() for column in labels.values()]
+    + ["bb_upper", "bb_lower", "gain", "loss"]
+))
+
+# Analysts fed by filings, rerun on a schedule (seconds) or on a new trading day
+SCHEDULED_ANALYSTS = {
+    "fundamentals_agent": (fundamentals_agent, 3600),
+    "valuation_agent": (valuation_agent, 3600),
+    "sentiment_agent": (sentiment_agent, 900),
+}
+
+
+class FileTailFeed:
+    """
+    Bar feed that tails a file of JSON lines, like ``tail -f``.
+
+    Each line holds one bar with the fields of the /prices endpoint
+    (time, open, high, low, close, volume).
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.2, from_start: bool = True):
+        """
+        Args:
+            path: File the bars are appended to
+            poll_interval: Seconds to wait before looking for new lines
+            from_start: Replay the bars already in the file before tailing
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self._stopped = threading.Event()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path) as f:
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            buffer = ""
+            while not self._stopped.is_set():
+                chunk = f.readline()
+                if not chunk:
+                    time.sleep(self.poll_interval)
+                    continue
+                buffer += chunk
+                if not buffer.endswith("\n"):
+                    # Partial line, wait for the writer to finish it
+                    continue
+                line, buffer = buffer.strip(), ""
+                if line:
+                    yield json.loads(line)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class SocketFeed:
+    """Bar feed reading JSON lines from a TCP socket."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000):
+        self.host = host
+        self.port = port
+        self._sock = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._sock = socket.create_connection((self.host, self.port))
+        with self._sock.makefile("r") as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+    def stop(self):
+        if self._sock is not None:
+            self._sock.close()
+
+
+class BarSocketServer:
+    """
+    Local stand-in for a market data socket: streams the bars of a JSON-lines
+    file to every client that connects, one bar every `pace` seconds.
+    """
+
+    def __init__(self, path: str, host: str = "127.0.0.1", port: int = 9000, pace: float = 1.0):
+        self.path = path
+        self.pace = pace
+        self._server = socket.create_server((host, port))
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.getsockname()[:2]
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn, open(self.path) as f:
+                for line in f:
+                    try:
+                        conn.sendall(line.encode("utf-8"))
+                    except OSError:
+                        break
+                    time.sleep(self.pace)
+
+    def start(self) -> "BarSocketServer":
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.close()
+
+
+class BarWindow:
+    """
+    Rolling window of the latest bars with per-bar indicator state.
+
+    The bars and the indicators the price analysts read are kept in column
+    buffers. Appending a bar writes one row and updates every indicator in
+    time that does not grow with max_bars: EMAs, ADX and true range follow
+    their recursions, the rolling means, deviations, moments and RSI are
+    taken over the last few rows of their own window, and the volume mean
+    and Hurst exponent keep running sums over the window (recomputed every
+    max_bars bars so rounding does not build up).
+
+    The frame and the indicator context handed to the analysts are built
+    at most once per bar from the buffers. Rows are never rewritten once
+    handed out, so frames of earlier bars keep their values.
+
+    Bars must arrive in time order. EMAs and ADX carry on across evicted
+    bars, and the first rows of the window keep the return and gain of the
+    bar before them, so they only match a recomputation over the window
+    once the evicted bars have decayed out of the averages.
+    """
+
+    def __init__(self, max_bars: int = 500):
+        self.max_bars = max_bars
+        # Twice the window, so the rows are moved once every max_bars bars
+        self._capacity = 2 * max_bars
+        self._start = 0
+        self._end = 0
+        self._time = np.empty(self._capacity, dtype="datetime64[ns]")
+        self._tz = None
+        self._columns = {name: np.full(self._capacity, np.nan) for name in WINDOW_COLUMNS}
+        # EWM numerators of true range, +DM and -DM, and their weight
+        self._dm_sums = np.zeros(4)
+        # EWM numerator and weight of DX
+        self._dx_sums = np.zeros(2)
+        # Sums of the lagged differences and of their squares, per Hurst lag
+        self._hurst_sums = np.zeros((2, len(HURST_LAGS)))
+        self._volume_sum = 0.0
+        self._appended = 0
+        self._df = None
+        self._context = None
+
+    def append(self, bar: Dict[str, Any]):
+        if self._end == self._capacity:
+            self._compact()
+        i = self._end
+        timestamp = pd.Timestamp(bar["time"])
+        if timestamp.tz is not None:
+            self._tz = timestamp.tz
+            timestamp = timestamp.tz_convert(None)
+        self._time[i] = timestamp.to_datetime64()
+        for name in PRICE_COLUMNS:
+            self._columns[name][i] = float(bar[name])
+        self._end += 1
+        if self._end - self._start > self.max_bars:
+            self._evict()
+
+        self._appended += 1
+        if self._appended % self.max_bars == 0:
+            self._resync()
+        else:
+            self._add_to_sums(i)
+        self._update_indicators(i)
+        self._df = None
+        self._context = None
+
+    def extend(self, bars: List[Dict[str, Any]]):
+        for bar in bars:
+            self.append(bar)
+
+    def _compact(self):
+        # Fresh buffers, so the frames already handed out keep their rows
+        rows = slice(self._start, self._end)
+        size = self._end - self._start
+        time_buffer = np.empty(self._capacity, dtype="datetime64[ns]")
+        time_buffer[:size] = self._time[rows]
+        self._time = time_buffer
+        for name, column in self._columns.items():
+            buffer = np.full(self._capacity, np.nan)
+            buffer[:size] = column[rows]
+            self._columns[name] = buffer
+        self._start, self._end = 0, size
+
+    def _evict(self):
+        first, last = self._start, self._end - 1
+        close = self._columns["close"]
+        self._volume_sum -= self._columns["volume"][first]
+        # Differences between the evicted bar and the bars before the new one
+        later = first + HURST_LAGS
+        valid = later < last
+        diffs = close[later[valid]] - close[first]
+        self._hurst_sums[0, valid] -= diffs
+        self._hurst_sums[1, valid] -= diffs * diffs
+        self._start += 1
+
+    def _add_to_sums(self, i: int):
+        close = self._columns["close"]
+        self._volume_sum += self._columns["volume"][i]
+        earlier = i - HURST_LAGS
+        valid = earlier >= self._start
+        diffs = close[i] - close[earlier[valid]]
+        self._hurst_sums[0, valid] += diffs
+        self._hurst_sums[1, valid] += diffs * diffs
+
+    def _resync(self):
+        rows = slice(self._start, self._end)
+        close = self._columns["close"][rows]
+        self._volume_sum = self._columns["volume"][rows].sum()
+        for k, lag in enumerate(HURST_LAGS):
+            diffs = close[lag:] - close[:-lag]
+            self._hurst_sums[:, k] = diffs.sum(), (diffs * diffs).sum()
+
+    def _tail(self, name: str, window: int) -> Optional[np.ndarray]:
+        """Last `window` values of a column, None while the window is shorter."""
+        if self._end - self._start < window:
+            return None
+        return self._columns[name][self._end - window:self._end]
+
+    def _update_indicators(self, i: int):
+        col = self._columns
+        high, low, close = col["high"][i], col["low"][i], col["close"][i]
+        first = i == self._start
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Same first-bar conventions as the pandas versions in technicals
+            if first:
+                col["returns"][i] = np.nan
+                delta = 0.0
+                true_range = high - low
+                plus_dm = minus_dm = 0.0
+            else:
+                prev_close = col["close"][i - 1]
+                col["returns"][i] = close / prev_close - 1
+                delta = close - prev_close
+                true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+                up_move = high - col["high"][i - 1]
+                down_move = col["low"][i - 1] - low
+                plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+                minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+            col["gain"][i] = delta if delta > 0 else 0.0
+            col["loss"][i] = -delta if delta < 0 else 0.0
+            col["true_range"][i] = true_range
+
+            for span in EMA_SPANS:
+                ema = col[f"ema_{span}"]
+                alpha = 2 / (span + 1)
+                ema[i] = close if first else alpha * close + (1 - alpha) * ema[i - 1]
+
+            # ewm(span=ADX_PERIOD, adjust=True) as running numerators over weights
+            decay = 1 - 2 / (ADX_PERIOD + 1)
+            if first:
+                self._dm_sums[:] = 0.0
+                self._dx_sums[:] = 0.0
+            self._dm_sums = self._dm_sums * decay + (true_range, plus_dm, minus_dm, 1.0)
+            tr_ewm = self._dm_sums[0] / self._dm_sums[3]
+            plus_di = 100 * (self._dm_sums[1] / self._dm_sums[3] / tr_ewm)
+            minus_di = 100 * (self._dm_sums[2] / self._dm_sums[3] / tr_ewm)
+            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+            if not np.isnan(dx):
+                self._dx_sums = self._dx_sums * decay + (dx, 1.0)
+            elif self._dx_sums[1]:
+                # A missing DX still ages the earlier ones, as in pandas
+                self._dx_sums = self._dx_sums * decay
+            col["plus_di"][i] = plus_di
+            col["minus_di"][i] = minus_di
+            col["adx"][i] = self._dx_sums[0] / self._dx_sums[1] if self._dx_sums[1] else np.nan
+
+            tail = self._tail("true_range", ATR_PERIOD)
+            col["atr"][i] = np.nan if tail is None else tail.mean()
+
+            tail = self._tail("volume", 21)
+            col["volume_ma_21"][i] = np.nan if tail is None else tail.mean()
+
+            tail = self._tail("close", 50)
+            col["close_mean_50"][i] = np.nan if tail is None else tail.mean()
+            col["close_std_50"][i] = np.nan if tail is None else _sample_std(tail)
+
+            tail = self._tail("close", BOLLINGER_WINDOW)
+            if tail is None:
+                col["bb_upper"][i] = col["bb_lower"][i] = np.nan
+            else:
+                sma, std = tail.mean(), _sample_std(tail)
+                col["bb_upper"][i] = sma + std * 2
+                col["bb_lower"][i] = sma - std * 2
+
+            for period in RSI_PERIODS:
+                gains, losses = self._tail("gain", period), self._tail("loss", period)
+                if gains is None:
+                    col[f"rsi_{period}"][i] = np.nan
+                else:
+                    rs = gains.mean() / losses.mean()
+                    col[f"rsi_{period}"][i] = 100 - (100 / (1 + rs))
+
+            tail = self._tail("returns", 21)
+            col["hist_vol_21"][i] = np.nan if tail is None else _sample_std(tail) * math.sqrt(252)
+
+            tail = self._tail("hist_vol_21", 63)
+            col["hist_vol_mean_63"][i] = np.nan if tail is None else tail.mean()
+            col["hist_vol_std_63"][i] = np.nan if tail is None else _sample_std(tail)
+
+        tail = self._tail("returns", 63)
+        if tail is None:
+            col["returns_skew_63"][i] = col["returns_kurt_63"][i] = np.nan
+        else:
+            moments = rolling_moments(tail, 63, ("skew", "kurt")).to_numpy()[-1]
+            col["returns_skew_63"][i], col["returns_kurt_63"][i] = moments
+
+    def to_df(self) -> pd.DataFrame:
+        if self._df is None:
+            rows = slice(self._start, self._end)
+            index = pd.DatetimeIndex(self._time[rows], name="Date")
+            if self._tz is not None:
+                index = index.tz_localize("UTC").tz_convert(self._tz)
+            self._df = pd.DataFrame(
+                {name: self._columns[name][rows] for name in PRICE_COLUMNS}, index=index
+            )
+        return self._df
+
+    def indicator_context(self) -> IndicatorContext:
+        """
+        Indicator context of the current window that reads the indicators
+        kept per bar instead of recomputing them over the frame.
+        """
+        if self._context is None:
+            rows = slice(self._start, self._end)
+            columns = {name: column[rows] for name, column in self._columns.items()}
+            size = self._end - self._start
+
+            def series(name):
+                return lambda ctx: pd.Series(columns[name], index=ctx.prices_df.index)
+
+            def frame(labels):
+                return lambda ctx: pd.DataFrame(
+                    np.column_stack([columns[name] for name in labels.values()]),
+                    index=ctx.prices_df.index,
+                    columns=list(labels),
+                )
+
+            sources = {name: series(column) for name, column in LIVE_SERIES.items()}
+            sources.update({name: frame(labels) for name, labels in LIVE_FRAMES.items()})
+            sources["bollinger_bands"] = lambda ctx: (series("bb_upper")(ctx), series("bb_lower")(ctx))
+            sources["volume_mean"] = lambda ctx, value=self._volume_sum / size: value
+            sources["hurst"] = lambda ctx, sums=self._hurst_sums.copy(): _hurst_from_sums(sums, size)
+            self._context = IndicatorContext(self.to_df(), sources)
+        return self._context
+
+    def __len__(self):
+        return self._end - self._start
+
+
+def _sample_std(values: np.ndarray) -> float:
+    # Exactly 0 on a constant window, like pandas' rolling std
+    return 0.0 if values.min() == values.max() else values.std(ddof=1)
+
+
+def _hurst_from_sums(sums: np.ndarray, size: int) -> float:
+    """calculate_hurst_exponent over a window of `size` bars, from its running sums."""
+    counts = size - HURST_LAGS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums[0] / counts
+        variance = np.maximum(sums[1] / counts - mean * mean, 0.0)
+    # sqrt of the std, floored like calculate_hurst_exponent (also for lags
+    # longer than the window, whose std is undefined)
+    tau = np.where(counts > 0, np.fmax(variance ** 0.25, 1e-8), 1e-8)
+    return np.polyfit(np.log(HURST_LAGS), np.log(tau), 1)[0]
+
+
+class LiveTrader:
+    """
+    Long-running service that turns incoming bars into trading decisions.
+
+    Every bar reruns the price-driven analysts on the rolling window; the
+    filing-driven analysts only rerun when their schedule is due or a new
+    trading day starts, and their last signals are reused in between.
+    """
+
+    def __init__(
+        self,
+        llm,
+        ticker: str,
+        portfolio: dict,
+        max_bars: int = 500,
+        latency_budget: float = 5.0,
+        schedule: Optional[Dict[str, float]] = None,
+        show_reasoning: bool = False,
+        on_decision: Callable[[dict], None] = print_trading_output,
+    ):
+        """
+        Args:
+            llm: Language model used by the portfolio manager
+            ticker: Stock ticker symbol
+            portfolio: Dictionary containing current portfolio state
+            max_bars: Bars kept in the rolling window
+            latency_budget: Seconds allowed from bar arrival to decision
+            schedule: Rerun interval in seconds per scheduled analyst
+            show_reasoning: Whether to show detailed agent reasoning
+            on_decision: Called with every result
+        """
+        self.llm = llm
+        self.ticker = ticker
+        self.portfolio = portfolio
+        self.window = BarWindow(max_bars=max_bars)
+        self.latency_budget = latency_budget
+        self.schedule = {
+            name: (schedule or {}).get(name, interval)
+            for name, (_, interval) in SCHEDULED_ANALYSTS.items()
+        }
+        self.show_reasoning = show_reasoning
+        self.on_decision = on_decision
+        self.analyst_signals = {}
+        self.last_run = {}
+        self.latencies = []
+
+    def warm_up(self, start_date: str, end_date: str, interval: str = "minute", interval_multiplier: int = 5):
+        """Seed the window with the recent intraday history from the API."""
+        self.window.extend(
+            get_prices(
+                ticker=self.ticker,
+                start_date=start_date,
+                end_date=end_date,
+                interval=interval,
+                interval_multiplier=interval_multiplier,
+            )
+        )
+
+    def _due_analysts(self, bar_date: str, now: float) -> List[str]:
+        due = []
+        for name, interval in self.schedule.items():
+            last = self.last_run.get(name)
+            if last is None or last[0] != bar_date or now - last[1] >= interval:
+                due.append(name)
+        return due
+
+    def on_bar(self, bar: Dict[str, Any]) -> dict:
+        """
+        Ingest one bar and produce a decision.
+
+        Returns:
+            dict: Decision, analyst signals, the analysts that ran and the
+            latency in seconds, or None if the bar was skipped because a
+            price analyst or the portfolio manager failed
+        """
+        received = time.perf_counter()
+        self.window.append(bar)
+        prices_df = self.window.to_df()
+        bar_time = prices_df.index[-1]
+        end_date = bar_time.strftime("%Y-%m-%d")
+
+        state = {
+            "messages": [],
+            "data": {
+                "ticker": self.ticker,
+                "portfolio": self.portfolio,
+                "start_date": prices_df.index[0].strftime("%Y-%m-%d"),
+                "end_date": end_date,
+                "prices_df": prices_df,
+                "indicator_context": self.window.indicator_context(),
+                "analyst_signals": self.analyst_signals,
+            },
+            "metadata": {"show_reasoning": self.show_reasoning},
+        }
+
+        now = time.monotonic()
+        ran = []
+        for name in self._due_analysts(end_date, now):
+            try:
+                SCHEDULED_ANALYSTS[name][0](state)
+                self.last_run[name] = (end_date, now)
+                ran.append(name)
+            except Exception as e:
+                # Keep serving with the previous signal of this analyst
+                print(f"{Fore.RED}{name} failed: {e}{Style.RESET_ALL}")
+        try:
+            for name, node in PRICE_ANALYSTS.items():
+                node(state)
+                ran.append(name)
+            final_state = portfolio_management_agent(state, self.llm)
+        except Exception as e:
+            # Skip this bar, the next one gets a fresh run
+            print(f"{Fore.RED}Skipping bar at {bar_time}: {e}{Style.RESET_ALL}")
+            return None
+        try:
+            decision = json.loads(final_state["messages"][-1].content)
+        except json.JSONDecodeError:
+            decision = None
+
+        latency = time.perf_counter() - received
+        self.latencies.append(latency)
+        if latency > self.latency_budget:
+            print(
+                f"{Fore.RED}Latency budget exceeded: {latency:.3f}s > "
+                f"{self.latency_budget:.3f}s at {bar_time}{Style.RESET_ALL}"
+            )
+
+        result = {
+            "time": str(bar_time),
+            "decision": decision,
+            # Later bars update the signals in place
+            "analyst_signals": copy.deepcopy(self.analyst_signals),
+            "analysts_run": ran,
+            "latency": latency,
+        }
+        self.on_decision(result)
+        return result
+
+    def run(self, feed, min_bars: int = 2):
+        """
+        Consume a feed until it ends or is interrupted.
+
+        Args:
+            feed: Iterable of bars (FileTailFeed, SocketFeed or any iterable)
+            min_bars: Bars needed in the window before deciding
+        """
+        try:
+            for bar in feed:
+                if len(self.window) + 1 < min_bars:
+                    self.window.append(bar)
+                    continue
+                self.on_bar(bar)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if hasattr(feed, "stop"):
+                feed.stop()
+
+    def latency_report(self) -> dict:
+        """Summary of the bar-to-decision latencies measured so far."""
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        return {
+            "decisions": len(ordered),
+            "mean": statistics.mean(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+            "over_budget": sum(latency > self.latency_budget for latency in ordered),
+        }
+
+
+def make_feed(spec: str):
+    """Build a feed from "file:PATH" or "socket:HOST:PORT"."""
+    kind, _, target = spec.partition(":")
+    if kind == "file":
+        return FileTailFeed(target)
+    if kind == "socket":
+        host, _, port = target.rpartition(":")
+        return SocketFeed(host or "127.0.0.1", int(port))
+    raise ValueError("Invalid feed. Must be 'file:PATH' or 'socket:HOST:PORT'")
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    from main import get_llm
+    from tools.replay import add_replay_arguments, install_from_args
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run the hedge fund as a live service on intraday bars")
+    parser.add_argument("--ticker", type=str, required=True, help="Stock ticker symbol")
+    parser.add_argument("--feed", type=str, required=True, help="Bar feed: 'file:PATH' or 'socket:HOST:PORT'")
+    parser.add_argument("--serve-bars", type=str, help="Also serve this JSON-lines file of bars on the --feed socket")
+    parser.add_argument("--pace", type=float, default=1.0, help="Seconds between bars served by --serve-bars (default: 1)")
+    parser.add_argument("--interval", type=str, default="minute", help="Bar interval used to warm up the window (default: minute)")
+    parser.add_argument("--interval-multiplier", type=int, default=5, help="Bar interval multiplier (default: 5)")
+    parser.add_argument("--warmup-days", type=int, default=0, help="Days of intraday history fetched before the feed starts")
+    parser.add_argument("--max-bars", type=int, default=500, help="Bars kept in the rolling window (default: 500)")
+    parser.add_argument("--latency-budget", type=float, default=5.0, help="Seconds allowed from bar to decision (default: 5)")
+    parser.add_argument("--show-reasoning", action="store_true", help="Show reasoning from each agent")
+    parser.add_argument("--model", type=str, choices=['4o', 'deepseek', 'fake'], required=True,
+                      help="Choose LLM model: '4o' for GPT-4, 'deepseek' for DeepSeek or 'fake' for canned decisions")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+
+    install_from_args(args)
+
+    feed = make_feed(args.feed)
+    if args.serve_bars:
+        if not isinstance(feed, SocketFeed):
+            parser.error("--serve-bars needs a socket feed")
+        BarSocketServer(args.serve_bars, host=feed.host, port=feed.port, pace=args.pace).start()
+
+    trader = LiveTrader(
+        get_llm(args.model),
+        ticker=args.ticker,
+        portfolio={"cash": 100000.0, "stock": 0},
+        max_bars=args.max_bars,
+        latency_budget=args.latency_budget,
+        show_reasoning=args.show_reasoning,
+    )
+    if args.warmup_days:
+        today = datetime.now()
+        trader.warm_up(
+            start_date=(today - timedelta(days=args.warmup_days)).strftime("%Y-%m-%d"),
+            end_date=today.strftime("%Y-%m-%d"),
+            interval=args.interval,
+            interval_multiplier=args.interval_multiplier,
+        )
+
+    trader.run(feed)
+
+    report = trader.latency_report()
+    if report:
+        print(
+            f"\nDecisions: {report['decisions']}, latency p50 {report['p50'] * 1e3:.1f}ms, "
+            f"p95 {report['p95'] * 1e3:.1f}ms, max {report['max'] * 1e3:.1f}ms, "
+            f"over budget: {report['over_budget']}"
+        )
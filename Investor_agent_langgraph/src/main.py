@@ -1,32 +1,111 @@
-from langchain_core.messages import HumanMessage
-from langgraph.graph import END, StateGraph
 from colorama import Fore, Back, Style, init
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import json
-from langchain_openai import ChatOpenAI
-from openai import OpenAI
 import os
-from agents.fundamentals import fundamentals_agent
-from agents.portfolio_manager import portfolio_management_agent
-from agents.technicals import technical_analyst_agent
-from agents.risk_manager import risk_management_agent
-from agents.sentiment import sentiment_agent
-from graph.state import AgentState
-from agents.valuation import valuation_agent
-from utils.display import print_trading_output
+
+# The graph and its agents (langgraph, pandas, ...) are only imported when
+# the graph is first built, and the OpenAI client only when it is selected,
+# so importing this module stays cheap
+_compiled_graph = None
+
+# colorama wraps stdout again on every init, so it is only done once
+_colorama_initialized = False
+
+
+def create_workflow():
+    """Create the workflow graph for the hedge fund.
+
+    The graph holds no per-agent state: the portfolio manager reads its LLM
+    and the filing-driven nodes their NodeMemo from the run config, so one
+    compiled graph serves every HedgeFundAgent.
+
+    Returns:
+        StateGraph: Configured workflow graph
+    """
+    from langgraph.graph import END, StateGraph
+
+    from agents.fundamentals import fundamentals_agent
+    from agents.portfolio_manager import portfolio_management_agent
+    from agents.risk_manager import risk_management_agent
+    from agents.sentiment import sentiment_agent, sentiment_fingerprint
+    from agents.technicals import technical_analyst_agent
+    from agents.valuation import valuation_agent, valuation_fingerprint
+    from graph.memo import memoized_node, report_period_fingerprint
+    from graph.state import AgentState
+
+    workflow = StateGraph(AgentState)
+
+    # Define the start node
+    def start(state: AgentState):
+        """Initialize the workflow with the input message."""
+        return state
+
+    def portfolio_manager(state: AgentState, config):
+        return portfolio_management_agent(state, config["configurable"]["llm"])
+
+    # Add nodes
+    workflow.add_node("start_node", start)
+    workflow.add_node("technical_analyst_agent", technical_analyst_agent)
+    # Filing-driven nodes only rerun when a new filing changes their inputs
+    workflow.add_node("fundamentals_agent", memoized_node(
+        "fundamentals_agent", fundamentals_agent,
+        report_period_fingerprint, "Fundamental Analysis Agent",
+    ))
+    workflow.add_node("sentiment_agent", memoized_node(
+        "sentiment_agent", sentiment_agent,
+        sentiment_fingerprint, "Sentiment Analysis Agent",
+    ))
+    workflow.add_node("risk_management_agent", risk_management_agent)
+    workflow.add_node("portfolio_management_agent", portfolio_manager)
+    workflow.add_node("valuation_agent", memoized_node(
+        "valuation_agent", valuation_agent,
+        valuation_fingerprint, "Valuation Analysis Agent",
+    ))
+
+    # Define the workflow
+    workflow.set_entry_point("start_node")
+    workflow.add_edge("start_node", "technical_analyst_agent")
+    workflow.add_edge("start_node", "fundamentals_agent")
+    workflow.add_edge("start_node", "sentiment_agent")
+    workflow.add_edge("start_node", "valuation_agent")
+    workflow.add_edge("technical_analyst_agent", "risk_management_agent")
+    workflow.add_edge("fundamentals_agent", "risk_management_agent")
+    workflow.add_edge("sentiment_agent", "risk_management_agent")
+    workflow.add_edge("valuation_agent", "risk_management_agent")
+    workflow.add_edge("risk_management_agent", "portfolio_management_agent")
+    workflow.add_edge("portfolio_management_agent", END)
+
+    return workflow
+
+
+def get_compiled_graph():
+    """Return the compiled hedge fund graph, compiling it on first use."""
+    global _compiled_graph
+    if _compiled_graph is None:
+        _compiled_graph = create_workflow().compile()
+    return _compiled_graph
+
 
 class HedgeFundAgent:
-    def __init__(self, llm):
+    def __init__(self, llm, reuse_unchanged: bool = True):
         """Initialize the hedge fund agent with a language model.
         
         Args:
             llm: Language model instance to be used for analysis
+            reuse_unchanged: Reuse the fundamentals, valuation and sentiment
+                outputs of earlier runs while their inputs are unchanged
         """
+        from graph.memo import NodeMemo
+
         self.llm = llm
-        self.workflow = self._create_workflow()
-        self.app = self.workflow.compile()
-        init(autoreset=True)
+        self.memo = NodeMemo() if reuse_unchanged else None
+        self.app = get_compiled_graph()
+
+        global _colorama_initialized
+        if not _colorama_initialized:
+            init(autoreset=True)
+            _colorama_initialized = True
 
     def _parse_hedge_fund_response(self, response):
         """Parse the JSON response from the hedge fund.
@@ -43,44 +122,6 @@ class HedgeFundAgent:
             print(f"Error parsing response: {response}")
             return None
 
-    def _create_workflow(self):
-        """Create the workflow graph for the hedge fund.
-        
-        Returns:
-            StateGraph: Configured workflow graph
-        """
-        workflow = StateGraph(AgentState)
-
-        # Define the start node
-        def start(state: AgentState):
-            """Initialize the workflow with the input message."""
-            return state
-
-        # Add nodes
-        workflow.add_node("start_node", start)
-        workflow.add_node("technical_analyst_agent", technical_analyst_agent)
-        workflow.add_node("fundamentals_agent", fundamentals_agent)
-        workflow.add_node("sentiment_agent", sentiment_agent)
-        workflow.add_node("risk_management_agent", risk_management_agent)
-        workflow.add_node("portfolio_management_agent", 
-                         lambda state: portfolio_management_agent(state, self.llm))
-        workflow.add_node("valuation_agent", valuation_agent)
-
-        # Define the workflow
-        workflow.set_entry_point("start_node")
-        workflow.add_edge("start_node", "technical_analyst_agent")
-        workflow.add_edge("start_node", "fundamentals_agent")
-        workflow.add_edge("start_node", "sentiment_agent")
-        workflow.add_edge("start_node", "valuation_agent")
-        workflow.add_edge("technical_analyst_agent", "risk_management_agent")
-        workflow.add_edge("fundamentals_agent", "risk_management_agent")
-        workflow.add_edge("sentiment_agent", "risk_management_agent")
-        workflow.add_edge("valuation_agent", "risk_management_agent")
-        workflow.add_edge("risk_management_agent", "portfolio_management_agent")
-        workflow.add_edge("portfolio_management_agent", END)
-
-        return workflow
-
     def analyze(self, ticker: str, portfolio: dict, 
                 start_date: str = None, end_date: str = None, 
                 show_reasoning: bool = False):
@@ -109,6 +150,8 @@ class HedgeFundAgent:
             except ValueError:
                 raise ValueError(f"Date {date_str} must be in YYYY-MM-DD format")
 
+        from langchain_core.messages import HumanMessage
+
         final_state = self.app.invoke({
             "messages": [
                 HumanMessage(
@@ -125,10 +168,12 @@ class HedgeFundAgent:
             "metadata": {
                 "show_reasoning": show_reasoning,
             },
-        })
+        }, config={"configurable": {"llm": self.llm, "memo": self.memo}})
 
+        raw_decision = final_state["messages"][-1].content
         return {
-            "decision": self._parse_hedge_fund_response(final_state["messages"][-1].content),
+            "decision": self._parse_hedge_fund_response(raw_decision),
+            "raw_decision": raw_decision,
             "analyst_signals": final_state["data"]["analyst_signals"],
         }
 
@@ -136,11 +181,18 @@ def get_llm(model_flag: str):
     """Get the appropriate LLM based on the model flag.
     
     Args:
-        model_flag: String indicating which model to use ('4' or 'deepseek')
+        model_flag: String indicating which model to use ('4o', 'deepseek' or 'fake')
         
     Returns:
         LLM instance
     """
+    if model_flag == "fake":
+        from tools.replay import fake_llm
+
+        return fake_llm()
+
+    from langchain_openai import ChatOpenAI
+
     if model_flag == "4o":
         return ChatOpenAI(
             model="gpt-4o",
@@ -154,13 +206,15 @@ def get_llm(model_flag: str):
             base_url="https://api.deepseek.com"
         )
     else:
-        raise ValueError("Invalid model flag. Must be '4o' or 'deepseek'")
+        raise ValueError("Invalid model flag. Must be '4o', 'deepseek' or 'fake'")
 
 # Example usage in main.py:
 if __name__ == "__main__":
     import argparse
     from dotenv import load_dotenv
     import os
+    from tools.replay import add_replay_arguments, install_from_args
+    from utils.display import print_trading_output
 
     # Load environment variables
     load_dotenv()
@@ -170,11 +224,15 @@ if __name__ == "__main__":
     parser.add_argument("--start-date", type=str, help="Start date (YYYY-MM-DD)")
     parser.add_argument("--end-date", type=str, help="End date (YYYY-MM-DD)")
     parser.add_argument("--show-reasoning", action="store_true", help="Show reasoning from each agent")
-    parser.add_argument("--model", type=str, choices=['4o', 'deepseek'], required=True,
-                      help="Choose LLM model: '4o' for GPT-4 or 'deepseek' for DeepSeek")
+    parser.add_argument("--model", type=str, choices=['4o', 'deepseek', 'fake'], required=True,
+                      help="Choose LLM model: '4o' for GPT-4, 'deepseek' for DeepSeek or 'fake' for canned decisions")
+    add_replay_arguments(parser)
 
     args = parser.parse_args()
 
+    # Serve API calls from recorded fixtures if requested
+    install_from_args(args)
+
     # Get the appropriate LLM based on the model flag
     llm = get_llm(args.model)
 
@@ -1,9 +1,25 @@
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
+import numpy as np
 import pandas as pd
 import requests
 
-import requests
+# Point at a local stand-in server (see tools/replay.py) to run offline
+BASE_URL = os.environ.get(
+    "FINANCIAL_DATASETS_BASE_URL", "https://api.financialdatasets.ai"
+)
+
+# Tickers sent per request by the bulk fetchers
+BULK_BATCH_SIZE = 100
+
+# Largest limit the API accepts per request; further rows come through pagination
+MAX_PAGE_LIMIT = 1000
+
+# Shared session so bulk fetches reuse pooled connections
+_session = requests.Session()
+
+# Columns of a price frame, and the only ones a compact frame keeps
+PRICE_COLUMNS = ["open", "close", "high", "low", "volume"]
 
 def get_financial_metrics(
     ticker: str,
@@ -17,13 +33,13 @@ def get_financial_metrics(
         headers["X-API-KEY"] = api_key
     
     url = (
-        f"https://api.financialdatasets.ai/financial-metrics/"
+        f"{BASE_URL}/financial-metrics/"
         f"?ticker={ticker}"
         f"&report_period_lte={report_period}"
         f"&limit={limit}"
         f"&period={period}"
     )
-    response = requests.get(url, headers=headers)
+    response = _session.get(url, headers=headers)
     if response.status_code != 200:
         raise Exception(
             f"Error fetching data: {response.status_code} - {response.text}"
@@ -45,7 +61,7 @@ def search_line_items(
     if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
         headers["X-API-KEY"] = api_key
 
-    url = "https://api.financialdatasets.ai/financials/search/line-items"
+    url = f"{BASE_URL}/financials/search/line-items"
 
     body = {
         "tickers": [ticker],
@@ -53,7 +69,7 @@ def search_line_items(
         "period": period,
         "limit": limit
     }
-    response = requests.post(url, headers=headers, json=body)
+    response = _session.post(url, headers=headers, json=body)
     if response.status_code != 200:
         raise Exception(
             f"Error fetching data: {response.status_code} - {response.text}"
@@ -68,6 +84,7 @@ def get_insider_trades(
     ticker: str,
     end_date: str,
     limit: int = 5,
+    start_date: str = None,
 ) -> List[Dict[str, Any]]:
     """
     Fetch insider trades for a given ticker and date range.
@@ -77,12 +94,14 @@ def get_insider_trades(
         headers["X-API-KEY"] = api_key
     
     url = (
-        f"https://api.financialdatasets.ai/insider-trades/"
+        f"{BASE_URL}/insider-trades/"
         f"?ticker={ticker}"
         f"&filing_date_lte={end_date}"
         f"&limit={limit}"
     )
-    response = requests.get(url, headers=headers)
+    if start_date:
+        url += f"&filing_date_gte={start_date}"
+    response = _session.get(url, headers=headers)
     if response.status_code != 200:
         raise Exception(
             f"Error fetching data: {response.status_code} - {response.text}"
@@ -102,11 +121,11 @@ def get_market_cap(
         headers["X-API-KEY"] = api_key
 
     url = (
-        f'https://api.financialdatasets.ai/company/facts'
+        f'{BASE_URL}/company/facts'
         f'?ticker={ticker}'
     )
 
-    response = requests.get(url, headers=headers)
+    response = _session.get(url, headers=headers)
     if response.status_code != 200:
         raise Exception(
             f"Error fetching data: {response.status_code} - {response.text}"
@@ -120,22 +139,24 @@ def get_market_cap(
 def get_prices(
     ticker: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
 ) -> List[Dict[str, Any]]:
-    """Fetch price data from the API."""
+    """Fetch price data from the API (daily bars unless an intraday interval is given)."""
     headers = {}
     if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
         headers["X-API-KEY"] = api_key
         
     url = (
-        f"https://api.financialdatasets.ai/prices/"
+        f"{BASE_URL}/prices/"
         f"?ticker={ticker}"
-        f"&interval=day"
-        f"&interval_multiplier=1"
+        f"&interval={interval}"
+        f"&interval_multiplier={interval_multiplier}"
         f"&start_date={start_date}"
         f"&end_date={end_date}"
     )
-    response = requests.get(url, headers=headers)
+    response = _session.get(url, headers=headers)
     if response.status_code != 200:
         raise Exception(
             f"Error fetching data: {response.status_code} - {response.text}"
@@ -146,22 +167,303 @@ def get_prices(
         raise ValueError("No price data returned")
     return prices
 
-def prices_to_df(prices: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Convert prices to a DataFrame."""
-    df = pd.DataFrame(prices)
+def prices_to_df(prices: List[Dict[str, Any]], compact: bool = False) -> pd.DataFrame:
+    """
+    Convert prices to a DataFrame.
+
+    Args:
+        prices: Price records as returned by get_prices
+        compact: Keep only OHLCV in the compact layout of compact_prices
+    """
+    # A compact frame never materializes the other fields
+    df = pd.DataFrame(prices, columns=["time"] + PRICE_COLUMNS if compact else None)
     df["Date"] = pd.to_datetime(df["time"])
     df.set_index("Date", inplace=True)
-    numeric_cols = ["open", "close", "high", "low", "volume"]
-    for col in numeric_cols:
+    for col in PRICE_COLUMNS:
         df[col] = pd.to_numeric(df[col], errors="coerce")
     df.sort_index(inplace=True)
-    return df
+    return compact_prices(df) if compact else df
+
+
+def compact_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a price frame to float32 OHLC and uint64 volume.
+
+    Every other column (ticker, time, ...) is dropped, so a daily bar takes
+    24 bytes plus its 8-byte datetime index instead of ~180. float32 keeps
+    about 7 significant digits, well within the cent precision of quotes,
+    and indicators computed on it come out as float32 too. Missing volumes
+    are stored as 0.
+
+    Works on the (ticker, Date) frames of get_prices_bulk as well.
+    """
+    volume = np.nan_to_num(df["volume"].to_numpy(dtype=np.float64), nan=0.0)
+    columns = {
+        col: df[col].to_numpy(dtype=np.float32) for col in ["open", "close", "high", "low"]
+    }
+    columns["volume"] = np.maximum(volume, 0).astype(np.uint64)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def price_memory_report(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Bytes per bar held by a price frame, per column and in total.
+
+    Counts string contents (deep) and the index, so frames from prices_to_df
+    and compact_prices can be compared directly.
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    bars = max(len(df), 1)
+    report = {str(col): float(nbytes) / bars for col, nbytes in usage.items()}
+    report["total"] = float(usage.sum()) / bars
+    return report
 
 # Update the get_price_data function to use the new functions
 def get_price_data(
     ticker: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    compact: bool = False,
 ) -> pd.DataFrame:
     prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
+    return prices_to_df(prices, compact=compact)
+
+
+
+def _api_headers() -> Dict[str, str]:
+    headers = {}
+    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+        headers["X-API-KEY"] = api_key
+    return headers
+
+
+def _batches(tickers: List[str], size: int = BULK_BATCH_SIZE) -> Iterator[List[str]]:
+    tickers = list(dict.fromkeys(tickers))
+    for i in range(0, len(tickers), size):
+        yield tickers[i:i + size]
+
+
+def iter_pages(
+    path: str,
+    key: str,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[Dict[str, Any]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream the pages of an API endpoint, following pagination cursors.
+
+    Args:
+        path: Endpoint path, e.g. "/prices/"
+        key: Response field holding the records, e.g. "prices"
+        params: Query parameters of the first request
+        body: JSON body; when given the endpoint is POSTed
+
+    Yields:
+        List[Dict[str, Any]]: The records of each non-empty page
+    """
+    url = f"{BASE_URL}{path}"
+    headers = _api_headers()
+    seen = set()
+    while url:
+        if url in seen:
+            # A cursor pointing back to a page already read would loop forever
+            break
+        seen.add(url)
+        if body is not None:
+            response = _session.post(url, headers=headers, params=params, json=body)
+        else:
+            response = _session.get(url, headers=headers, params=params)
+        if response.status_code != 200:
+            raise Exception(
+                f"Error fetching data: {response.status_code} - {response.text}"
+            )
+        data = response.json()
+        records = data.get(key)
+        if records:
+            yield records
+
+        # The next page URL already carries the query of the first request
+        url = data.get("next_page_url")
+        params = None
+
+
+def _collect(pages: Iterator[List[Dict[str, Any]]]) -> pd.DataFrame:
+    records = []
+    for page in pages:
+        records.extend(page)
+    return pd.DataFrame.from_records(records)
+
+
+def get_prices_bulk(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Fetch price data for many tickers in a few paginated requests.
+
+    Args:
+        compact: Keep only OHLCV in the compact layout of compact_prices
+            (the ticker level of the index is stored once per ticker)
+
+    Returns:
+        pd.DataFrame: OHLCV columns indexed by (ticker, Date), so that
+        ``df.loc[ticker]`` matches the frame of prices_to_df
+    """
+    frames = []
+    for batch in _batches(tickers):
+        pages = iter_pages(
+            "/prices/",
+            "prices",
+            params={
+                "tickers": ",".join(batch),
+                "interval": interval,
+                "interval_multiplier": interval_multiplier,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+        )
+        df = _collect(pages)
+        if df.empty:
+            continue
+        if "ticker" not in df.columns:
+            if len(batch) > 1:
+                raise ValueError("Bulk price records do not identify their ticker")
+            df["ticker"] = batch[0]
+        frames.append(df)
+    if not frames:
+        raise ValueError("No price data returned")
+
+    df = pd.concat(frames, ignore_index=True)
+    df["Date"] = pd.to_datetime(df["time"])
+    for col in PRICE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.set_index(["ticker", "Date"]).sort_index()
+    return compact_prices(df) if compact else df
+
+
+def _bulk_records(
+    path: str,
+    key: str,
+    batch: List[str],
+    limit: int,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Records of a batch of tickers with at most `limit` rows per ticker.
+
+    The limit is sent scaled by the batch size (up to MAX_PAGE_LIMIT, the
+    rest comes through pagination), since the API may apply it to the whole
+    request rather than per ticker, and the rows are cut back to `limit` per
+    ticker. Only when the reply was truncated (it reached the requested
+    limit) are the tickers missing from it asked for on their own, so one
+    busy ticker cannot crowd out the others; tickers that simply have no
+    data cost no extra request.
+    """
+    def fetch(tickers: List[str], request_limit: int) -> pd.DataFrame:
+        if body is not None:
+            pages = iter_pages(path, key, body={**body, "tickers": tickers, "limit": request_limit})
+        else:
+            pages = iter_pages(path, key, params={**params, "tickers": ",".join(tickers), "limit": request_limit})
+        return _collect(pages)
+
+    request_limit = min(limit * len(batch), MAX_PAGE_LIMIT)
+    df = fetch(batch, request_limit)
+    if df.empty:
+        return df
+    truncated = len(df) >= request_limit
+    if "ticker" not in df.columns:
+        if len(batch) > 1:
+            raise ValueError(f"Bulk {key} records do not identify their ticker")
+        df["ticker"] = batch[0]
+        return df.head(limit)
+
+    df = df.groupby("ticker", sort=False).head(limit)
+    missing = [ticker for ticker in batch if ticker not in set(df["ticker"])]
+    if truncated and missing:
+        frames = [df]
+        for ticker in missing:
+            single = fetch([ticker], limit)
+            if not single.empty:
+                single["ticker"] = single.get("ticker", ticker)
+                frames.append(single.head(limit))
+        df = pd.concat(frames, ignore_index=True)
+    return df
+
+
+def get_financial_metrics_bulk(
+    tickers: List[str],
+    report_period: str,
+    period: str = "ttm",
+    limit: int = 1,
+) -> pd.DataFrame:
+    """
+    Fetch financial metrics for many tickers, at most `limit` reports per ticker.
+
+    The frame can be passed straight to screen_fundamentals.
+    """
+    frames = [
+        _bulk_records(
+            "/financial-metrics/",
+            "financial_metrics",
+            batch,
+            limit,
+            params={"report_period_lte": report_period, "period": period},
+        )
+        for batch in _batches(tickers)
+    ]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        raise ValueError("No financial metrics returned")
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_insider_trades_bulk(
+    tickers: List[str],
+    end_date: str,
+    start_date: str = None,
+    limit: int = 1000,
+) -> pd.DataFrame:
+    """
+    Fetch insider trades for many tickers, at most `limit` filings per ticker.
+
+    The frame can be passed straight to calculate_insider_sentiment.
+    """
+    params = {"filing_date_lte": end_date}
+    if start_date:
+        params["filing_date_gte"] = start_date
+    frames = [
+        _bulk_records("/insider-trades/", "insider_trades", batch, limit, params=params)
+        for batch in _batches(tickers)
+    ]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        raise ValueError("No insider trades returned")
+    return pd.concat(frames, ignore_index=True)
+
+
+def search_line_items_bulk(
+    tickers: List[str],
+    line_items: List[str],
+    period: str = "ttm",
+    limit: int = 1,
+) -> pd.DataFrame:
+    """Fetch line items for many tickers, at most `limit` reports per ticker."""
+    frames = [
+        _bulk_records(
+            "/financials/search/line-items",
+            "search_results",
+            batch,
+            limit,
+            body={"line_items": line_items, "period": period},
+        )
+        for batch in _batches(tickers)
+    ]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        raise ValueError("No search results returned")
+    return pd.concat(frames, ignore_index=True)
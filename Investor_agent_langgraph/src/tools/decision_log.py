@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Column name -> dtype of the per-decision arrays
+DECISION_COLUMNS = {
+    "date": str,
+    "action": str,
+    "quantity": np.int64,
+    "close": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "volume": np.float64,
+    "max_position_size": np.float64,
+    "raw_decision": str,
+    "analyst_signals": str,
+}
+
+
+class DecisionLog:
+    """
+    Every decision of a backtest with the inputs needed to account for it.
+
+    Rows hold the decision the model asked for (before any fill limits), the
+    bar it was executed against, the risk manager's position limit, the raw
+    LLM reply and the analyst signals as JSON. The log is saved column by
+    column in one compressed .npz file, so replaying it needs no API or LLM
+    call and no pickle.
+    """
+
+    def __init__(self, ticker: str, initial_capital: float, initial_shares: int = 0,
+                 initial_price: float = None):
+        """
+        Args:
+            ticker: Stock ticker symbol
+            initial_capital: Cash the run started with
+            initial_shares: Shares the run started with
+            initial_price: Close the initial shares were valued at
+        """
+        self.metadata = {
+            "ticker": ticker,
+            "initial_capital": float(initial_capital),
+            "initial_shares": int(initial_shares),
+            "initial_price": np.nan if initial_price is None else float(initial_price),
+        }
+        self.rows = {name: [] for name in DECISION_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.rows["date"])
+
+    def append(self, date: str, decision: Optional[Dict[str, Any]], bar, max_position_size=None,
+               raw_decision: str = "", analyst_signals: Optional[Dict[str, Any]] = None):
+        """
+        Record one decision.
+
+        Args:
+            date: Trading date (YYYY-MM-DD)
+            decision: Parsed portfolio manager decision (action, quantity)
+            bar: Row of the price frame the trade executes against
+            max_position_size: Risk manager's dollar limit, if any
+            raw_decision: Unparsed reply of the portfolio manager
+            analyst_signals: Signals of every agent for the day
+        """
+        decision = decision or {}
+        row = {
+            "date": date,
+            "action": decision.get("action") or "hold",
+            "quantity": int(decision.get("quantity") or 0),
+            "close": bar["close"],
+            "high": bar.get("high", np.nan),
+            "low": bar.get("low", np.nan),
+            "volume": bar.get("volume", np.nan),
+            "max_position_size": np.nan if max_position_size is None else max_position_size,
+            "raw_decision": raw_decision or "",
+            "analyst_signals": json.dumps(analyst_signals or {}, default=str),
+        }
+        for name, value in row.items():
+            self.rows[name].append(value)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """The log as one array per column."""
+        return {
+            name: np.asarray(values, dtype=DECISION_COLUMNS[name]) if values
+            else np.empty(0, dtype=DECISION_COLUMNS[name])
+            for name, values in self.rows.items()
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """The log as a DataFrame indexed by date (signals left as JSON)."""
+        df = pd.DataFrame(self.columns())
+        df["Date"] = pd.to_datetime(df.pop("date"))
+        return df.set_index("Date")
+
+    def save(self, path: str):
+        """Write the log to a compressed .npz file."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        metadata = {f"meta_{key}": np.asarray(value) for key, value in self.metadata.items()}
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **self.columns(), **metadata)
+
+    @classmethod
+    def load(cls, path: str) -> "DecisionLog":
+        """Read a log written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            log = cls(
+                ticker=str(data["meta_ticker"]),
+                initial_capital=float(data["meta_initial_capital"]),
+                initial_shares=int(data["meta_initial_shares"]),
+            )
+            log.metadata["initial_price"] = float(data["meta_initial_price"])
+            log.rows = {name: data[name].tolist() for name in DECISION_COLUMNS}
+        return log
+
+    def signals(self, index: int) -> Dict[str, Any]:
+        """Analyst signals of one row."""
+        return json.loads(self.rows["analyst_signals"][index])
@@ -0,0 +1,206 @@
+import math
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+# Parkinson estimator: daily sigma from one bar's high/low range
+PARKINSON_FACTOR = 1.0 / (2.0 * math.sqrt(math.log(2.0)))
+
+
+@dataclass
+class CommissionSchedule:
+    """
+    Broker commission per fill, vectorized over fills.
+
+    Attributes:
+        per_share: Fee per share traded
+        rate: Fee as a fraction of the traded notional
+        minimum: Minimum fee per (non-empty) fill
+        max_rate: Cap on the fee as a fraction of the notional (None = no cap)
+    """
+
+    per_share: float = 0.0
+    rate: float = 0.0
+    minimum: float = 0.0
+    max_rate: Optional[float] = None
+
+    def cost(self, shares, price) -> np.ndarray:
+        shares = np.asarray(shares, dtype=np.float64)
+        notional = shares * price
+        fee = np.maximum(self.per_share * shares + self.rate * notional, self.minimum)
+        if self.max_rate is not None:
+            fee = np.minimum(fee, self.max_rate * notional)
+        return np.where(shares > 0, fee, 0.0)
+
+    def max_affordable(self, cash, price) -> np.ndarray:
+        """Most shares whose notional plus fee fits in cash (a lower bound)."""
+        by_rate = np.floor_divide(cash, price * (1 + self.rate) + self.per_share)
+        by_minimum = np.floor_divide(np.maximum(cash - self.minimum, 0.0), price)
+        return np.maximum(np.minimum(by_rate, by_minimum), 0.0)
+
+
+@dataclass
+class SpreadSlippage:
+    """Pay half the quoted spread on every share."""
+
+    half_spread_bps: float = 5.0
+
+    def impact(self, shares, close, volume, high, low) -> np.ndarray:
+        return np.full(np.shape(shares), self.half_spread_bps / 1e4)
+
+
+@dataclass
+class VolatilitySlippage:
+    """
+    Square-root market impact: coefficient * sigma * sqrt(shares / volume).
+
+    sigma is the bar's Parkinson volatility estimated from its high/low range,
+    so no price history is needed. Bars without a range or volume only pay
+    the spread.
+    """
+
+    coefficient: float = 1.0
+    half_spread_bps: float = 0.0
+
+    def impact(self, shares, close, volume, high, low) -> np.ndarray:
+        shares = np.asarray(shares, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma = PARKINSON_FACTOR * np.log(np.asarray(high) / np.asarray(low))
+            participation = shares / np.asarray(volume, dtype=np.float64)
+            impact = self.coefficient * sigma * np.sqrt(participation)
+        impact = np.where(np.isfinite(impact), impact, 0.0)
+        return impact + self.half_spread_bps / 1e4
+
+
+@dataclass
+class ExecutionModel:
+    """
+    How orders fill in the backtest: commission, slippage and participation.
+
+    Every method takes scalars or arrays (one element per order/asset, bars
+    along the last axis for schedule), so many assets or many days are
+    simulated in a few array operations. The default model is frictionless:
+    orders fill in full at the close, limited only by cash and holdings.
+
+    Attributes:
+        commission: Fee schedule applied to every fill
+        slippage: SpreadSlippage / VolatilitySlippage, None for none
+        participation_rate: Largest fraction of a bar's volume one order may
+            take; the rest stays working for the next bars (None = no limit)
+    """
+
+    commission: CommissionSchedule = field(default_factory=CommissionSchedule)
+    slippage: Optional[object] = None
+    participation_rate: Optional[float] = None
+
+    def bar_capacity(self, volume) -> np.ndarray:
+        """Shares an order may fill in a bar with the given volume."""
+        if self.participation_rate is None or volume is None:
+            return np.asarray(np.inf)
+        volume = np.nan_to_num(np.asarray(volume, dtype=np.float64), nan=0.0)
+        return np.floor(self.participation_rate * volume)
+
+    def schedule(self, quantity, volumes) -> np.ndarray:
+        """
+        Split orders across consecutive bars under the participation limit.
+
+        Args:
+            quantity: Shares to fill, shape (...)
+            volumes: Bar volumes, shape (..., bars)
+
+        Returns:
+            Shares filled per bar, shape (..., bars); what is left after the
+            last bar is quantity minus the sum along the last axis
+        """
+        volumes = np.asarray(volumes, dtype=np.float64)
+        quantity = np.asarray(quantity, dtype=np.float64)[..., None]
+        capacity = np.broadcast_to(self.bar_capacity(volumes), volumes.shape)
+        filled = np.minimum(np.cumsum(capacity, axis=-1), quantity)
+        return np.diff(filled, axis=-1, prepend=0.0)
+
+    def fill_price(self, side, shares, close, volume=None, high=None, low=None) -> np.ndarray:
+        """Average execution price: the close moved against the trade by slippage."""
+        if self.slippage is None:
+            return np.asarray(close, dtype=np.float64) + np.zeros(np.shape(shares))
+        impact = self.slippage.impact(shares, close, volume, high, low)
+        return np.asarray(close, dtype=np.float64) * (1 + np.sign(side) * impact)
+
+    def execute(
+        self,
+        side,
+        quantity,
+        close,
+        cash,
+        holdings,
+        volume=None,
+        high=None,
+        low=None,
+    ) -> dict:
+        """
+        Fill orders against one bar.
+
+        Args:
+            side: +1 to buy, -1 to sell (0 for no order)
+            quantity: Shares wanted
+            close, volume, high, low: The bar
+            cash: Cash available to buys
+            holdings: Shares available to sells
+
+        Returns:
+            dict of arrays: shares filled, fill price, commission, slippage
+            cost (vs. the close) and the signed cash change
+        """
+        side = np.sign(np.asarray(side, dtype=np.float64))
+        quantity = np.maximum(np.asarray(quantity, dtype=np.float64), 0.0)
+        close = np.asarray(close, dtype=np.float64)
+
+        shares = np.minimum(quantity, self.bar_capacity(volume))
+        shares = np.where(side < 0, np.minimum(shares, holdings), shares)
+
+        # Buys are cut to what the cash covers at the price they would pay;
+        # fewer shares never cost more per share, so the cut stays affordable
+        price = self.fill_price(side, shares, close, volume, high, low)
+        affordable = self.commission.max_affordable(cash, price)
+        shares = np.where(side > 0, np.minimum(shares, affordable), shares)
+        shares = np.where(side != 0, shares, 0.0)
+
+        price = self.fill_price(side, shares, close, volume, high, low)
+        commission = self.commission.cost(shares, price)
+        notional = shares * price
+        return {
+            "shares": shares,
+            "price": price,
+            "commission": commission,
+            "slippage": np.abs(price - close) * shares,
+            "cash_change": -side * notional - commission,
+        }
+
+
+def add_execution_arguments(parser):
+    """Add the execution-cost flags of the backtester."""
+    parser.add_argument("--commission-per-share", type=float, default=0.0, help="Commission per share traded")
+    parser.add_argument("--commission-rate", type=float, default=0.0, help="Commission as a fraction of the notional")
+    parser.add_argument("--commission-min", type=float, default=0.0, help="Minimum commission per fill")
+    parser.add_argument("--spread-bps", type=float, default=0.0, help="Half spread paid per share, in basis points")
+    parser.add_argument("--impact", type=float, default=0.0, help="Square-root impact coefficient on the bar volatility (0 = off)")
+    parser.add_argument("--participation-rate", type=float, help="Largest fraction of a bar's volume an order may fill")
+
+
+def execution_model_from_args(args) -> ExecutionModel:
+    """Build the ExecutionModel described by add_execution_arguments flags."""
+    if args.impact:
+        slippage = VolatilitySlippage(coefficient=args.impact, half_spread_bps=args.spread_bps)
+    elif args.spread_bps:
+        slippage = SpreadSlippage(half_spread_bps=args.spread_bps)
+    else:
+        slippage = None
+    return ExecutionModel(
+        commission=CommissionSchedule(
+            per_share=args.commission_per_share,
+            rate=args.commission_rate,
+            minimum=args.commission_min,
+        ),
+        slippage=slippage,
+        participation_rate=args.participation_rate,
+    )
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from tools.api import get_insider_trades
+
+DEFAULT_DB_PATH = os.environ.get(
+    "INSIDER_TRADES_DB",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", ".cache", "insider_trades.sqlite"
+    ),
+)
+
+# Columns kept from each insider filing
+TRADE_COLUMNS = [
+    "ticker",
+    "name",
+    "title",
+    "is_board_director",
+    "transaction_date",
+    "transaction_shares",
+    "transaction_price_per_share",
+    "transaction_value",
+    "shares_owned_after_transaction",
+    "filing_date",
+]
+
+# Largest page the insider-trades endpoint hands out in one call
+SYNC_PAGE_SIZE = 1000
+
+
+class InsiderTradeStore:
+    """
+    Local SQLite index of insider filings, synced incrementally per ticker.
+
+    Each sync only asks the API for filings on or after the newest filing
+    date already stored, plus the older ones when the requested start date
+    is before the earliest date the ticker was synced from. A ticker whose
+    synced range covers the request is served without any network call.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Args:
+            db_path: Path of the SQLite file (":memory:" for a throwaway store)
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Syncs from several threads (e.g. the backtest prefetcher) run one at a time
+        self._sync_lock = threading.RLock()
+        # The connection is shared by those threads, so every query holds this lock;
+        # it is not held across API calls, so reads do not wait for a sync to finish
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        columns = ", ".join(
+            f"{col} TEXT" if col in ("ticker", "name", "title", "transaction_date", "filing_date")
+            else f"{col} REAL"
+            for col in TRADE_COLUMNS
+        )
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS insider_trades (trade_id TEXT PRIMARY KEY, {columns})"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_insider_ticker_filing "
+                "ON insider_trades (ticker, filing_date)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state "
+                "(ticker TEXT PRIMARY KEY, synced_through TEXT, synced_from TEXT)"
+            )
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(sync_state)")]
+            if "synced_from" not in columns:
+                # Index written before the start of the synced range was recorded
+                self.conn.execute("ALTER TABLE sync_state ADD COLUMN synced_from TEXT")
+
+    def latest_filing_date(self, ticker: str) -> Optional[str]:
+        """Return the newest filing date stored for a ticker, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(filing_date) FROM insider_trades WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return row[0]
+
+    def synced_through(self, ticker: str) -> Optional[str]:
+        """Return the last end date a ticker was synced through, or None."""
+        return self.synced_range(ticker)[1]
+
+    def synced_range(self, ticker: str) -> tuple:
+        """
+        Return (synced_from, synced_through) of a ticker, or (None, None)
+        if it was never synced. synced_from is "" when the first sync had
+        no start date (all the history was fetched).
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT synced_from, synced_through FROM sync_state WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            synced_from, synced_through = row
+            if synced_from is None:
+                # Recorded before synced_from existed: only the stored filings are known
+                synced_from = self.conn.execute(
+                    "SELECT MIN(filing_date) FROM insider_trades WHERE ticker = ?", (ticker,)
+                ).fetchone()[0] or synced_through
+        return synced_from, synced_through
+
+    def add_trades(self, ticker: str, trades: List[Dict[str, Any]]) -> int:
+        """
+        Insert filings of a ticker, ignoring ones that are already stored.
+
+        Returns:
+            int: Number of new filings written
+        """
+        rows = []
+        for trade in trades:
+            values = [
+                ticker if col == "ticker" else trade.get(col) for col in TRADE_COLUMNS
+            ]
+            trade_id = hashlib.sha1(
+                json.dumps(values, default=str).encode("utf-8")
+            ).hexdigest()
+            rows.append([trade_id] + values)
+
+        placeholders = ", ".join("?" * (len(TRADE_COLUMNS) + 1))
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO insider_trades VALUES ({placeholders})", rows
+            )
+            return self.conn.total_changes - before
+
+    def sync(self, ticker: str, end_date: str, start_date: str = None) -> int:
+        """
+        Fetch the filings of a ticker that are newer than the ones stored,
+        and the older ones when start_date is before the synced range.
+
+        Args:
+            ticker: Stock ticker symbol
+            end_date: Latest filing date to sync through (YYYY-MM-DD)
+            start_date: Earliest filing date needed (None for all history)
+
+        Returns:
+            int: Number of new filings stored
+        """
+        with self._sync_lock:
+            return self._sync(ticker, end_date, start_date)
+
+    def _sync(self, ticker: str, end_date: str, start_date: str = None) -> int:
+        synced_from, synced_through = self.synced_range(ticker)
+        backfill = synced_through is not None and start_date is not None and start_date < synced_from
+        forward = synced_through is None or synced_through < end_date
+        if not backfill and not forward:
+            return 0
+
+        added = 0
+        if backfill:
+            # An older window than any synced before (e.g. a backtest after a live run)
+            added += self._fetch(ticker, since=start_date, page_end=synced_from)
+            synced_from = start_date
+        if forward:
+            # Re-request the newest stored day, filings can land on it after a sync
+            since = self.latest_filing_date(ticker) or start_date
+            added += self._fetch(ticker, since=since, page_end=end_date)
+            if synced_through is None:
+                synced_from = start_date or ""
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (ticker, synced_through, synced_from) VALUES (?, ?, ?)",
+                (ticker, max(end_date, synced_through or end_date), synced_from),
+            )
+        return added
+
+    def _fetch(self, ticker: str, since: Optional[str], page_end: str) -> int:
+        """Store the filings of a ticker between since and page_end, page by page."""
+        added = 0
+        while True:
+            try:
+                trades = get_insider_trades(
+                    ticker=ticker,
+                    end_date=page_end,
+                    limit=SYNC_PAGE_SIZE,
+                    start_date=since,
+                )
+            except ValueError:
+                # No filings in the requested range
+                trades = []
+            added += self.add_trades(ticker, trades)
+
+            # Filings come newest first; walk back while pages come back full
+            if len(trades) < SYNC_PAGE_SIZE:
+                break
+            oldest = min(t["filing_date"] for t in trades)
+            if oldest >= page_end or (since and oldest <= since):
+                break
+            page_end = oldest
+        return added
+
+    def window_summary(self, ticker: str, start_date: str, end_date: str) -> tuple:
+        """Return (count, first, last filing date) of a ticker within a window."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*), MIN(filing_date), MAX(filing_date) FROM insider_trades "
+                "WHERE ticker = ? AND filing_date >= ? AND filing_date <= ?",
+                (ticker, start_date, end_date),
+            ).fetchone()
+
+    def load(
+        self, tickers: List[str], start_date: str = None, end_date: str = None
+    ) -> pd.DataFrame:
+        """
+        Load the stored filings of many tickers as one DataFrame.
+
+        Args:
+            tickers: Ticker symbols to load
+            start_date: Earliest filing date to include (YYYY-MM-DD)
+            end_date: Latest filing date to include (YYYY-MM-DD)
+
+        Returns:
+            pd.DataFrame: One row per filing with TRADE_COLUMNS
+        """
+        query = (
+            f"SELECT {', '.join(TRADE_COLUMNS)} FROM insider_trades "
+            f"WHERE ticker IN ({', '.join('?' * len(tickers))})"
+        )
+        params = list(tickers)
+        if start_date:
+            query += " AND filing_date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND filing_date <= ?"
+            params.append(end_date)
+        with self._lock:
+            return pd.read_sql_query(query + " ORDER BY ticker, filing_date", self.conn, params=params)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_insider_store() -> InsiderTradeStore:
+    """Return the process-wide store backed by DEFAULT_DB_PATH."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = InsiderTradeStore()
+    return _default_store
@@ -0,0 +1,216 @@
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from tools.replay import request_key
+
+# Responses kept by the cache, enough for a few days of every agent's requests
+DEFAULT_CACHE_ENTRIES = 64
+
+# Seconds the prefetch threads wait before checking for a stop request
+POLL_INTERVAL = 0.1
+
+
+class ResponseCache(BaseAdapter):
+    """
+    Requests transport that shares responses between threads.
+
+    Mounted in front of the session's transport, it answers a request from
+    the cache when an identical one was already sent, and makes a request
+    that is still in flight (typically from the prefetcher) wait for that
+    reply instead of sending it again. Only 200 replies are kept, least
+    recently used first out.
+    """
+
+    def __init__(self, inner: BaseAdapter, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Args:
+            inner: Transport that actually sends the requests
+            max_entries: Largest number of replies kept
+        """
+        super().__init__()
+        self.inner = inner
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        key = request_key(request.method, request.url, body)
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = Future()
+                self.misses += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if owner:
+            try:
+                response = self.inner.send(
+                    request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies
+                )
+                entry.set_result((response.status_code, response.content, dict(response.headers)))
+            except Exception as e:
+                entry.set_exception(e)
+            if entry.exception() is not None or entry.result()[0] != 200:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+
+        status, content, headers = entry.result()
+        response = requests.Response()
+        response.status_code = status
+        response._content = content
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses and hit rate so far."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        self.inner.close()
+
+
+def install_cache(max_entries: int = DEFAULT_CACHE_ENTRIES) -> ResponseCache:
+    """
+    Put a ResponseCache in front of the transport tools.api currently uses.
+
+    Works on top of the replay transport as well. Undo with uninstall_cache.
+    """
+    from tools import api
+
+    inner = api._session.get_adapter(api.BASE_URL)
+    cache = ResponseCache(inner, max_entries=max_entries)
+    api._session.mount(api.BASE_URL, cache)
+    return cache
+
+
+def uninstall_cache(cache: ResponseCache):
+    """Mount back the transport a ResponseCache was installed over."""
+    from tools import api
+
+    if api._session.get_adapter(api.BASE_URL) is cache:
+        api._session.mount(api.BASE_URL, cache.inner)
+
+
+class Prefetcher:
+    """
+    Runs fetch(item) for upcoming items on background threads.
+
+    A feeder thread hands the items, in order, to a bounded queue drained by
+    the worker threads. It never gets more than `depth` items ahead of the
+    consumer's position (set with advance), so the fetched data does not
+    outgrow the cache and the threads stay idle when the consumer is slow.
+    Failed fetches are only counted: the consumer fetches the item itself
+    and sees the error then. Usable as a context manager that starts and
+    stops the threads.
+    """
+
+    def __init__(self, fetch: Callable[[Any], Any], items: Iterable[Any], depth: int = 3, workers: int = 2):
+        """
+        Args:
+            fetch: Called once per item on a worker thread
+            items: Items in the order the consumer will need them
+            depth: How many items past the current one may be fetched
+            workers: Number of worker threads
+        """
+        self.fetch = fetch
+        self.items = list(items)
+        self.depth = depth
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=workers)
+        self._position = 0
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._counts_lock = threading.Lock()
+        self.fetched = 0
+        self.failed = 0
+
+    def start(self) -> "Prefetcher":
+        self._threads = [threading.Thread(target=self._feed, daemon=True)] + [
+            threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def advance(self, position: int):
+        """Tell the prefetcher the consumer is now on items[position]."""
+        with self._condition:
+            self._position = max(self._position, position)
+            self._condition.notify_all()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop handing out items and wait for the threads to finish.
+
+        Fetches already running are let to complete (they cannot be
+        interrupted), queued ones are dropped.
+        """
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _feed(self):
+        for index, item in enumerate(self.items):
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped.is_set() or index <= self._position + self.depth
+                )
+            if index < self._position:
+                # The consumer already got past it
+                continue
+            while not self._stopped.is_set():
+                try:
+                    self._queue.put(item, timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    pass
+            if self._stopped.is_set():
+                return
+
+    def _work(self):
+        while not self._stopped.is_set():
+            try:
+                item = self._queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if self._stopped.is_set():
+                return
+            try:
+                self.fetch(item)
+                ok = True
+            except Exception:
+                ok = False
+            with self._counts_lock:
+                if ok:
+                    self.fetched += 1
+                else:
+                    self.failed += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,533 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+UPSTREAM_URL = "https://api.financialdatasets.ai"
+
+# Canned portfolio decisions cycled through by the fake chat model
+DEFAULT_DECISIONS = [
+    {"action": "buy", "quantity": 10, "confidence": 0.7, "reasoning": "Canned offline decision"},
+    {"action": "hold", "quantity": 0, "confidence": 0.5, "reasoning": "Canned offline decision"},
+    {"action": "sell", "quantity": 5, "confidence": 0.6, "reasoning": "Canned offline decision"},
+]
+
+# (status, JSON-serializable payload)
+Reply = Tuple[int, Any]
+
+
+def request_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """
+    Canonical description of a request, independent of host and parameter order.
+
+    Args:
+        method: HTTP method
+        url: Full URL or path with query string
+        body: Raw JSON body, if any
+
+    Returns:
+        str: e.g. "GET /prices?end_date=2024-03-01&ticker=AAPL"
+    """
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    query = "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(parts.query)))
+    key = f"{method.upper()} {path}" + (f"?{query}" if query else "")
+    if body:
+        key += " " + json.dumps(json.loads(body), sort_keys=True)
+    return key
+
+
+class FixtureStore:
+    """
+    Directory of recorded API responses, one JSON file per distinct request.
+
+    Files are grouped by endpoint and named after a hash of request_key, and
+    keep the readable key next to the response so fixtures can be inspected.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        endpoint = key.split(" ")[1].split("?")[0].strip("/").replace("/", "_") or "root"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, endpoint, f"{digest}.json")
+
+    def load(self, key: str) -> Optional[Reply]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            fixture = json.load(f)
+        return fixture["status"], fixture["body"]
+
+    def save(self, key: str, status: int, body: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"request": key, "status": status, "body": body}, f, indent=1)
+
+
+class FaultInjector:
+    """Adds configurable latency and random server errors to every request."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency: Seconds added to each request
+            jitter: Extra uniformly random seconds, up to this value
+            error_rate: Probability of answering with error_status instead
+            error_status: HTTP status used for injected errors
+            seed: Seed of the error/jitter generator, for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def apply(self) -> Optional[Reply]:
+        """Sleep for the configured latency and maybe return an injected error."""
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            return self.error_status, {"error": "Injected failure"}
+        return None
+
+
+def forward_to_api(method: str, url: str, body: Optional[bytes] = None) -> Reply:
+    """Send the request to the real API and return its reply."""
+    parts = urlsplit(url)
+    headers = {"Content-Type": "application/json"} if body else {}
+    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+        headers["X-API-KEY"] = api_key
+    target = f"{UPSTREAM_URL}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    response = requests.request(method, target, headers=headers, data=body)
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {"error": response.text}
+    return response.status_code, payload
+
+
+class ReplayBackend:
+    """
+    Answers API requests from fixtures, recording them first when asked to.
+
+    In "replay" mode unknown requests get a 404; in "record" mode every
+    request goes to the upstream (the real API by default) and successful
+    replies are written to the fixture store.
+    """
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        mode: str = "replay",
+        upstream: Callable[[str, str, Optional[bytes]], Reply] = forward_to_api,
+        faults: Optional[FaultInjector] = None,
+    ):
+        if mode not in ("replay", "record"):
+            raise ValueError("Invalid mode. Must be 'replay' or 'record'")
+        self.store = store
+        self.mode = mode
+        self.upstream = upstream
+        self.faults = faults
+
+    def handle(self, method: str, url: str, body: Optional[bytes] = None) -> Reply:
+        if self.faults and (injected := self.faults.apply()):
+            return injected
+
+        key = request_key(method, url, body)
+        if self.mode == "replay":
+            fixture = self.store.load(key)
+            if fixture is None:
+                return 404, {"error": f"No fixture recorded for {key}"}
+            return fixture
+
+        status, payload = self.upstream(method, url, body)
+        if status == 200:
+            self.store.save(key, status, payload)
+        return status, payload
+
+
+class ReplayAdapter(BaseAdapter):
+    """In-process requests transport that routes API calls to a ReplayBackend."""
+
+    def __init__(self, backend: ReplayBackend):
+        super().__init__()
+        self.backend = backend
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        status, payload = self.backend.handle(request.method, request.url, body)
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode("utf-8")
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install(backend: ReplayBackend, session: requests.Session = None) -> ReplayAdapter:
+    """
+    Route every API call of tools.api (or of the given session) to a backend.
+
+    Returns:
+        ReplayAdapter: The mounted adapter
+    """
+    if session is None:
+        from tools import api
+
+        session = api._session
+        prefix = api.BASE_URL
+    else:
+        prefix = UPSTREAM_URL
+    adapter = ReplayAdapter(backend)
+    session.mount(prefix, adapter)
+    return adapter
+
+
+class FixtureServer:
+    """
+    Local stand-in HTTP server for the API, backed by a ReplayBackend.
+
+    Point the client at it with FINANCIAL_DATASETS_BASE_URL=server.url.
+    Usable as a context manager that starts and stops the server thread.
+    """
+
+    def __init__(self, backend: ReplayBackend, host: str = "127.0.0.1", port: int = 0):
+        backend_ref = backend
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, body: Optional[bytes]):
+                status, payload = backend_ref.handle(self.command, self.path, body)
+                content = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                self._reply(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._reply(self.rfile.read(length) if length else None)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _seeded_rng(seed: int, *parts) -> np.random.Generator:
+    return np.random.default_rng(zlib.crc32(f"{seed}:{':'.join(map(str, parts))}".encode()))
+
+
+@lru_cache(maxsize=256)
+def _synthetic_price_history(
+    seed: int, ticker: str, start: date, end: date
+) -> Tuple[List[date], np.ndarray]:
+    """
+    Weekday closes, spreads and volumes of a ticker from start through end.
+
+    Cached at module level, keyed by the seed, so responders with the same
+    seed share their series and no responder is kept alive by the cache.
+    """
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    # Each series has its own stream drawn from the fixed start, so the
+    # bars of a day do not depend on the range that was requested
+    n = len(days)
+    close = 50 * np.exp(np.cumsum(_seeded_rng(seed, "returns", ticker).normal(0.0004, 0.018, n)))
+    spread = np.abs(_seeded_rng(seed, "spread", ticker).normal(0, 0.01, n))
+    volume = _seeded_rng(seed, "volume", ticker).integers(1_000_000, 50_000_000, n)
+    return days, np.column_stack([close, spread, volume])
+
+
+class SyntheticResponder:
+    """
+    Deterministic upstream that makes up schema-compatible API data.
+
+    Prices follow a seeded random walk per ticker, so any date range of any
+    ticker is answered consistently. Record it into a FixtureStore to build
+    fixture sets for machines that cannot reach the real API.
+    """
+
+    HISTORY_START = date(2010, 1, 4)
+    LINE_ITEMS_PERIOD_END = "2024-12-31"
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def __call__(self, method: str, url: str, body: Optional[bytes] = None) -> Reply:
+        parts = urlsplit(url)
+        path = parts.path.rstrip("/")
+        params = dict(parse_qsl(parts.query))
+        tickers = self._tickers(params, json.loads(body) if body else {})
+
+        if path.endswith("/prices"):
+            return 200, {"prices": self._prices(tickers, params)}
+        if path.endswith("/financial-metrics"):
+            return 200, {"financial_metrics": self._metrics(tickers, params)}
+        if path.endswith("/insider-trades"):
+            return 200, {"insider_trades": self._insider_trades(tickers, params)}
+        if path.endswith("/company/facts"):
+            return 200, {"company_facts": self._company_facts(tickers[0])}
+        if path.endswith("/financials/search/line-items"):
+            return 200, {"search_results": self._line_items(tickers, json.loads(body))}
+        return 404, {"error": f"Unknown endpoint {path}"}
+
+    @staticmethod
+    def _tickers(params: Dict[str, str], body: Dict[str, Any]) -> List[str]:
+        if "tickers" in body:
+            return list(body["tickers"])
+        if "tickers" in params:
+            return params["tickers"].split(",")
+        return [params["ticker"]]
+
+    def _rng(self, *parts) -> np.random.Generator:
+        return _seeded_rng(self.seed, *parts)
+
+    def _price_history(self, ticker: str, end: date) -> Tuple[List[date], np.ndarray]:
+        return _synthetic_price_history(self.seed, ticker, self.HISTORY_START, end)
+
+    def _prices(self, tickers: List[str], params: Dict[str, str]) -> List[Dict[str, Any]]:
+        start = date.fromisoformat(params["start_date"])
+        end = date.fromisoformat(params["end_date"])
+        prices = []
+        for ticker in tickers:
+            days, values = self._price_history(ticker, date(end.year + 1, 1, 1))
+            for day, (close, spread, volume) in zip(days, values):
+                if start <= day <= end:
+                    open_ = close * (1 - spread / 2)
+                    prices.append(
+                        {
+                            "ticker": ticker,
+                            "open": round(open_, 4),
+                            "close": round(close, 4),
+                            "high": round(max(open_, close) * (1 + spread), 4),
+                            "low": round(min(open_, close) * (1 - spread), 4),
+                            "volume": int(volume),
+                            "time": f"{day.isoformat()}T00:00:00",
+                        }
+                    )
+        return prices
+
+    @staticmethod
+    def _report_periods(report_period_lte: str, limit: int) -> List[str]:
+        end = date.fromisoformat(report_period_lte)
+        quarter_ends = [(3, 31), (6, 30), (9, 30), (12, 31)]
+        periods = []
+        year = end.year
+        while len(periods) < limit:
+            for month, day in reversed(quarter_ends):
+                period = date(year, month, day)
+                if period <= end and len(periods) < limit:
+                    periods.append(period.isoformat())
+            year -= 1
+        return periods
+
+    def _metrics(self, tickers: List[str], params: Dict[str, str]) -> List[Dict[str, Any]]:
+        limit = int(params.get("limit", 1))
+        metrics = []
+        for ticker in tickers:
+            for period in self._report_periods(params["report_period_lte"], limit):
+                rng = self._rng("metrics", ticker, period)
+                eps = rng.uniform(1, 10)
+                metrics.append(
+                    {
+                        "ticker": ticker,
+                        "report_period": period,
+                        "period": params.get("period", "ttm"),
+                        "return_on_equity": rng.uniform(-0.05, 0.4),
+                        "net_margin": rng.uniform(-0.05, 0.35),
+                        "operating_margin": rng.uniform(0, 0.4),
+                        "revenue_growth": rng.uniform(-0.1, 0.3),
+                        "earnings_growth": rng.uniform(-0.1, 0.3),
+                        "book_value_growth": rng.uniform(-0.1, 0.3),
+                        "current_ratio": rng.uniform(0.5, 3),
+                        "debt_to_equity": rng.uniform(0, 2),
+                        "free_cash_flow_per_share": eps * rng.uniform(0.5, 1.5),
+                        "earnings_per_share": eps,
+                        "price_to_earnings_ratio": rng.uniform(8, 45),
+                        "price_to_book_ratio": rng.uniform(1, 12),
+                        "price_to_sales_ratio": rng.uniform(1, 12),
+                    }
+                )
+        return metrics
+
+    def _line_items(self, tickers: List[str], body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # The endpoint has no date filter; anchor on a fixed period end
+        periods = self._report_periods(self.LINE_ITEMS_PERIOD_END, int(body.get("limit", 1)))
+        results = []
+        for ticker in tickers:
+            for period in periods:
+                rng = self._rng("line_items", ticker, period)
+                scale = rng.uniform(1e9, 1e11)
+                item = {"ticker": ticker, "report_period": period, "period": body.get("period", "ttm")}
+                for name in body["line_items"]:
+                    item[name] = scale * rng.uniform(0.02, 0.3)
+                results.append(item)
+        return results
+
+    def _insider_trades(self, tickers: List[str], params: Dict[str, str]) -> List[Dict[str, Any]]:
+        end = date.fromisoformat(params["filing_date_lte"])
+        start = date.fromisoformat(params["filing_date_gte"]) if "filing_date_gte" in params else None
+        limit = int(params.get("limit", 5))
+        trades = []
+        for ticker in tickers:
+            found = []
+            day = end
+            # Roughly one filing a week, walked back from the end date
+            while len(found) < limit and day >= self.HISTORY_START and (start is None or day >= start):
+                rng = self._rng("insider", ticker, day.isoformat())
+                if day.weekday() < 5 and rng.random() < 0.2:
+                    shares = int(rng.integers(-20_000, 20_000)) or 100
+                    price = float(rng.uniform(20, 400))
+                    found.append(
+                        {
+                            "ticker": ticker,
+                            "name": f"Insider {int(rng.integers(1, 12))}",
+                            "title": "Director",
+                            "is_board_director": True,
+                            "transaction_date": day.isoformat(),
+                            "transaction_shares": shares,
+                            "transaction_price_per_share": round(price, 2),
+                            "transaction_value": round(abs(shares) * price, 2),
+                            "shares_owned_after_transaction": int(rng.integers(10_000, 1_000_000)),
+                            "filing_date": day.isoformat(),
+                        }
+                    )
+                day -= timedelta(days=1)
+            trades.extend(found)
+        return trades
+
+    def _company_facts(self, ticker: str) -> Dict[str, Any]:
+        rng = self._rng("facts", ticker)
+        return {"ticker": ticker, "market_cap": float(rng.uniform(5e10, 3e12))}
+
+
+def fake_llm(decisions: Optional[List[Dict[str, Any]]] = None, path: str = None):
+    """
+    Chat model that cycles through canned portfolio decisions.
+
+    Args:
+        decisions: Decisions to return, in order (DEFAULT_DECISIONS if None)
+        path: JSON file holding a list of decisions, used instead if given
+
+    Returns:
+        FakeListChatModel: Drop-in replacement for the model of get_llm
+    """
+    from langchain_core.language_models import FakeListChatModel
+
+    if path:
+        with open(path) as f:
+            decisions = json.load(f)
+    decisions = decisions or DEFAULT_DECISIONS
+    return FakeListChatModel(responses=[json.dumps(d) for d in decisions])
+
+
+def add_replay_arguments(parser):
+    """Add the offline/record flags shared by main.py and backtester.py."""
+    parser.add_argument("--fixtures", type=str, help="Serve API responses from recorded fixtures in this directory")
+    parser.add_argument("--record", action="store_true", help="Record API responses into --fixtures instead of replaying them")
+    parser.add_argument("--synthetic", action="store_true", help="Record from generated data instead of the real API")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency injected per API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls answered with an injected error")
+
+
+def backend_from_args(args) -> ReplayBackend:
+    """Build the ReplayBackend described by add_replay_arguments flags."""
+    return ReplayBackend(
+        FixtureStore(args.fixtures),
+        mode="record" if args.record else "replay",
+        upstream=SyntheticResponder() if args.synthetic else forward_to_api,
+        faults=FaultInjector(latency=args.latency, error_rate=args.error_rate, seed=0),
+    )
+
+
+def install_from_args(args) -> Optional[ReplayAdapter]:
+    """Mount the replay transport if --fixtures was given."""
+    if not args.fixtures:
+        return None
+    return install(backend_from_args(args))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the financial datasets API")
+    add_replay_arguments(parser)
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    args = parser.parse_args()
+    if not args.fixtures:
+        parser.error("--fixtures is required")
+
+    server = FixtureServer(backend_from_args(args), host=args.host, port=args.port)
+    print(f"Serving {args.fixtures} at {server.url} (set FINANCIAL_DATASETS_BASE_URL={server.url})")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
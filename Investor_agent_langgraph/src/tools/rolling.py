@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import numba
+except ImportError:  # numba is optional, the NumPy kernel is used instead
+    numba = None
+
+# Columns returned by rolling_moments
+MOMENT_COLUMNS = ["mean", "std", "skew", "kurt"]
+
+# Windows summed about a common centre (bounds cancellation and drift)
+BLOCK_SIZE = 1024
+
+# Highest power sum each moment needs
+MOMENT_ORDER = {"mean": 1, "std": 2, "skew": 3, "kurt": 4}
+
+# Biased variance at or below which pandas leaves skew and kurtosis undefined
+# (an absolute threshold, so it also applies to series on a tiny scale)
+UNDEFINED_SHAPE_VARIANCE = 1e-14
+
+
+def _window_sums_numpy(blocks: np.ndarray, window: int, order: int) -> np.ndarray:
+    """
+    Per-window count and power sums (x, ..., x^order) of the finite values.
+
+    All sums of every block come out of one cumulative pass over an
+    (order + 1, blocks, length) stack, so the cost does not depend on the
+    window.
+    """
+    lead = window - 1
+    valid = np.isfinite(blocks)
+    powers = np.empty((order + 1,) + blocks.shape)
+    powers[0] = valid
+    np.copyto(powers[1], blocks)
+    powers[1][~valid] = 0.0
+    for power in range(2, order + 1):
+        np.multiply(powers[power - 1], powers[1], out=powers[power])
+    np.cumsum(powers, axis=2, out=powers)
+
+    # Window ending at lead + k: cumulative sum there minus the one at k - 1
+    sums = powers[:, :, lead:].copy()
+    sums[:, :, 1:] -= powers[:, :, : sums.shape[2] - 1]
+    return sums
+
+
+def _window_sums_loop(blocks, window, out):
+    # Running sums per block: add the value entering the window, drop the
+    # one leaving it
+    lead = window - 1
+    for b in range(blocks.shape[0]):
+        x = blocks[b]
+        s0 = s1 = s2 = s3 = s4 = 0.0
+        for i in range(x.shape[0]):
+            v = x[i]
+            if np.isfinite(v):
+                v2 = v * v
+                s0 += 1.0
+                s1 += v
+                s2 += v2
+                s3 += v2 * v
+                s4 += v2 * v2
+            if i >= window:
+                v = x[i - window]
+                if np.isfinite(v):
+                    v2 = v * v
+                    s0 -= 1.0
+                    s1 -= v
+                    s2 -= v2
+                    s3 -= v2 * v
+                    s4 -= v2 * v2
+            if i >= lead:
+                out[0, b, i - lead] = s0
+                out[1, b, i - lead] = s1
+                out[2, b, i - lead] = s2
+                out[3, b, i - lead] = s3
+                out[4, b, i - lead] = s4
+
+
+if numba is not None:
+    _window_sums_loop = numba.njit(cache=True, nogil=True)(_window_sums_loop)
+
+
+def _window_sums_numba(blocks: np.ndarray, window: int, order: int) -> np.ndarray:
+    # The compiled loop always keeps all five sums, they cost next to nothing
+    out = np.empty((5, blocks.shape[0], blocks.shape[1] - window + 1))
+    _window_sums_loop(blocks, window, out)
+    return out
+
+
+def _constant_windows(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Whether each window holds a single repeated value.
+
+    Decided from the length of the run of equal values ending at each
+    position, as pandas does, rather than from the variance: the power sums
+    cannot tell a constant window far from its block centre, or a series on
+    a tiny scale, from one that barely moves.
+    """
+    positions = np.arange(x.shape[0])
+    starts = np.ones(x.shape[0], dtype=bool)
+    starts[1:] = x[1:] != x[:-1]
+    run = positions - np.maximum.accumulate(np.where(starts, positions, 0)) + 1
+    return run >= window
+
+
+def rolling_moments(
+    values, window: int, moments=MOMENT_COLUMNS, engine: str = None
+) -> pd.DataFrame:
+    """
+    Rolling mean, standard deviation, skewness and kurtosis in one pass.
+
+    Matches pandas' rolling(window).mean() / .std() / .skew() / .kurt()
+    (sample std, bias-corrected skew, excess kurtosis, NaN for any window
+    holding a missing value, 0 std and skew and -3 kurtosis for constant
+    windows, NaN skew and kurtosis for other windows whose variance is at
+    most UNDEFINED_SHAPE_VARIANCE)
+    but derives all four from the same per-window power sums instead of four
+    separate passes. The sums are taken in blocks of BLOCK_SIZE windows,
+    each centred on its own mean, to keep them well conditioned.
+
+    Args:
+        values: Series or 1-d array of observations
+        window: Number of observations per window
+        moments: Subset of MOMENT_COLUMNS to compute (only the power sums
+            they need are taken)
+        engine: "numba" or "numpy" (numba when installed if None)
+
+    Returns:
+        DataFrame with the requested moments as columns, indexed like values
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    x = np.asarray(values, dtype=np.float64)
+    if engine is None:
+        engine = "numba" if numba is not None else "numpy"
+    if engine == "numba" and numba is None:
+        raise ImportError("engine='numba' requires the numba package")
+
+    window_sums = _window_sums_numba if engine == "numba" else _window_sums_numpy
+
+    # Split the series in blocks of BLOCK_SIZE windows, each carrying the
+    # window - 1 values before it and centred on its own mean, so a
+    # trending series stays well conditioned
+    size = x.shape[0]
+    lead = window - 1
+    block_size = max(min(BLOCK_SIZE, size), 1)
+    num_blocks = max(-(-size // block_size), 1)
+    padded = np.full(lead + num_blocks * block_size, np.nan)
+    padded[lead:lead + size] = x
+    blocks = sliding_window_view(padded, lead + block_size)[::block_size]
+    finite = np.isfinite(blocks)
+    centre = np.where(finite, blocks, 0.0).sum(axis=1) / np.maximum(finite.sum(axis=1), 1)
+    order = max(MOMENT_ORDER[name] for name in moments)
+    sums = window_sums(blocks - centre[:, None], window, order)
+    n, *power_sums = sums.reshape(sums.shape[0], -1)[: order + 1, :size]
+
+    # Only windows without missing values are reported, so the count in
+    # every formula is the window length
+    w = np.float64(window)
+    result = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = power_sums[0] / w
+        result["mean"] = mean + np.repeat(centre, block_size)[:size]
+        if order >= 2:
+            s2 = power_sums[1]
+            mean2 = mean * mean
+            # Central moments of the window (biased)
+            m2 = np.maximum(s2 / w - mean2, 0.0)
+            constant = _constant_windows(x, window)
+            std = np.sqrt(m2 * (w / (w - 1)))
+            std[constant] = 0.0
+            result["std"] = std
+        if order >= 3:
+            s3 = power_sums[2]
+            m3 = (s3 - 3 * mean * s2) / w + 2 * mean2 * mean
+            skew = m3 / (m2 * np.sqrt(m2)) * (np.sqrt(w * (w - 1)) / (w - 2))
+            undefined = m2 <= UNDEFINED_SHAPE_VARIANCE
+            skew[undefined] = np.nan
+            skew[constant] = 0.0
+            result["skew"] = skew
+        if order >= 4:
+            m4 = (power_sums[3] - 4 * mean * s3 + 6 * mean2 * s2) / w - 3 * mean2 * mean2
+            denom = (w - 2) * (w - 3)
+            kurt = m4 / (m2 * m2) * ((w * w - 1) / denom) - 3 * (w - 1) ** 2 / denom
+            kurt[undefined] = np.nan
+            kurt[constant] = -3.0
+            result["kurt"] = kurt
+
+    # Windows with a missing value, or too short for the moment
+    partial = n != window
+    for name, column in result.items():
+        if window <= MOMENT_ORDER[name] - 1:
+            column[:] = np.nan
+        else:
+            column[partial] = np.nan
+
+    # One 2-d block, much cheaper to wrap than a dict of columns
+    stacked = np.stack([result[name] for name in moments], axis=1)
+    return pd.DataFrame(stacked, index=index, columns=list(moments), copy=False)
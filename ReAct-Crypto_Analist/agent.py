@@ -2,7 +2,11 @@ import os
 import re
 import math
 import json
+import time
+import asyncio
+import contextlib
 from dotenv import load_dotenv
+from groq import AsyncGroq
 from groq import Groq
 from datetime import datetime
 from colorama import Fore
@@ -10,10 +14,14 @@ from colorama import Style
 from tool import Tool
 from tool import validate_arguments
 from utils.completions import build_prompt_structure
-from utils.completions import ChatHistory
+from utils.completions import TokenBudgetChatHistory
 from utils.completions import completions_create
+from utils.completions import completions_stream
 from utils.completions import update_chat_history
-from utils.extraction import extract_tag_content
+from utils.extraction import StreamingTagParser
+from utils.parallel import CallTimeout
+from utils.parallel import cancel_tasks
+from utils.parallel import run_parallel
 
 
 # cargamos las variables de entorno, ahi debera estar nuestra API de Groq
@@ -27,6 +35,20 @@ fecha_formateada = fecha_actual.strftime("%Y-%m-%d")  # Formato: Año-Mes-Día
 MODEL = "llama-3.3-70b-versatile"
 GROQ_CLIENT = Groq()
 
+# AsyncGroq client shared by every agent, created on first use
+_ASYNC_GROQ_CLIENT = None
+
+
+def shared_async_client() -> AsyncGroq:
+    """
+    Returns the AsyncGroq client shared by all the agents, so their streamed completions
+    reuse the same connection pool.
+    """
+    global _ASYNC_GROQ_CLIENT
+    if _ASYNC_GROQ_CLIENT is None:
+        _ASYNC_GROQ_CLIENT = AsyncGroq()
+    return _ASYNC_GROQ_CLIENT
+
 BASE_SYSTEM_PROMPT = ""   
 
 # Define the System Prompt as a constant
@@ -68,6 +90,7 @@ If the user requests data from a week ago, subtract the necessary days from this
 Once adjusted, format it exactly as before. For example, if the current date is 09-02-2025, and they ask for data from a week ago, provide data for 02-02-2025 (Feb 02, 2025). 
 If they ask for data from a month ago and the date is 09-02-2025, provide 09-01-2025 (Jan 09, 2025). 
 Always ensure the date follows the same format.
+If the user needs several days (a week, a month, a comparison between dates), call get_historic_range once with the first and last day instead of calling get_historic_data for each day.
 
 You will be called again with this:
 
@@ -90,10 +113,15 @@ class ReactAgent:
     collect tool signatures, and process multiple tool calls in a given round of interaction.
 
     Attributes:
-        client (Groq): The Groq client used to handle model-based completions.
+        client (Groq): The Groq client used to handle model-based completions (shared by default).
         model (str): The name of the model used for generating responses. Default is "llama-3.1-70b-versatile".
         tools (list[Tool]): A list of Tool instances available for execution.
         tools_dict (dict): A dictionary mapping tool names to their corresponding Tool instances.
+        max_concurrency (int): Maximum number of tool calls of one round running at the same time.
+        tool_timeout (float | None): Seconds a tool call may run when its tool sets no timeout.
+        max_history_tokens (int): Token budget of the chat history sent to the model; older
+            observations are summarized to stay under it.
+        verbose (bool): Whether thoughts, tool calls and observations are printed.
     """
 
     def __init__(
@@ -101,12 +129,40 @@ class ReactAgent:
         tools: Tool | list[Tool],
         model: str = "llama-3.1-70b-versatile",
         system_prompt: str = BASE_SYSTEM_PROMPT,
+        max_concurrency: int = 4,
+        tool_timeout: float | None = None,
+        max_history_tokens: int = 6000,
+        client: Groq | None = None,
+        async_client: AsyncGroq | None = None,
+        verbose: bool = True,
     ) -> None:
-        self.client = Groq()
+        self.client = client or GROQ_CLIENT
         self.model = model
         self.system_prompt = system_prompt
         self.tools = tools if isinstance(tools, list) else [tools]
         self.tools_dict = {tool.name: tool for tool in self.tools}
+        self.max_concurrency = max_concurrency
+        self.tool_timeout = tool_timeout
+        self.max_history_tokens = max_history_tokens
+        self._async_client = async_client
+        self._rendered_prompt = None
+        self.verbose = verbose
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        """
+        The AsyncGroq client used by arun (the shared one unless another was given).
+        """
+        if self._async_client is None:
+            self._async_client = shared_async_client()
+        return self._async_client
+
+    def log(self, message: str):
+        """
+        Prints a trace of the agent's work when the agent is verbose.
+        """
+        if self.verbose:
+            print(message)
 
     def add_tool_signatures(self) -> str:
         """
@@ -117,38 +173,137 @@ class ReactAgent:
         """
         return "".join([tool.fn_signature for tool in self.tools])
 
+    def cache_stats(self) -> dict:
+        """
+        Collects the result-cache statistics of the cacheable tools.
+
+        Returns:
+            dict: Hits, misses, hit rate and entries of each cacheable tool, by tool name.
+        """
+        return {tool.name: tool.cache.stats() for tool in self.tools if tool.cache is not None}
+
+    def render_system_prompt(self) -> str:
+        """
+        Returns the system prompt with the ReAct instructions and the tool signatures. It is
+        rendered once per tool set and cached; the cache (and tools_dict) is rebuilt only when
+        the tools or the base system prompt change.
+
+        Returns:
+            str: The system prompt sent at the start of every run.
+        """
+        key = (self.system_prompt, tuple(tool.fn_signature for tool in self.tools))
+        if self._rendered_prompt is None or self._rendered_prompt[0] != key:
+            self.tools_dict = {tool.name: tool for tool in self.tools}
+            prompt = self.system_prompt
+            if self.tools:
+                prompt += "\n" + REACT_SYSTEM_PROMPT % self.add_tool_signatures()
+            self._rendered_prompt = (key, prompt)
+        return self._rendered_prompt[1]
+
+    def new_chat_history(self) -> TokenBudgetChatHistory:
+        """
+        Builds an empty conversation: a chat history holding only the system prompt.
+
+        Returns:
+            TokenBudgetChatHistory: The new chat history.
+        """
+        return TokenBudgetChatHistory(
+            [
+                build_prompt_structure(
+                    prompt=self.render_system_prompt(),
+                    role="system",
+                ),
+            ],
+            max_tokens=self.max_history_tokens,
+        )
+
+    def start_chat_history(self, user_msg: str) -> TokenBudgetChatHistory:
+        """
+        Builds the chat history a run starts from: the system prompt and the user's question.
+
+        Args:
+            user_msg (str): The user's input message.
+
+        Returns:
+            TokenBudgetChatHistory: The new chat history.
+        """
+        chat_history = self.new_chat_history()
+        chat_history.append(build_prompt_structure(prompt=user_msg, role="user", tag="question"))
+        return chat_history
+
     def process_tool_calls(self, tool_calls_content: list) -> dict:
         """
-        Processes each tool call, validates arguments, executes the tools, and collects results.
+        Processes the tool calls of a round: validates their arguments, executes the tools
+        concurrently (at most `max_concurrency` at a time) and collects the results.
+
+        A call that exceeds its tool's timeout is abandoned and observed as an error, so the
+        round does not wait for it. An exception raised by a tool is re-raised.
 
         Args:
             tool_calls_content (list): List of strings, each representing a tool call in JSON format.
 
         Returns:
-            dict: A dictionary where the keys are tool call IDs and values are the results from the tools.
+            dict: A dictionary where the keys are tool call IDs and values are the results from the tools,
+                in the order the calls were made.
         """
-        observations = {}
-        for tool_call_str in tool_calls_content:
-            tool_call = json.loads(tool_call_str)
-            tool_name = tool_call["name"]
-            tool = self.tools_dict[tool_name]
-
-            print(Fore.GREEN + f"\nUsing Tool: {tool_name}")
+        # Validate the tool calls before running any of them
+        calls = [self.validate_tool_call(tool_call_str) for tool_call_str in tool_calls_content]
 
-            # Validate and execute the tool call
-            validated_tool_call = validate_arguments(
-                tool_call, json.loads(tool.fn_signature)
-            )
-            print(Fore.GREEN + f"\nTool call dict: \n{validated_tool_call}")
+        futures = run_parallel(
+            [
+                (lambda tool=tool, call=call: tool.run(**call["arguments"]), self.timeout_for(tool))
+                for tool, call in calls
+            ],
+            max_concurrency=self.max_concurrency,
+        )
 
-            result = tool.run(**validated_tool_call["arguments"])
-            print(Fore.GREEN + f"\nTool result: \n{result}")
+        observations = {}
+        for (tool, call), future in zip(calls, futures):
+            if isinstance(future.exception(), CallTimeout):
+                result = self.timeout_result(tool, future.exception())
+            else:
+                result = future.result()
+            self.log(Fore.GREEN + f"\nTool result ({tool.name}): \n{result}")
 
             # Store the result using the tool call ID
-            observations[validated_tool_call["id"]] = result
+            observations[call["id"]] = result
 
         return observations
 
+    def validate_tool_call(self, tool_call_str: str) -> tuple:
+        """
+        Parses a tool call and converts its arguments to the types of the tool's signature.
+
+        Args:
+            tool_call_str (str): The tool call in JSON format.
+
+        Returns:
+            tuple: The Tool to run and the validated tool call dict.
+        """
+        tool_call = json.loads(tool_call_str)
+        tool_name = tool_call["name"]
+        tool = self.tools_dict[tool_name]
+
+        self.log(Fore.GREEN + f"\nUsing Tool: {tool_name}")
+
+        validated_tool_call = validate_arguments(
+            tool_call, json.loads(tool.fn_signature)
+        )
+        self.log(Fore.GREEN + f"\nTool call dict: \n{validated_tool_call}")
+        return tool, validated_tool_call
+
+    def timeout_for(self, tool: Tool) -> float | None:
+        """
+        Returns the seconds a call to the tool may run: its own timeout, or the agent's.
+        """
+        return tool.timeout if tool.timeout is not None else self.tool_timeout
+
+    def timeout_result(self, tool: Tool, error: Exception) -> dict:
+        """
+        Returns the observation of a tool call that did not answer in time.
+        """
+        return {"error": f"Tool {tool.name} did not answer: {error}"}
+
     def run(
         self,
         user_msg: str,
@@ -166,23 +321,7 @@ class ReactAgent:
         Returns:
             str: The final response generated by the agent after processing user input and any tool calls.
         """
-        user_prompt = build_prompt_structure(
-            prompt=user_msg, role="user", tag="question"
-        )
-        if self.tools:
-            self.system_prompt += (
-                "\n" + REACT_SYSTEM_PROMPT % self.add_tool_signatures()
-            )
-
-        chat_history = ChatHistory(
-            [
-                build_prompt_structure(
-                    prompt=self.system_prompt,
-                    role="system",
-                ),
-                user_prompt,
-            ]
-        )
+        chat_history = self.start_chat_history(user_msg)
 
         if self.tools:
             # Run the ReAct loop for max_rounds
@@ -190,20 +329,152 @@ class ReactAgent:
 
                 completion = completions_create(self.client, chat_history, self.model)
 
-                response = extract_tag_content(str(completion), "response")
-                if response.found:
-                    return response.content[0]
-
-                thought = extract_tag_content(str(completion), "thought")
-                tool_calls = extract_tag_content(str(completion), "tool_call")
+                # Every tag of the completion in one scan
+                parser = StreamingTagParser(stream_tags=())
+                tags = {"response": [], "thought": [], "tool_call": []}
+                for event in parser.feed(str(completion)):
+                    tags.setdefault(event.tag, []).append(event.content)
+                if not tags["response"]:
+                    # A completion cut off by the token limit inside <response> still answers
+                    tags["response"] = [e.content for e in parser.unterminated() if e.tag == "response"]
+                if tags["response"]:
+                    return tags["response"][0]
 
                 update_chat_history(chat_history, completion, "assistant")
 
-                print(Fore.MAGENTA + f"\nThought: {thought.content[0]}")
+                if tags["thought"]:
+                    self.log(Fore.MAGENTA + f"\nThought: {tags['thought'][0]}")
 
-                if tool_calls.found:
-                    observations = self.process_tool_calls(tool_calls.content)
-                    print(Fore.BLUE + f"\nObservations: {observations}")
+                if tags["tool_call"]:
+                    observations = self.process_tool_calls(tags["tool_call"])
+                    self.log(Fore.BLUE + f"\nObservations: {observations}")
                     update_chat_history(chat_history, f"{observations}", "user")
 
-        return completions_create(self.client, chat_history, self.model)
\ No newline at end of file
+        return completions_create(self.client, chat_history, self.model)
+
+    async def arun(
+        self,
+        user_msg: str,
+        max_rounds: int = 10,
+        on_response_token=None,
+        chat_history: TokenBudgetChatHistory | None = None,
+        llm_limit: asyncio.Semaphore | None = None,
+        tool_limit: asyncio.Semaphore | None = None,
+        metrics=None,
+    ) -> str:
+        """
+        Async, streaming version of run. The completion is parsed while it is generated: each
+        tool call starts running as soon as its closing </tool_call> tag arrives, while the model
+        is still writing, and the final <response> is passed to `on_response_token` piece by piece.
+
+        Args:
+            user_msg (str): The user's input message to start the interaction.
+            max_rounds (int, optional): Maximum number of interaction rounds the agent should perform. Default is 10.
+            on_response_token (Callable, optional): Called with each piece of the final response.
+                By default the pieces are printed as they arrive.
+            chat_history (TokenBudgetChatHistory, optional): A conversation to continue (see
+                new_chat_history); the question and the agent's turns are added to it.
+            llm_limit (asyncio.Semaphore, optional): Bounds the completions running at the same
+                time, e.g. across the sessions of a server.
+            tool_limit (asyncio.Semaphore, optional): Bounds the tool calls running at the same time.
+                By default each run allows `max_concurrency` calls.
+            metrics (optional): Object whose add(kind, seconds) method receives the time spent in
+                each completion ('llm') and each tool call ('tool').
+
+        Returns:
+            str: The final response generated by the agent after processing user input and any tool calls.
+        """
+        if on_response_token is None:
+            def on_response_token(token):
+                print(token, end="", flush=True)
+
+        if chat_history is None:
+            chat_history = self.start_chat_history(user_msg)
+        else:
+            chat_history.append(build_prompt_structure(prompt=user_msg, role="user", tag="question"))
+        llm_limit = llm_limit or contextlib.nullcontext()
+        tool_limit = tool_limit or asyncio.Semaphore(self.max_concurrency)
+
+        if not self.tools:
+            return await self._stream_response(chat_history, on_response_token, llm_limit, metrics)
+
+        async def run_tool(tool, call):
+            async with tool_limit:
+                started = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.to_thread(tool.run, **call["arguments"]), self.timeout_for(tool)
+                    )
+                except asyncio.TimeoutError:
+                    return self.timeout_result(tool, f"Timed out after {self.timeout_for(tool)} seconds")
+                finally:
+                    if metrics is not None:
+                        metrics.add("tool", time.perf_counter() - started)
+
+        # Run the ReAct loop for max_rounds
+        for _ in range(max_rounds):
+            parser = StreamingTagParser(stream_tags=("response",))
+            running = []
+            response = None
+            try:
+                async with llm_limit:
+                    started = time.perf_counter()
+                    async for chunk in completions_stream(self.async_client, chat_history, self.model):
+                        for event in parser.feed(chunk):
+                            if event.tag == "response":
+                                if event.done:
+                                    response = event.content
+                                else:
+                                    on_response_token(event.content)
+                            elif event.tag == "thought" and event.done:
+                                self.log(Fore.MAGENTA + f"\nThought: {event.content}")
+                            elif event.tag == "tool_call" and event.done:
+                                tool, call = self.validate_tool_call(event.content)
+                                running.append((call, asyncio.create_task(run_tool(tool, call))))
+                    if metrics is not None:
+                        metrics.add("llm", time.perf_counter() - started)
+            except BaseException:
+                # The stream failed midway: the tool calls it started are not left running
+                await cancel_tasks(task for _, task in running)
+                raise
+
+            if response is None:
+                # A completion cut off by the token limit inside <response> still answers
+                response = next((e.content for e in parser.unterminated() if e.tag == "response"), None)
+
+            if response is not None:
+                await cancel_tasks(task for _, task in running)
+                update_chat_history(chat_history, parser.text, "assistant")
+                return response
+
+            update_chat_history(chat_history, parser.text, "assistant")
+
+            if running:
+                observations = {}
+                try:
+                    for call, task in running:
+                        observations[call["id"]] = await task
+                except BaseException:
+                    # A tool raised (re-raised as in run) or the run was cancelled: the other
+                    # tool calls of the round are not left running
+                    await cancel_tasks(task for _, task in running)
+                    raise
+                self.log(Fore.BLUE + f"\nObservations: {observations}")
+                update_chat_history(chat_history, f"{observations}", "user")
+
+        return await self._stream_response(chat_history, on_response_token, llm_limit, metrics)
+
+    async def _stream_response(self, chat_history: list, on_response_token, llm_limit, metrics) -> str:
+        """
+        Streams a completion with no tool handling, passing every piece to `on_response_token`.
+        """
+        pieces = []
+        async with llm_limit:
+            started = time.perf_counter()
+            async for chunk in completions_stream(self.async_client, chat_history, self.model):
+                on_response_token(chunk)
+                pieces.append(chunk)
+            if metrics is not None:
+                metrics.add("llm", time.perf_counter() - started)
+        update_chat_history(chat_history, "".join(pieces), "assistant")
+        return "".join(pieces)
@@ -0,0 +1,97 @@
+"""
+Benchmark of the tag extraction of the agent loop.
+
+Compares, on synthetic completions of growing size, the previous extraction
+(one dynamic regex scan of the whole text per tag: response, thought and
+tool_call) with the single-pass tokenizer of utils/extraction.py, both on the
+whole text and fed in small chunks as a streamed completion would arrive:
+
+    python benchmarks/extraction_benchmark.py
+    python benchmarks/extraction_benchmark.py --sizes 1000 100000 --repeat 20
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.extraction import StreamingTagParser
+from utils.extraction import extract_tags
+
+TAGS = ["response", "thought", "tool_call"]
+
+# Characters per chunk when simulating a streamed completion (a few tokens)
+CHUNK_SIZE = 16
+
+
+def synthetic_completion(size: int) -> str:
+    """
+    A completion of about `size` characters: a long thought with some markup-like
+    noise, followed by tool calls.
+    """
+    call = '<tool_call>{"name": "get_historic_data", "arguments": {"moneda": "solana", "fecha": "Jan 12, 2024"}, "id": %d}</tool_call>\n'
+    calls = "".join(call % i for i in range(5))
+    filler = "The price moved from $189.76 to $203.15 (< 8%) while the market cap <held> steady. "
+    thought = (filler * (max(size - len(calls), 0) // len(filler) + 1))[: max(size - len(calls), 0)]
+    return f"<thought>{thought}</thought>\n{calls}"
+
+
+def regex_extraction(text: str) -> dict:
+    """
+    The extraction the agent used before: a regex built per tag, three scans.
+    """
+    result = {}
+    for tag in TAGS:
+        matched = re.findall(rf"<{tag}>(.*?)</{tag}>", text, re.DOTALL)
+        result[tag] = [content.strip() for content in matched]
+    return result
+
+
+def tokenizer_extraction(text: str) -> dict:
+    tags = extract_tags(text, TAGS)
+    return {tag: tags[tag].content for tag in TAGS}
+
+
+def streamed_extraction(text: str) -> dict:
+    parser = StreamingTagParser()
+    result = {tag: [] for tag in TAGS}
+    for i in range(0, len(text), CHUNK_SIZE):
+        for event in parser.feed(text[i:i + CHUNK_SIZE]):
+            if event.done and event.tag in result:
+                result[event.tag].append(event.content)
+    return result
+
+
+def timed(fn, text: str, repeat: int) -> float:
+    """Median seconds of `repeat` runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the tag extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="Sizes of the completions, in characters")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'regex x3':>12} {'tokenizer':>12} {'streamed':>12}")
+    for size in args.sizes:
+        text = synthetic_completion(size)
+        expected = regex_extraction(text)
+        assert tokenizer_extraction(text) == expected
+        assert streamed_extraction(text) == expected
+        row = [timed(fn, text, args.repeat) for fn in (regex_extraction, tokenizer_extraction, streamed_extraction)]
+        print(f"{size:>10} " + " ".join(f"{seconds * 1e3:>10.3f}ms" for seconds in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Regression benchmark of the system prompt across runs of one agent.
+
+Runs a long-lived ReactAgent many times against a canned model reply (no
+call to Groq) and checks that the system prompt sent to the model, and the
+time per run, stay flat instead of growing with every run:
+
+    python benchmarks/prompt_benchmark.py
+    python benchmarks/prompt_benchmark.py --runs 5000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The client is built but never used, the completions are canned
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import agent as agent_module
+from agent import ReactAgent
+from tool import tool
+from utils.completions import count_tokens
+
+# Runs at which the prompt size and the time per run are reported
+CHECKPOINTS = [1, 10, 100, 1000]
+
+
+@tool
+def get_actual_data(moneda: str) -> dict:
+    return {"Precio": "$96,065.33"}
+
+
+@tool
+def get_historic_data(moneda: str, fecha: str) -> dict:
+    return {"Apertura": "$189.76", "Alza": "$203.15", "Baja": "$188.48", "MarketCap": "$93,740,476,812"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regression benchmark of the system prompt size")
+    parser.add_argument("--runs", type=int, default=1000, help="Runs of the same agent")
+    args = parser.parse_args()
+
+    sent = []
+
+    def completions_create(client, messages, model):
+        sent.append(messages[0]["content"])
+        return "<response>The current price of Solana is $96,065.33</response>"
+
+    agent_module.completions_create = completions_create
+    agent = ReactAgent(tools=[get_actual_data, get_historic_data])
+
+    checkpoints = sorted({n for n in CHECKPOINTS if n <= args.runs} | {args.runs})
+    print(f"{'run':>6} {'prompt chars':>13} {'prompt tokens':>14} {'ms/run':>8}")
+    start = time.perf_counter()
+    last, last_time = 0, start
+    for run in range(1, args.runs + 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.run("What is the current price of Solana?")
+        if run in checkpoints:
+            now = time.perf_counter()
+            ms = (now - last_time) * 1e3 / (run - last)
+            print(f"{run:>6} {len(sent[-1]):>13} {count_tokens(sent[-1]):>14} {ms:>8.3f}")
+            last, last_time = run, now
+
+    if len(set(sent)) != 1:
+        sys.exit(f"The system prompt changed across runs: {len(sent[0])} -> {len(sent[-1])} chars")
+    print(f"The system prompt stayed at {len(sent[0])} chars over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
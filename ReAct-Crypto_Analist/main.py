@@ -1,84 +1,109 @@
+from tool import CACHE_FOREVER
 from tool import tool
 from agent import ReactAgent
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from quotes import FECHA_FORMAT
+from quotes import QuoteError
+from quotes import format_usd
+from quotes import parse_fecha
+from quotes import quote_provider_from_env
+from utils.browser import BrowserPool
+from datetime import datetime
+from datetime import timezone
+import asyncio
 import math
+import os
 
 
-@tool
-def get_actual_data(moneda: str) -> dict:
-    
+# Sesiones de Chrome reutilizadas por todas las llamadas a los scrapers
+BROWSER_POOL = BrowserPool(
+    size=int(os.environ.get("BROWSER_POOL_SIZE", 2)),
+    max_uses=int(os.environ.get("BROWSER_MAX_USES", 50)),
+)
 
-    class Scraper:
-        def __init__(self, moneda: str):
-            self.moneda = moneda
-            self.url = f"https://coinmarketcap.com/es/currencies/{self.moneda}/"
-            self.options = webdriver.ChromeOptions()
-            self.options.add_argument("--headless")
-        
-        def run(self) -> str:
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=self.options
-            )
-            driver.get(self.url)
-            try:
-                # Se busca el elemento que contiene el precio
-                span = driver.find_element(By.CLASS_NAME, "sc-65e7f566-0.WXGwg.base-text")
-                resultado = span.text
-            except Exception as e:
-                resultado = f"Error: {e}"
-            driver.quit()
-            return resultado
-
-    resultado = Scraper(moneda).run()
-    if resultado.startswith("Error:"):
-        return {"error": resultado}
-    return {"Precio": resultado}
 
+# API JSON primero y, si falla, el scraping con Selenium (QUOTE_BACKEND=selenium para solo el navegador),
+# con los días ya consultados guardados en la caché local
+QUOTE_PROVIDER = quote_provider_from_env(BROWSER_POOL)
 
-@tool
+# Máximo de días que puede pedir get_historic_range en una llamada
+MAX_RANGE_DAYS = 366
+
+# Segundos que el agente espera a una herramienta de cotizaciones antes de darla por perdida
+QUOTE_TOOL_TIMEOUT = float(os.environ.get("QUOTE_TOOL_TIMEOUT", 60))
+
+# Segundos que se reutiliza un precio actual; los datos históricos no cambian y no caducan
+PRICE_CACHE_TTL = float(os.environ.get("PRICE_CACHE_TTL", 30))
+
+
+def fecha_iso(fecha: str) -> str:
+    """
+    Devuelve la fecha en formato ISO ('Jan 12, 2024' y '2024-01-12' dan '2024-01-12'), o la
+    cadena tal cual si no es una fecha.
+    """
+    try:
+        return parse_fecha(fecha).date().isoformat()
+    except QuoteError:
+        return fecha
+
+
+def historic_cache_key(argumentos: dict) -> dict:
+    """
+    Clave de caché de las herramientas históricas: las fechas en formato ISO, para que
+    las dos formas de escribir un día compartan el resultado.
+    """
+    return {nombre: fecha_iso(valor) if nombre in ("fecha", "desde", "hasta") else valor
+            for nombre, valor in argumentos.items()}
+
+
+def historic_cache_ttl(argumentos: dict) -> float | None:
+    """
+    Los días cerrados no cambian y no caducan; un resultado que incluye hoy (o una fecha
+    posterior) todavía puede cambiar, así que se guarda como un precio actual.
+    """
+    hoy = datetime.now(timezone.utc).date().isoformat()
+    fechas = [valor for nombre, valor in historic_cache_key(argumentos).items() if nombre in ("fecha", "desde", "hasta")]
+    return PRICE_CACHE_TTL if any(fecha >= hoy for fecha in fechas) else CACHE_FOREVER
+
+
+@tool(timeout=QUOTE_TOOL_TIMEOUT, cache_ttl=PRICE_CACHE_TTL)
+def get_actual_data(moneda: str) -> dict:
+    try:
+        precio = QUOTE_PROVIDER.price(moneda)
+    except QuoteError as e:
+        return {"error": f"Error: {e}"}
+    return {"Precio": format_usd(precio)}
+
+
+@tool(timeout=QUOTE_TOOL_TIMEOUT, cache_ttl=historic_cache_ttl, cache_key=historic_cache_key)
 def get_historic_data(moneda: str, fecha: str) -> dict:
-    
-    class Scraper:
-        def __init__(self, moneda: str, fecha: str):
-            self.moneda = moneda
-            self.fecha = fecha
-            self.url = f"https://coinmarketcap.com/es/currencies/{self.moneda}/historical-data/"
-            self.options = webdriver.ChromeOptions()
-            self.options.add_argument("--headless")
-        
-        def run(self) -> dict:
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=self.options
-            )
-            driver.get(self.url)
-            wait = WebDriverWait(driver, 10)
-            try:
-                # Se localiza la fila que contiene la fecha indicada
-                fila = wait.until(
-                    EC.visibility_of_element_located(
-                        (By.XPATH, f"//tbody/tr[td[normalize-space(text())='{self.fecha}']]")
-                    )
-                )
-                columnas = fila.find_elements(By.TAG_NAME, "td")
-                resultado = {
-                    "Apertura": columnas[1].text,
-                    "Alza": columnas[2].text,
-                    "Baja": columnas[3].text,
-                    "MarketCap": columnas[6].text
-                }
-            except Exception as e:
-                resultado = {"error": str(e)}
-            driver.quit()
-            return resultado
-
-    return Scraper(moneda, fecha).run()
+    try:
+        return QUOTE_PROVIDER.day(moneda, fecha).as_tool_result()
+    except QuoteError as e:
+        return {"error": str(e)}
+
+
+@tool(timeout=QUOTE_TOOL_TIMEOUT, cache_ttl=historic_cache_ttl, cache_key=historic_cache_key)
+def get_historic_range(moneda: str, desde: str, hasta: str) -> dict:
+    """
+    Recibe los siguientes parámetros:
+      - moneda: str (ej. "ethereum")
+      - desde: primer día del rango (ej. "Jan 01, 2024")
+      - hasta: último día del rango (ej. "Jan 31, 2024")
+
+    Retorna un diccionario que asocia cada fecha ('Jan 01, 2024') con su Apertura,
+    Alza, Baja y MarketCap, obtenido con una sola consulta en lugar de una por día.
+    """
+    try:
+        inicio, fin = parse_fecha(desde).date(), parse_fecha(hasta).date()
+        if fin < inicio:
+            inicio, fin = fin, inicio
+        if (fin - inicio).days >= MAX_RANGE_DAYS:
+            return {"error": f"El rango no puede superar {MAX_RANGE_DAYS} días"}
+        cotizaciones = QUOTE_PROVIDER.history(moneda, inicio, fin)
+    except QuoteError as e:
+        return {"error": str(e)}
+    return {parse_fecha(q.date).strftime(FECHA_FORMAT): q.as_tool_result() for q in cotizaciones}
+
 
 @tool
 def indicators_tool(moneda: str, fecha: str, Apertura: str, Alza: str, Baja: str, MarketCap: str):
@@ -132,10 +157,17 @@ def indicators_tool(moneda: str, fecha: str, Apertura: str, Alza: str, Baja: str
 
 agent = ReactAgent(
     model="llama-3.3-70b-versatile",
-    tools=[get_historic_data, get_actual_data, indicators_tool]
+    tools=[get_historic_data, get_historic_range, get_actual_data, indicators_tool],
+    max_concurrency=int(os.environ.get("TOOL_CONCURRENCY", 4)),
+    max_history_tokens=int(os.environ.get("MAX_HISTORY_TOKENS", 6000)),
 )
 
 if __name__ == "__main__":
     user_msg = input("¿Qué necesitas? ")
-    output = agent.run(user_msg)
-    print(output)
+    if os.environ.get("STREAMING", "1") == "1":
+        # La respuesta se imprime a medida que el modelo la genera
+        asyncio.run(agent.arun(user_msg))
+        print()
+    else:
+        output = agent.run(user_msg)
+        print(output)
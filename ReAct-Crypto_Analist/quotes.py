@@ -0,0 +1,564 @@
+import json
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import requests
+
+# Base de la API JSON que alimenta las páginas de CoinMarketCap; se puede apuntar a un
+# servidor local (ver QuoteServer) con la variable de entorno CMC_API_URL
+CMC_API_URL = os.environ.get("CMC_API_URL", "https://api.coinmarketcap.com/data-api")
+
+# Id de CoinMarketCap del dólar, moneda en la que se piden las cotizaciones
+USD_CONVERT_ID = 2781
+
+# Formato de fecha que usan las herramientas y la tabla histórica ("Jan 12, 2024")
+FECHA_FORMAT = "%b %d, %Y"
+
+# Directorio de la caché local de cotizaciones diarias, un archivo JSON por moneda
+QUOTE_CACHE_DIR = os.environ.get(
+    "QUOTE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "quotes")
+)
+
+# Días pedidos a cada lado de una fecha que no está en caché, para que las
+# siguientes consultas de fechas cercanas no necesiten red
+HISTORY_WINDOW_DAYS = 30
+
+
+class QuoteError(Exception):
+    """
+    Raised when a provider cannot return the requested quote.
+    """
+
+
+@dataclass
+class DailyQuote:
+    """
+    One day of market data of a coin, in dollars.
+
+    Attributes:
+        date (str): The day, in ISO format (YYYY-MM-DD).
+        open (float): Opening price.
+        high (float): Highest price of the day.
+        low (float): Lowest price of the day.
+        close (float): Closing price.
+        volume (float): Traded volume.
+        market_cap (float): Market capitalization at the close.
+    """
+
+    date: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    market_cap: float
+
+    def as_tool_result(self) -> dict:
+        """
+        Formats the quote as the get_historic_data tool has always returned it.
+        """
+        return {
+            "Apertura": format_usd(self.open),
+            "Alza": format_usd(self.high),
+            "Baja": format_usd(self.low),
+            "MarketCap": format_usd(self.market_cap, decimals=0),
+        }
+
+
+def format_usd(value: float, decimals: int = 2) -> str:
+    """
+    Formats a dollar amount like the CoinMarketCap pages do ('$96,065.33'). Prices under
+    one dollar keep four significant digits.
+    """
+    if decimals and 0 < abs(value) < 1:
+        decimals = max(decimals, 3 - math.floor(math.log10(abs(value))))
+    return f"${value:,.{decimals}f}"
+
+
+def parse_usd(text: str) -> float:
+    """
+    Parses a dollar amount as shown on the CoinMarketCap pages ('$96,065.33').
+    """
+    return float(text.strip().replace("$", "").replace(",", ""))
+
+
+def parse_fecha(fecha: str) -> datetime:
+    """
+    Parses a date in the tools format ('Jan 12, 2024') or in ISO format ('2024-01-12').
+    """
+    for fmt in (FECHA_FORMAT, "%Y-%m-%d"):
+        try:
+            return datetime.strptime(fecha.strip(), fmt)
+        except ValueError:
+            pass
+    raise QuoteError(f"Fecha no reconocida: {fecha!r}, usa el formato 'Jan 12, 2024'")
+
+
+class QuoteProvider:
+    """
+    Source of crypto quotes used by the tools. Subclasses implement both methods and
+    raise QuoteError when the data is not available.
+    """
+
+    def price(self, coin: str) -> float:
+        """
+        Returns the current price of a coin in dollars.
+
+        Args:
+            coin (str): CoinMarketCap slug of the coin (e.g. 'solana').
+        """
+        raise NotImplementedError
+
+    def history(self, coin: str, start: date, end: date) -> list[DailyQuote]:
+        """
+        Returns the daily market data of a coin for a range of days, in one request.
+        Days without data are left out, and providers may return days outside the
+        range when they come at no extra cost.
+
+        Args:
+            coin (str): CoinMarketCap slug of the coin (e.g. 'solana').
+            start (date): First day of the range.
+            end (date): Last day of the range.
+        """
+        raise NotImplementedError
+
+    def day(self, coin: str, fecha: str) -> DailyQuote:
+        """
+        Returns the market data of a coin for one day.
+
+        Args:
+            coin (str): CoinMarketCap slug of the coin (e.g. 'solana').
+            fecha (str): The day, formatted as 'Jan 12, 2024'.
+        """
+        day = parse_fecha(fecha).date()
+        for quote in self.history(coin, day, day):
+            if quote.date == day.isoformat():
+                return quote
+        raise QuoteError(f"Sin datos de {coin} para {fecha}")
+
+
+class HttpQuoteProvider(QuoteProvider):
+    """
+    Reads quotes from the JSON API behind the CoinMarketCap pages over a pooled HTTP
+    session, with no browser involved.
+
+    Attributes:
+        base_url (str): Base URL of the API.
+        timeout (float): Seconds to wait for each response.
+        session (requests.Session): Session whose connections are reused between calls.
+    """
+
+    def __init__(self, base_url: str = CMC_API_URL, timeout: float = 10, session: requests.Session | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", "Mozilla/5.0")
+        self._ids = {}
+
+    def _get(self, path: str, params: dict) -> dict:
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise QuoteError(str(e)) from e
+        if response.status_code != 200:
+            raise QuoteError(f"{response.status_code} - {response.text[:200]}")
+        try:
+            data = json.loads(response.content).get("data")
+        except ValueError as e:
+            raise QuoteError(f"Respuesta no válida: {e}") from e
+        if not data:
+            raise QuoteError(f"Sin datos para {params}")
+        return data
+
+    def _detail(self, coin: str) -> dict:
+        detail = self._get("/v3/cryptocurrency/detail", {"slug": coin})
+        self._ids[coin] = detail["id"]
+        return detail
+
+    def coin_id(self, coin: str) -> int:
+        """
+        Returns the CoinMarketCap id of a coin, looked up once per slug.
+        """
+        if coin not in self._ids:
+            self._detail(coin)
+        return self._ids[coin]
+
+    def price(self, coin: str) -> float:
+        try:
+            return float(self._detail(coin)["statistics"]["price"])
+        except (KeyError, TypeError) as e:
+            raise QuoteError(f"Sin precio para {coin}") from e
+
+    def history(self, coin: str, start: date, end: date) -> list[DailyQuote]:
+        time_start = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+        time_end = datetime(end.year, end.month, end.day, tzinfo=timezone.utc) + timedelta(days=1)
+        data = self._get(
+            "/v3/cryptocurrency/historical",
+            {
+                "id": self.coin_id(coin),
+                "convertId": USD_CONVERT_ID,
+                "timeStart": int(time_start.timestamp()),
+                "timeEnd": int(time_end.timestamp()),
+            },
+        )
+        quotes = [_daily_quote(row) for row in data.get("quotes", [])]
+        return [q for q in quotes if start.isoformat() <= q.date <= end.isoformat()]
+
+
+def _daily_quote(row: dict) -> DailyQuote:
+    quote = row["quote"]
+    return DailyQuote(
+        date=row["timeOpen"][:10],
+        open=float(quote["open"]),
+        high=float(quote["high"]),
+        low=float(quote["low"]),
+        close=float(quote["close"]),
+        volume=float(quote["volume"]),
+        market_cap=float(quote["marketCap"]),
+    )
+
+
+class SeleniumQuoteProvider(QuoteProvider):
+    """
+    Scrapes the quotes from the CoinMarketCap pages with browser sessions from a
+    BrowserPool. Slower and tied to the page layout, kept as a fallback.
+
+    Attributes:
+        pool (BrowserPool): Pool the browser sessions are borrowed from.
+        wait_seconds (float): Seconds to wait for the historical table to render.
+    """
+
+    PRICE_CLASS = "sc-65e7f566-0.WXGwg.base-text"
+
+    def __init__(self, pool, wait_seconds: float = 10):
+        self.pool = pool
+        self.wait_seconds = wait_seconds
+
+    def price(self, coin: str) -> float:
+        from selenium.webdriver.common.by import By
+
+        # Un error de la página (elemento ausente) no rompe el navegador: se guarda y se
+        # lanza al salir del bloque, para que la sesión vuelva al pool en lugar de cerrarse
+        error = None
+        with self.pool.session() as driver:
+            driver.get(f"https://coinmarketcap.com/es/currencies/{coin}/")
+            try:
+                # Se busca el elemento que contiene el precio
+                text = driver.find_element(By.CLASS_NAME, self.PRICE_CLASS).text
+            except Exception as e:
+                error = e
+        if error is not None:
+            raise QuoteError(str(error)) from error
+        try:
+            return parse_usd(text)
+        except ValueError as e:
+            raise QuoteError(f"Precio no reconocido: {text!r}") from e
+
+    def history(self, coin: str, start: date, end: date) -> list[DailyQuote]:
+        """
+        Loads the historical-data page once and parses every row of its table, so all
+        the visible days come back, not only the requested range.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # Como en price, el error de la página se lanza fuera del bloque para conservar la sesión
+        error = None
+        with self.pool.session() as driver:
+            driver.get(f"https://coinmarketcap.com/es/currencies/{coin}/historical-data/")
+            try:
+                # Se espera a que la tabla tenga al menos una fila
+                WebDriverWait(driver, self.wait_seconds).until(
+                    EC.visibility_of_element_located((By.XPATH, "//tbody/tr"))
+                )
+                filas = driver.find_elements(By.XPATH, "//tbody/tr")
+                columnas = [[td.text for td in fila.find_elements(By.TAG_NAME, "td")] for fila in filas]
+            except Exception as e:
+                error = e
+        if error is not None:
+            raise QuoteError(str(error)) from error
+
+        quotes = []
+        for fila in columnas:
+            try:
+                quotes.append(DailyQuote(
+                    date=parse_fecha(fila[0]).date().isoformat(),
+                    open=parse_usd(fila[1]),
+                    high=parse_usd(fila[2]),
+                    low=parse_usd(fila[3]),
+                    close=parse_usd(fila[4]),
+                    volume=parse_usd(fila[5]),
+                    market_cap=parse_usd(fila[6]),
+                ))
+            except (IndexError, ValueError, QuoteError):
+                # Filas de carga o de otro formato
+                continue
+        if not quotes:
+            raise QuoteError(f"Sin filas en la tabla histórica de {coin}")
+        return quotes
+
+
+class FallbackQuoteProvider(QuoteProvider):
+    """
+    Asks each provider in turn and returns the first answer.
+
+    Attributes:
+        providers (list[QuoteProvider]): Providers, fastest first.
+    """
+
+    def __init__(self, providers: list[QuoteProvider]):
+        self.providers = providers
+
+    def _first(self, method: str, *args):
+        errors = []
+        for provider in self.providers:
+            try:
+                return getattr(provider, method)(*args)
+            except QuoteError as e:
+                errors.append(f"{type(provider).__name__}: {e}")
+        raise QuoteError("; ".join(errors))
+
+    def price(self, coin: str) -> float:
+        return self._first("price", coin)
+
+    def history(self, coin: str, start: date, end: date) -> list[DailyQuote]:
+        return self._first("history", coin, start, end)
+
+
+class CachedQuoteProvider(QuoteProvider):
+    """
+    Keeps every day fetched through a provider in a local per-coin cache keyed by date,
+    so repeated lookups are dictionary hits with no request at all. A miss fetches
+    HISTORY_WINDOW_DAYS around the requested day in one range request. The cache is
+    saved as one JSON file per coin; days that are not closed yet (today) are never
+    cached.
+
+    The lock is only held to look up and store days, never during a request. Misses of
+    the same coin that arrive while one of its requests is in flight wait for it instead
+    of sending their own, and only fetch if the days they need are still missing.
+
+    Attributes:
+        provider (QuoteProvider): Provider the missing days are fetched from.
+        cache_dir (str | None): Directory of the cache files (None keeps it in memory).
+        window_days (int): Days fetched on each side of a missing day.
+    """
+
+    def __init__(self, provider: QuoteProvider, cache_dir: str | None = QUOTE_CACHE_DIR,
+                 window_days: int = HISTORY_WINDOW_DAYS):
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self.window_days = window_days
+        self._days = {}
+        self._lock = threading.Lock()
+        # Petición en curso por moneda: Future con las cotizaciones que devuelve
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, coin: str) -> str:
+        return os.path.join(self.cache_dir, f"{coin}.json")
+
+    def _coin_days(self, coin: str) -> dict:
+        if coin not in self._days:
+            days = {}
+            if self.cache_dir and os.path.exists(self._path(coin)):
+                with open(self._path(coin)) as f:
+                    days = {d: DailyQuote(date=d, **fields) for d, fields in json.load(f).items()}
+            self._days[coin] = days
+        return self._days[coin]
+
+    def _store(self, coin: str, quotes: list[DailyQuote]):
+        today = datetime.now(timezone.utc).date().isoformat()
+        days = self._coin_days(coin)
+        closed = [q for q in quotes if q.date < today]
+        days.update((q.date, q) for q in closed)
+        if not closed or not self.cache_dir:
+            return
+        # Se escribe en un archivo temporal y se reemplaza, para no dejar la caché a medias
+        os.makedirs(self.cache_dir, exist_ok=True)
+        payload = {d: {k: v for k, v in vars(q).items() if k != "date"} for d, q in sorted(days.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._path(coin))
+
+    def price(self, coin: str) -> float:
+        return self.provider.price(coin)
+
+    def history(self, coin: str, start: date, end: date) -> list[DailyQuote]:
+        wanted = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+        # Días recibidos que no se guardan en caché (hoy), de esta petición o de la que se esperó
+        fetched = {}
+        while True:
+            with self._lock:
+                days = self._coin_days(coin)
+                missing = [d for d in wanted if d not in days and d not in fetched]
+                if not missing:
+                    self.hits += 1
+                    return [days.get(d) or fetched[d] for d in wanted if d in days or d in fetched]
+                flight = self._in_flight.get(coin)
+                if flight is None:
+                    flight = self._in_flight[coin] = Future()
+                    self.misses += 1
+                    break
+            # Otra consulta ya está pidiendo días de esta moneda: se espera y se vuelve a mirar
+            fetched.update((q.date, q) for q in flight.result())
+
+        try:
+            quotes = self.provider.history(coin, date.fromisoformat(missing[0]), date.fromisoformat(missing[-1]))
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[coin]
+            flight.set_exception(e)
+            raise
+        fetched.update((q.date, q) for q in quotes)
+        with self._lock:
+            self._store(coin, quotes)
+            del self._in_flight[coin]
+            days = self._coin_days(coin)
+            result = [days.get(d) or fetched[d] for d in wanted if d in days or d in fetched]
+        flight.set_result(quotes)
+        return result
+
+    def day(self, coin: str, fecha: str) -> DailyQuote:
+        day = parse_fecha(fecha).date()
+        with self._lock:
+            quote = self._coin_days(coin).get(day.isoformat())
+            if quote is not None:
+                self.hits += 1
+                return quote
+        window = timedelta(days=self.window_days)
+        today = datetime.now(timezone.utc).date()
+        for quote in self.history(coin, day - window, max(min(day + window, today), day)):
+            if quote.date == day.isoformat():
+                return quote
+        raise QuoteError(f"Sin datos de {coin} para {fecha}")
+
+
+def quote_provider_from_env(pool=None) -> QuoteProvider:
+    """
+    Builds the provider selected by the QUOTE_BACKEND environment variable: 'http'
+    (the JSON API, falling back to the browser when a pool is given, the default) or
+    'selenium' (browser only), behind the local daily-quote cache.
+
+    Args:
+        pool (BrowserPool | None): Pool for the Selenium backend.
+    """
+    backend = os.environ.get("QUOTE_BACKEND", "http")
+    if backend == "selenium":
+        provider = SeleniumQuoteProvider(pool)
+    elif backend == "http":
+        http = HttpQuoteProvider()
+        provider = FallbackQuoteProvider([http, SeleniumQuoteProvider(pool)]) if pool is not None else http
+    else:
+        raise ValueError(f"QUOTE_BACKEND desconocido: {backend}")
+    return CachedQuoteProvider(provider)
+
+
+class QuoteServer:
+    """
+    Local stand-in for the quotes API, serving made-up but consistent data, to test the
+    tools without network. Point the HTTP provider at it with
+    HttpQuoteProvider(base_url=server.url) or CMC_API_URL=server.url. Usable as a
+    context manager that starts and stops the server thread.
+
+    Attributes:
+        prices (dict): Current price per coin slug; unknown coins get 404.
+    """
+
+    def __init__(self, prices: dict | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.prices = prices or {"bitcoin": 96065.33, "ethereum": 2650.12, "solana": 189.76}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                status, payload = server.handle(parts.path.rstrip("/"), params)
+                content = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def coin_ids(self) -> dict:
+        return {coin: index + 1 for index, coin in enumerate(self.prices)}
+
+    def daily_quote(self, coin: str, day: date) -> dict:
+        """
+        Deterministic row of the historical endpoint for a coin and a day.
+        """
+        base = self.prices[coin] * (1 + 0.1 * math.sin(day.toordinal() / 7))
+        open_, close = base, base * (1 + 0.02 * math.sin(day.toordinal()))
+        high, low = max(open_, close) * 1.03, min(open_, close) * 0.97
+        return {
+            "timeOpen": day.strftime("%Y-%m-%dT00:00:00.000Z"),
+            "quote": {
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": base * 1e6,
+                "marketCap": close * 1e8,
+            },
+        }
+
+    def handle(self, path: str, params: dict) -> tuple:
+        ids = self.coin_ids()
+        if path.endswith("/v3/cryptocurrency/detail"):
+            coin = params.get("slug")
+            if coin not in self.prices:
+                return 404, {"data": None, "status": {"error_message": "Not found"}}
+            return 200, {"data": {"id": ids[coin], "slug": coin, "statistics": {"price": self.prices[coin]}}}
+        if path.endswith("/v3/cryptocurrency/historical"):
+            coins = {index: coin for coin, index in ids.items()}
+            coin = coins.get(int(params.get("id", 0)))
+            if coin is None:
+                return 404, {"data": None, "status": {"error_message": "Not found"}}
+            start = datetime.fromtimestamp(int(params["timeStart"]), timezone.utc).date()
+            end = datetime.fromtimestamp(int(params["timeEnd"]), timezone.utc).date()
+            days = [start + timedelta(days=n) for n in range((end - start).days)]
+            return 200, {"data": {"id": ids[coin], "quotes": [self.daily_quote(coin, d) for d in days]}}
+        return 404, {"data": None, "status": {"error_message": f"Unknown path {path}"}}
+
+    def start(self) -> "QuoteServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
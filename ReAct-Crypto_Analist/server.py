@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from types import SimpleNamespace
+
+
+# Monedas que reconoce el modelo de prueba en las preguntas
+STAND_IN_COINS = ("bitcoin", "ethereum", "solana")
+
+
+@dataclass
+class SessionMetrics:
+    """
+    Latency metrics of one session.
+
+    Attributes:
+        latencies (list[float]): Seconds taken by each message, from arrival to response.
+        llm_seconds (float): Time spent streaming completions.
+        tool_seconds (float): Time spent running tools.
+        llm_calls (int): Number of completions.
+        tool_calls (int): Number of tool calls.
+    """
+
+    latencies: list = field(default_factory=list)
+    llm_seconds: float = 0.0
+    tool_seconds: float = 0.0
+    llm_calls: int = 0
+    tool_calls: int = 0
+
+    def add(self, kind: str, seconds: float):
+        """
+        Records the time of one completion ('llm') or one tool call ('tool').
+        """
+        if kind == "llm":
+            self.llm_seconds += seconds
+            self.llm_calls += 1
+        elif kind == "tool":
+            self.tool_seconds += seconds
+            self.tool_calls += 1
+
+    def summary(self) -> dict:
+        return {
+            "messages": len(self.latencies),
+            **latency_summary(self.latencies),
+            "llm_seconds": round(self.llm_seconds, 4),
+            "tool_seconds": round(self.tool_seconds, 4),
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+        }
+
+
+def latency_summary(latencies: list) -> dict:
+    """
+    Returns the mean, median and 95th percentile of a list of latencies, in seconds.
+    """
+    if not latencies:
+        return {"mean": None, "p50": None, "p95": None}
+    ordered = sorted(latencies)
+    return {
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+    }
+
+
+@dataclass
+class Session:
+    """
+    A user's conversation: its chat history, its metrics, and a lock so its messages are
+    answered one after another.
+    """
+
+    history: list
+    metrics: SessionMetrics = field(default_factory=SessionMetrics)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class AgentServer:
+    """
+    Serves many user sessions at once with one ReactAgent. The agent holds the shared Groq
+    client, and each session has its own chat history.
+
+    The completions and the tool calls of all the sessions share two limits. These bound
+    the load on the model's API and on the scrapers, however many sessions are active.
+    Sessions are kept in LRU order, and the least recently used idle ones are dropped
+    beyond `max_sessions`.
+
+    Attributes:
+        agent (ReactAgent): The agent that answers the messages (best created with verbose=False).
+        max_llm_calls (int): Maximum number of completions streaming at the same time.
+        max_tool_calls (int): Maximum number of tool calls running at the same time.
+        max_sessions (int): Maximum number of sessions kept in memory.
+    """
+
+    def __init__(self, agent, max_llm_calls: int = 8, max_tool_calls: int = 16, max_sessions: int = 10000):
+        self.agent = agent
+        self.max_llm_calls = max_llm_calls
+        self.max_tool_calls = max_tool_calls
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.llm_limit = asyncio.Semaphore(max_llm_calls)
+        self.tool_limit = asyncio.Semaphore(max_tool_calls)
+
+    def session(self, session_id: str) -> Session:
+        """
+        Returns the session with the given id, starting it if it does not exist.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(history=self.agent.new_chat_history())
+            for old_id in list(self.sessions):
+                if len(self.sessions) <= self.max_sessions:
+                    break
+                if not self.sessions[old_id].lock.locked():
+                    del self.sessions[old_id]
+        self.sessions.move_to_end(session_id)
+        return session
+
+    async def ask(self, session_id: str, message: str, on_response_token=None) -> str:
+        """
+        Answers a message of a session, after the previous messages of the same session.
+
+        Args:
+            session_id (str): The id of the session.
+            message (str): The user's message.
+            on_response_token (Callable, optional): Called with each piece of the response.
+
+        Returns:
+            str: The agent's response.
+        """
+        session = self.session(session_id)
+        started = time.perf_counter()
+        async with session.lock:
+            response = await self.agent.arun(
+                message,
+                on_response_token=on_response_token or (lambda token: None),
+                chat_history=session.history,
+                llm_limit=self.llm_limit,
+                tool_limit=self.tool_limit,
+                metrics=session.metrics,
+            )
+        session.metrics.latencies.append(time.perf_counter() - started)
+        return response
+
+    def metrics(self) -> dict:
+        """
+        Returns the metrics of every session and of the whole server.
+        """
+        sessions = {session_id: session.metrics.summary() for session_id, session in self.sessions.items()}
+        latencies = [latency for session in self.sessions.values() for latency in session.metrics.latencies]
+        return {"sessions": sessions, "total": {"sessions": len(sessions), "messages": len(latencies),
+                                                **latency_summary(latencies)},
+                "tool_cache": self.agent.cache_stats()}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves one connection of the JSON lines protocol. Each request line is either
+        {"session": id, "message": text} or {"metrics": true}. The response pieces come back
+        as {"session": id, "token": text} lines, followed by one
+        {"session": id, "response": text, "seconds": s} line. Requests of different sessions
+        on the same connection are answered concurrently.
+        """
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(payload: dict):
+            async with write_lock:
+                writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        async def answer(request: dict):
+            session_id = str(request.get("session", "default"))
+            started = time.perf_counter()
+            pending = []
+
+            def on_token(token):
+                pending.append(asyncio.ensure_future(send({"session": session_id, "token": token})))
+
+            try:
+                response = await self.ask(session_id, str(request["message"]), on_token)
+                payload = {"session": session_id, "response": response}
+            except Exception as e:
+                payload = {"session": session_id, "error": str(e)}
+            await asyncio.gather(*pending)
+            payload["seconds"] = round(time.perf_counter() - started, 4)
+            await send(payload)
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await send({"error": f"Invalid JSON: {e}"})
+                    continue
+                if request.get("metrics"):
+                    await send(self.metrics())
+                    continue
+                task = asyncio.create_task(answer(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """
+        Serves the JSON lines protocol on a TCP port until cancelled.
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class StandInAsyncGroq:
+    """
+    Local stand-in for AsyncGroq, to load test the server without the API. It streams
+    made-up replies with a configurable latency. A question gets a thought and a
+    get_actual_data call for the coin it mentions. An observation gets a response that
+    quotes it.
+
+    Attributes:
+        first_token_seconds (float): Delay before the first piece of each reply.
+        chunks_per_second (float): Pace of the following pieces (4 characters each).
+    """
+
+    def __init__(self, first_token_seconds: float = 0.2, chunks_per_second: float = 400):
+        self.first_token_seconds = first_token_seconds
+        self.chunks_per_second = chunks_per_second
+        self.chat = SimpleNamespace(completions=self)
+        self.calls = 0
+
+    def reply(self, messages: list) -> str:
+        last = messages[-1]["content"]
+        if last.startswith("<question>"):
+            coin = next((c for c in STAND_IN_COINS if c in last.lower()), STAND_IN_COINS[0])
+            call = json.dumps({"name": "get_actual_data", "arguments": {"moneda": coin}, "id": 0})
+            return f"<thought>I need the current price of {coin}</thought>\n<tool_call>{call}</tool_call>"
+        return f"<thought>I have the data</thought>\n<response>According to the tools: {last}</response>"
+
+    async def create(self, messages: list, model: str, stream: bool = False):
+        self.calls += 1
+        text = self.reply(messages)
+        if not stream:
+            message = SimpleNamespace(content=text)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream(text)
+
+    async def _stream(self, text: str):
+        await asyncio.sleep(self.first_token_seconds)
+        for i in range(0, len(text), 4):
+            if i:
+                await asyncio.sleep(1 / self.chunks_per_second)
+            delta = SimpleNamespace(content=text[i:i + 4])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+async def load_test(server: AgentServer, sessions: int, messages: int) -> dict:
+    """
+    Sends `messages` questions from each of `sessions` concurrent sessions and returns the
+    server metrics, with the wall time and the throughput.
+    """
+    async def user(index: int):
+        coin = STAND_IN_COINS[index % len(STAND_IN_COINS)]
+        for _ in range(messages):
+            await server.ask(f"user-{index}", f"What is the current price of {coin}?")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    metrics = server.metrics()["total"]
+    metrics["tool_cache"] = server.agent.cache_stats()
+    metrics.update(seconds=round(elapsed, 3), messages_per_second=round(sessions * messages / elapsed, 2))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de sesiones del agente")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-llm-calls", type=int, default=8, help="Completions simultáneas")
+    parser.add_argument("--max-tool-calls", type=int, default=16, help="Herramientas simultáneas")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Usa el modelo de prueba y un servidor local de cotizaciones en lugar de Groq y CoinMarketCap")
+    parser.add_argument("--load-test", action="store_true", help="Ejecuta una prueba de carga local y muestra las métricas")
+    parser.add_argument("--sessions", type=int, default=100, help="Sesiones de la prueba de carga")
+    parser.add_argument("--messages", type=int, default=3, help="Mensajes por sesión de la prueba de carga")
+    args = parser.parse_args()
+
+    quote_server = None
+    if args.stand_in or args.load_test:
+        # La clave no se usa: las completions las genera el modelo de prueba
+        os.environ.setdefault("GROQ_API_KEY", "stand-in")
+
+    import main as app
+
+    agent = app.agent
+    agent.verbose = False
+    if args.stand_in or args.load_test:
+        from quotes import CachedQuoteProvider
+        from quotes import HttpQuoteProvider
+        from quotes import QuoteServer
+
+        quote_server = QuoteServer().start()
+        app.QUOTE_PROVIDER = CachedQuoteProvider(HttpQuoteProvider(base_url=quote_server.url), cache_dir=None)
+        agent._async_client = StandInAsyncGroq()
+    server = AgentServer(agent, max_llm_calls=args.max_llm_calls, max_tool_calls=args.max_tool_calls)
+
+    try:
+        if args.load_test:
+            print(json.dumps(asyncio.run(load_test(server, args.sessions, args.messages)), indent=2))
+        else:
+            print(f"Sirviendo en {args.host}:{args.port}")
+            asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if quote_server is not None:
+            quote_server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,16 @@
 import json
+import math
+import threading
+import time
+from collections import OrderedDict
 from typing import Callable
+
+# Resultados que guarda como máximo la caché de cada herramienta
+DEFAULT_CACHE_ENTRIES = 1024
+
+# TTL de los resultados que no caducan nunca (p. ej. cotizaciones históricas)
+CACHE_FOREVER = math.inf
+
 # --- Utilidades para definir herramientas (tools) ---
 
 def get_fn_signature(fn: Callable) -> dict:
@@ -36,31 +47,131 @@ def validate_arguments(tool_call: dict, tool_signature: dict) -> dict:
             tool_call["arguments"][arg_name] = type_mapping[expected_type](arg_value)
     return tool_call
 
+class ToolResultCache:
+    """
+    Caché LRU de los resultados de una herramienta, indexada por sus argumentos ya validados.
+    Cada resultado caduca `ttl` segundos después de guardarse (CACHE_FOREVER para nunca).
+    Los resultados con la clave 'error' no se guardan.
+
+    Attributes:
+        ttl (float | Callable): Segundos de vida de cada resultado, o una función que los
+            calcula a partir de los argumentos (None para no guardar esa llamada).
+        normalize (Callable | None): Convierte los argumentos en los que forman la clave, para
+            que las formas equivalentes de un argumento (p. ej. dos formatos de fecha) la compartan.
+    """
+    def __init__(self, ttl, max_entries: int = DEFAULT_CACHE_ENTRIES, normalize: Callable | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.normalize = normalize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kwargs: dict) -> str:
+        if self.normalize is not None:
+            kwargs = self.normalize(kwargs)
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def ttl_for(self, kwargs: dict) -> float | None:
+        """
+        Devuelve los segundos que se guarda el resultado de una llamada, o None si no se guarda.
+        """
+        return self.ttl(kwargs) if callable(self.ttl) else self.ttl
+
+    def get(self, key: str):
+        """
+        Devuelve (True, resultado) si hay un resultado vigente para la clave, o (False, None).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, result, ttl: float):
+        if isinstance(result, dict) and "error" in result:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Aciertos, fallos, tasa de aciertos y resultados guardados."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
 class Tool:
     """
     Representa una herramienta que envuelve una función y su firma.
+
+    Attributes:
+        timeout (float | None): Segundos que puede tardar una llamada antes de que el agente
+            deje de esperarla (None para usar el límite del agente).
+        cache (ToolResultCache | None): Caché de resultados, si la herramienta es cacheable.
     """
-    def __init__(self, name: str, fn: Callable, fn_signature: str):
+    def __init__(self, name: str, fn: Callable, fn_signature: str, timeout: float | None = None,
+                 cache_ttl=None, cache_entries: int = DEFAULT_CACHE_ENTRIES,
+                 cache_key: Callable | None = None):
         self.name = name
         self.fn = fn
         self.fn_signature = fn_signature
+        self.timeout = timeout
+        self.cache = ToolResultCache(cache_ttl, cache_entries, cache_key) if cache_ttl is not None else None
 
     def __str__(self):
         return self.fn_signature
 
     def run(self, **kwargs):
-        return self.fn(**kwargs)
+        ttl = self.cache.ttl_for(kwargs) if self.cache is not None else None
+        if ttl is None:
+            return self.fn(**kwargs)
+        # Un acierto no llama a la función, así que no abre el navegador ni hace peticiones
+        key = self.cache.key(kwargs)
+        found, result = self.cache.get(key)
+        if found:
+            return result
+        result = self.fn(**kwargs)
+        self.cache.put(key, result, ttl)
+        return result
 
-def tool(fn: Callable):
+def tool(fn: Callable | None = None, *, timeout: float | None = None, cache_ttl=None,
+         cache_key: Callable | None = None):
     """
-    Decorador que convierte una función en una herramienta (Tool).
+    Decorador que convierte una función en una herramienta (Tool). Se usa como @tool o,
+    para fijar el tiempo máximo de la herramienta o guardar sus resultados durante
+    `cache_ttl` segundos, como @tool(timeout=30, cache_ttl=CACHE_FOREVER). `cache_ttl`
+    también puede ser una función de los argumentos, y `cache_key` normaliza los
+    argumentos antes de formar la clave (ver ToolResultCache).
     """
-    def wrapper():
+    def wrapper(fn: Callable):
         fn_signature = get_fn_signature(fn)
         return Tool(
             name=fn_signature.get("name"),
             fn=fn,
-            fn_signature=json.dumps(fn_signature)
+            fn_signature=json.dumps(fn_signature),
+            timeout=timeout,
+            cache_ttl=cache_ttl,
+            cache_key=cache_key,
         )
-    return wrapper()
+    if fn is None:
+        return wrapper
+    return wrapper(fn)
 
@@ -0,0 +1,214 @@
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+
+def chrome_driver_factory(headless: bool = True) -> Callable:
+    """
+    Builds a factory of Chrome sessions. The chromedriver binary is resolved
+    (and downloaded if needed) once, on the first session, instead of on
+    every scraper call.
+
+    Args:
+        headless (bool): Whether Chrome runs without a window.
+
+    Returns:
+        Callable: A function that starts a new Chrome WebDriver each time it is called.
+    """
+    driver_path = []
+
+    def create():
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        if not driver_path:
+            driver_path.append(ChromeDriverManager().install())
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless")
+        return webdriver.Chrome(service=Service(driver_path[0]), options=options)
+
+    return create
+
+
+class StubElement:
+    """
+    A stand-in for a Selenium WebElement, holding a text and optional child elements.
+    """
+
+    def __init__(self, text: str = "", children: list | None = None):
+        self.text = text
+        self.children = children or []
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def find_elements(self, by: str, value: str) -> list:
+        return list(self.children)
+
+
+class StubDriver:
+    """
+    A stand-in for a Selenium WebDriver that serves canned pages, so the pool and the
+    scrapers can run without Chrome.
+
+    Attributes:
+        pages (dict): Maps each url to a dict of locator value -> StubElement (or a list
+            of them, for find_elements).
+        url (str): The page currently loaded.
+        visits (int): Number of pages loaded by this session.
+        closed (bool): Whether quit was called.
+    """
+
+    def __init__(self, pages: dict | None = None):
+        self.pages = pages or {}
+        self.url = None
+        self.visits = 0
+        self.closed = False
+
+    def get(self, url: str):
+        if self.closed:
+            raise RuntimeError("The stub session was closed")
+        self.url = url
+        self.visits += 1
+
+    def find_element(self, by: str, value: str) -> StubElement:
+        element = self.pages.get(self.url, {}).get(value)
+        if element is None:
+            raise LookupError(f"No element {value!r} on {self.url}")
+        return element
+
+    def find_elements(self, by: str, value: str) -> list:
+        element = self.pages.get(self.url, {}).get(value)
+        if element is None:
+            return []
+        return element if isinstance(element, list) else [element]
+
+    def quit(self):
+        self.closed = True
+
+
+class BrowserPool:
+    """
+    Keeps a few warm browser sessions and hands them out to the scrapers, so a tool
+    call pays for a page load instead of a browser start.
+
+    Sessions are created lazily up to `size`, returned to the pool after each use,
+    recycled after `max_uses` pages or when an error escapes the block that used them
+    (the browser may have crashed), and all quit when the pool is closed or at exit.
+
+    Attributes:
+        size (int): The maximum number of sessions alive at the same time.
+        max_uses (int): Number of uses after which a session is replaced by a fresh one.
+        driver_factory (Callable): Function that starts a new session.
+    """
+
+    def __init__(self, size: int = 2, max_uses: int = 50, driver_factory: Callable | None = None):
+        self.size = size
+        self.max_uses = max_uses
+        self.driver_factory = driver_factory or chrome_driver_factory()
+        self._idle = []
+        self._uses = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+        atexit.register(self.close)
+
+    def acquire(self, timeout: float | None = None):
+        """
+        Takes a session from the pool, starting one if none is idle and the pool is
+        not full, or waiting for one to be released otherwise.
+
+        Args:
+            timeout (float | None): Maximum number of seconds to wait for a session.
+
+        Returns:
+            The WebDriver session.
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("The browser pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._uses) < self.size:
+                    # Reserve the slot before starting the browser outside the lock
+                    slot = object()
+                    self._uses[slot] = 0
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError("No browser session was released in time")
+
+        try:
+            driver = self.driver_factory()
+        except Exception:
+            with self._condition:
+                del self._uses[slot]
+                self._condition.notify()
+            raise
+        with self._condition:
+            del self._uses[slot]
+            self._uses[driver] = 0
+            self.created += 1
+        return driver
+
+    def release(self, driver, broken: bool = False):
+        """
+        Returns a session to the pool, or quits it if it is broken, worn out or the
+        pool is closed.
+
+        Args:
+            driver: The session taken with acquire.
+            broken (bool): Whether the session failed and must not be reused.
+        """
+        with self._condition:
+            self._uses[driver] += 1
+            retire = broken or self._closed or self._uses[driver] >= self.max_uses
+            if retire:
+                del self._uses[driver]
+                self.recycled += 1
+            else:
+                self._idle.append(driver)
+            self._condition.notify()
+        if retire:
+            _quit(driver)
+
+    @contextmanager
+    def session(self, timeout: float | None = None):
+        """
+        Context manager that lends a session for the duration of the block.
+
+        Args:
+            timeout (float | None): Maximum number of seconds to wait for a session.
+        """
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, broken=True)
+            raise
+        self.release(driver)
+
+    def close(self):
+        """
+        Quits the idle sessions; the ones in use are quit when they are released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for driver in idle:
+                del self._uses[driver]
+            self._condition.notify_all()
+        for driver in idle:
+            _quit(driver)
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        # The session is being discarded, a dead browser is fine
+        pass
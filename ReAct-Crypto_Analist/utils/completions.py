@@ -1,3 +1,19 @@
+import ast
+import re
+from functools import lru_cache
+
+
+# Tokens the chat format adds to every message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Rough tokenizer used to count tokens locally, close to the Llama 3 tokenizer on English
+# and JSON: words are split in pieces of up to 4 characters, every other symbol is one token
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Tokens each tool call keeps at least when an observation is summarized
+MIN_CALL_SUMMARY_TOKENS = 16
+
+
 def completions_create(client, messages: list, model: str) -> str:
     """
     Sends a request to the client's `completions.create` method to interact with the language model.
@@ -85,4 +101,171 @@ class FixedFirstChatHistory(ChatHistory):
         """
         if len(self) == self.total_length:
             self.pop(1)
-        super().append(msg)
\ No newline at end of file
+        super().append(msg)
+
+async def completions_stream(client, messages: list, model: str):
+    """
+    Streams the model's response from an async client (e.g. AsyncGroq), yielding the text
+    as it is generated.
+
+    Args:
+        client (AsyncGroq): The async Groq client object
+        messages (list[dict]): A list of message objects containing chat history for the model.
+        model (str): The model to use for generating tool calls and responses.
+
+    Yields:
+        str: The next piece of the model's response.
+    """
+    stream = await client.chat.completions.create(messages=messages, model=model, stream=True)
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of a text locally, with an approximation of the model's tokenizer
+    (see APPROXIMATE_TOKEN_PATTERN), so no tokenizer has to be installed or downloaded.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The approximate number of tokens.
+    """
+    return len(APPROXIMATE_TOKEN_PATTERN.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts a text to its first `max_tokens` tokens, with whitespace collapsed.
+
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): Tokens kept from the text.
+
+    Returns:
+        str: The text, ending in " [...]" if it was cut.
+    """
+    text = " ".join(text.split())
+    pieces = APPROXIMATE_TOKEN_PATTERN.finditer(text)
+    for index, piece in enumerate(pieces):
+        if index == max_tokens:
+            return text[:piece.start()].rstrip() + " [...]"
+    return text
+
+
+def summarize_observation(text: str, max_tokens: int = 64) -> str:
+    """
+    Shortens an old observation, the default summarizer of TokenBudgetChatHistory.
+
+    This is a truncation, cut per tool call: the observations of a round ({call id: result})
+    keep every call id, each with the start of its result in an equal share of `max_tokens`
+    (at least MIN_CALL_SUMMARY_TOKENS), so the results of the later calls are not lost. Any
+    other text is cut to its first `max_tokens` tokens.
+
+    Args:
+        text (str): The observation.
+        max_tokens (int): Tokens kept from the observation.
+
+    Returns:
+        str: The summary.
+    """
+    try:
+        results = ast.literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        results = None
+    if not isinstance(results, dict) or not results:
+        return truncate_tokens(text, max_tokens)
+
+    share = max(max_tokens // len(results), MIN_CALL_SUMMARY_TOKENS)
+    entries = (f"{call_id!r}: {truncate_tokens(repr(result), share)}" for call_id, result in results.items())
+    return "{" + ", ".join(entries) + "}"
+
+
+class TokenBudgetChatHistory(FixedFirstChatHistory):
+    def __init__(
+        self,
+        messages: list | None = None,
+        max_tokens: int = 6000,
+        pinned: int = 1,
+        keep_recent: int = 4,
+        summarize=summarize_observation,
+        question_tag: str = "question",
+    ):
+        """Initialise the history with a token budget instead of a message count.
+
+        When the history goes over `max_tokens`, the oldest observations (user messages after
+        the pinned ones) are replaced by summaries, and if that is not enough the oldest turns
+        are dropped. The first `pinned` messages (the system prompt) and the last `keep_recent`
+        ones are never touched. Questions (user messages in `question_tag`) are never
+        summarized, and the latest one is never dropped, however many questions a long
+        conversation has asked before it.
+
+        Args:
+            messages (list | None): A list of initial messages
+            max_tokens (int): The maximum number of tokens of the whole history.
+            pinned (int): Number of leading messages that always stay as they are.
+            keep_recent (int): Number of trailing messages that always stay as they are.
+            summarize (Callable): Function that turns an observation into its summary.
+            question_tag (str): Tag of the user's questions.
+        """
+        super().__init__(messages)
+        self.max_tokens = max_tokens
+        self.pinned = pinned
+        self.question_tag = question_tag
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.summarized = 0
+        self.dropped = 0
+        self.compact()
+
+    def append(self, msg: dict):
+        """Add a message and compact the history if it went over the budget.
+
+        Args:
+            msg (dict): The message to be added
+        """
+        super().append(msg)
+        self.compact()
+
+    def token_count(self) -> int:
+        """Returns the tokens of the whole history, as sent to the model."""
+        return sum(count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS for msg in self)
+
+    def is_question(self, msg: dict) -> bool:
+        """Whether a message is one of the user's questions."""
+        return msg["role"] == "user" and msg["content"].startswith(f"<{self.question_tag}>")
+
+    def compact(self):
+        """Summarizes and then drops old messages until the history fits in the budget."""
+        total = self.token_count()
+        if total <= self.max_tokens:
+            return
+
+        # Oldest observations first
+        for index in range(self.pinned, len(self) - self.keep_recent):
+            msg = self[index]
+            if (msg["role"] != "user" or self.is_question(msg)
+                    or msg["content"].startswith("<observation_summary>")):
+                continue
+            summary = f"<observation_summary>{self.summarize(msg['content'])}</observation_summary>"
+            total += count_tokens(summary) - count_tokens(msg["content"])
+            self[index] = build_prompt_structure(prompt=summary, role=msg["role"])
+            self.summarized += 1
+            if total <= self.max_tokens:
+                return
+
+        # Then the oldest turns, older questions included, but never the latest question
+        latest_question = max((i for i, msg in enumerate(self) if self.is_question(msg)), default=-1)
+        index = self.pinned
+        while total > self.max_tokens and index < len(self) - self.keep_recent:
+            if index == latest_question:
+                index += 1
+                continue
+            msg = self.pop(index)
+            latest_question -= index < latest_question
+            total -= count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+            self.dropped += 1
@@ -1,7 +1,15 @@
+import bisect
 import re
 from dataclasses import dataclass
 
 
+# Any opening or closing tag: <thought>, </tool_call>, ...
+TAG_PATTERN = re.compile(r"<(/?)(\w+)>")
+
+# The beginning of a tag at the very end of the text, whose '>' has not arrived yet
+PARTIAL_TAG_PATTERN = re.compile(r"</?\w*\Z")
+
+
 @dataclass
 class TagContentResult:
     """
@@ -16,6 +24,157 @@ class TagContentResult:
     found: bool
 
 
+@dataclass
+class TagEvent:
+    """
+    A piece of tagged content found by StreamingTagParser.
+
+    Attributes:
+        tag (str): The name of the tag (e.g. 'tool_call', 'response').
+        content (str): The text of the tag that arrived with this event when `done` is False,
+            or the whole stripped content of the tag when `done` is True.
+        done (bool): Whether the closing tag was reached.
+    """
+
+    tag: str
+    content: str
+    done: bool
+
+
+class StreamingTagParser:
+    """
+    Single-pass tag tokenizer. Finds every tag of a text in one scan, and accepts the text in
+    chunks (e.g. a streamed completion), so a tag can be acted on as soon as it is closed
+    instead of when the whole text is available.
+
+    Open tags are kept on a stack, so nested tags are all found, each with its own content.
+    A closing tag that matches no open tag is ignored, and one that matches an outer tag
+    also ends the tags opened inside it that were never closed. Tags still open when the
+    text ends are left out of the results (see `unterminated`).
+
+    Attributes:
+        stream_tags (tuple): Tags whose content is also reported while it arrives, chunk by chunk.
+    """
+
+    def __init__(self, stream_tags: tuple = ("response",)):
+        self.stream_tags = stream_tags
+        # The text is kept as its chunks, so feeding is not quadratic in the text length
+        self._chunks = []
+        self._offsets = []
+        self._length = 0
+        # Where the next scan starts and how far the streamed content was reported
+        self._scan = 0
+        self._sent = 0
+        # (tag, content start) of the open tags, innermost last
+        self._stack = []
+        self._streaming = 0
+
+    @property
+    def text(self) -> str:
+        """
+        Everything fed so far.
+        """
+        if len(self._chunks) > 1:
+            self._chunks, self._offsets = ["".join(self._chunks)], [0]
+        return self._chunks[0] if self._chunks else ""
+
+    def _slice(self, start: int, end: int) -> str:
+        if start >= end:
+            return ""
+        first = bisect.bisect_right(self._offsets, start) - 1
+        last = bisect.bisect_left(self._offsets, end)
+        return "".join(self._chunks[first:last])[start - self._offsets[first]:end - self._offsets[first]]
+
+    def feed(self, chunk: str) -> list[TagEvent]:
+        """
+        Adds a chunk of text and returns the events it completes.
+
+        Args:
+            chunk (str): The next piece of the text.
+
+        Returns:
+            list[TagEvent]: The partial content of streamed tags and the tags closed by this chunk.
+        """
+        if chunk:
+            self._chunks.append(chunk)
+            self._offsets.append(self._length)
+            self._length += len(chunk)
+        events = []
+        # Only the text after the last scan is scanned; a tag split across chunks is held back
+        base = self._scan
+        tail = self._slice(base, self._length)
+        partial = PARTIAL_TAG_PATTERN.search(tail)
+        end = base + (partial.start() if partial else len(tail))
+
+        for match in TAG_PATTERN.finditer(tail, 0, end - base):
+            closing, tag = match.groups()
+            tag_start, tag_end = base + match.start(), base + match.end()
+            if self._streaming:
+                self._stream(events, tag_start)
+            if not closing:
+                if tag in self.stream_tags:
+                    if not self._streaming:
+                        self._sent = tag_end
+                    self._streaming += 1
+                self._stack.append((tag, tag_end))
+                continue
+
+            for depth in range(len(self._stack) - 1, -1, -1):
+                if self._stack[depth][0] == tag:
+                    break
+            else:
+                # Stray closing tag, left as text
+                continue
+            start = self._stack[depth][1]
+            for open_tag, _ in self._stack[depth:]:
+                self._streaming -= open_tag in self.stream_tags
+            del self._stack[depth:]
+            events.append(TagEvent(tag, self._slice(start, tag_start).strip(), True))
+
+        if self._streaming:
+            self._stream(events, end)
+        self._scan = end
+        return events
+
+    def _stream(self, events: list, end: int):
+        """
+        Reports the text up to `end` that has not been reported yet as part of the innermost
+        streamed tag.
+        """
+        if end > self._sent:
+            tag = next(t for t, _ in reversed(self._stack) if t in self.stream_tags)
+            events.append(TagEvent(tag, self._slice(self._sent, end), False))
+            self._sent = end
+
+    def unterminated(self) -> list[TagEvent]:
+        """
+        Returns the tags that are still open, with the content they have so far (e.g. a
+        response cut off by the token limit).
+        """
+        return [TagEvent(tag, self._slice(start, self._length).strip(), False) for tag, start in self._stack]
+
+
+def extract_tags(text: str, tags: list[str] | None = None) -> dict[str, TagContentResult]:
+    """
+    Extracts the content of every tag in the text in a single scan.
+
+    Args:
+        text (str): The input string containing multiple potential tags.
+        tags (list[str] | None): Tags that must be in the result even if they are not found.
+
+    Returns:
+        dict[str, TagContentResult]: The contents found for each tag, in the order they are closed.
+    """
+    parser = StreamingTagParser(stream_tags=())
+    found = {}
+    for event in parser.feed(text):
+        found.setdefault(event.tag, []).append(event.content)
+    result = {tag: TagContentResult(content=[], found=False) for tag in tags or []}
+    for tag, contents in found.items():
+        result[tag] = TagContentResult(content=contents, found=True)
+    return result
+
+
 def extract_tag_content(text: str, tag: str) -> TagContentResult:
     """
     Extracts all content enclosed by specified tags (e.g., <thought>, <response>, etc.).
@@ -29,14 +188,4 @@ def extract_tag_content(text: str, tag: str) -> TagContentResult:
             - 'content' (list): A list of strings containing the content found between the specified tags.
             - 'found' (bool): A flag indicating whether any content was found for the given tag.
     """
-    # Build the regex pattern dynamically to find multiple occurrences of the tag
-    tag_pattern = rf"<{tag}>(.*?)</{tag}>"
-
-    # Use findall to capture all content between the specified tag
-    matched_contents = re.findall(tag_pattern, text, re.DOTALL)
-
-    # Return the dataclass instance with the result
-    return TagContentResult(
-        content=[content.strip() for content in matched_contents],
-        found=bool(matched_contents),
-    )
\ No newline at end of file
+    return extract_tags(text, [tag])[tag]
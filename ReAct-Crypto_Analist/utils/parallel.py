@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import InvalidStateError
+from concurrent.futures import wait
+from typing import Callable
+
+
+class CallTimeout(Exception):
+    """
+    Set as the outcome of a call that did not finish within its timeout.
+    """
+
+
+def run_parallel(calls: list, max_concurrency: int = 4) -> list:
+    """
+    Runs independent calls concurrently, at most `max_concurrency` at a time, and
+    returns their outcomes in the order of `calls`.
+
+    Each call runs on its own daemon thread. A call that exceeds its timeout is given
+    up on: its outcome becomes a CallTimeout and its slot goes to the next call, so a
+    hung call (e.g. a browser that never answers) cannot stall the rest of the batch.
+    The abandoned thread keeps running in the background until the call returns.
+
+    Args:
+        calls (list): Tuples of (fn, timeout), where fn takes no arguments and timeout
+            is the number of seconds the call may run once started (None for no limit).
+        max_concurrency (int): Maximum number of calls running at the same time.
+
+    Returns:
+        list: One Future per call, done, holding the call's result or exception.
+    """
+    futures = [Future() for _ in calls]
+    pending = list(range(len(calls)))
+    running = {}
+
+    def start(index):
+        fn, timeout = calls[index]
+        future = futures[index]
+        future.set_running_or_notify_cancel()
+
+        def target():
+            try:
+                result = fn()
+            except BaseException as e:
+                _settle(future.set_exception, e)
+                return
+            _settle(future.set_result, result)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        running[index] = deadline
+        threading.Thread(target=target, daemon=True).start()
+
+    while pending or running:
+        while pending and len(running) < max(max_concurrency, 1):
+            start(pending.pop(0))
+
+        deadlines = [d for d in running.values() if d is not None]
+        wait_for = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+        wait([futures[i] for i in running], timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for index, deadline in list(running.items()):
+            future = futures[index]
+            if not future.done() and deadline is not None and now >= deadline:
+                _settle(future.set_exception, CallTimeout(f"Timed out after {calls[index][1]} seconds"))
+            if future.done():
+                del running[index]
+
+    return futures
+
+
+async def cancel_tasks(tasks):
+    """
+    Cancels asyncio tasks and waits until they have finished, ignoring their outcomes.
+
+    Args:
+        tasks (Iterable[asyncio.Task]): The tasks to cancel.
+    """
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _settle(setter: Callable, value):
+    try:
+        setter(value)
+    except InvalidStateError:
+        # The call finished right at its deadline, the first outcome wins
+        pass